@@ -2,16 +2,28 @@
 app.py
 Arquivo principal - Ponto de entrada do sistema
 """
+import time
+INICIO = time.perf_counter()
+
+# dotenv é opcional; o .env precisa ser lido antes dos imports de models/,
+# que leem as variáveis HORAS_EXTRAS_* ao serem importados
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except Exception:
+    pass
+
 import tkinter as tk
+from ui.aquecimento import Aquecimento, TemposInicializacao
 from ui.main_window import MainWindow
-from models.database import init_db
 
 def main():
     """Função principal que inicia o sistema"""
-    # Inicializa o banco de dados
-    print("Inicializando banco de dados...")
-    init_db()
-    print("Banco de dados inicializado com sucesso!")
+    tempos = TemposInicializacao(INICIO)
+    tempos.marcar('imports')
+
+    # Banco (init_db), telas e IA carregam em segundo plano
+    aquecimento = Aquecimento(tempos).iniciar()
     
     # Cria janela principal
     root = tk.Tk()
@@ -24,10 +36,16 @@ def main():
         pass
     
     # Inicializa aplicação
-    app = MainWindow(root)
+    app = MainWindow(root, aquecimento)
+    tempos.marcar('janela_criada')
+
+    # Processa os eventos pendentes para a janela ser desenhada
+    root.update()
+    tempos.marcar('primeira_pintura')
+    aquecimento.relatar_quando_concluir(root)
     
     # Inicia loop principal
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
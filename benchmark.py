@@ -0,0 +1,254 @@
+"""
+benchmark.py
+Medição de desempenho sem interface gráfica, em bancos sintéticos de vários tamanhos
+
+Uso:
+    python benchmark.py --tamanhos 1000,10000 --saida resultado.json
+    python benchmark.py --tamanhos 1000,10000 --base baseline.json --falhar
+
+Cada tamanho é o número de funcionários de um banco gerado por
+services.gerador_carga (sempre com a mesma semente); os bancos ficam em
+--pasta e são reaproveitados entre execuções. Casos medidos:
+
+    calculo_jornada     CalculoService.calcular_jornada_completa (por jornada)
+    calculo_lote        CalculoService.calcular_lote (lote de 10 mil jornadas)
+    salvar_registro     verificação de duplicata + gravação (JornadaService)
+    gerar_relatorio     totais do período (ResumoService.consultar_periodo)
+    carregar_registros  primeira página + 10 páginas seguintes + contagem
+    coletar_contexto    montagem do contexto do chat (ContextoIA.montar)
+
+O JSON traz mediana, mínimo, média e p95 em milissegundos por caso. Com
+--base, cada mediana é comparada com a do arquivo de referência.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, time as hora_do_dia, timedelta
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import sessionmaker
+from models.database import SessaoRastreada
+from models.registro_jornada import RegistroJornada
+from services.calculo_service import CalculoService
+from services.contexto_ia_service import ContextoIA
+from services.gerador_carga import GeradorCarga, criar_engine_carga
+from services.jornada_service import JornadaService
+from services.resumo_service import ResumoService
+
+ANOS = 1
+SEMENTE = 42
+
+# Tolerância padrão para considerar uma mediana pior que a de referência
+TOLERANCIA = 0.10
+
+
+def medir(funcao, repeticoes, aquecimento=1):
+    """Executa funcao() várias vezes e devolve as estatísticas em ms"""
+    for _ in range(aquecimento):
+        funcao()
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    tempos.sort()
+    return {
+        'repeticoes': repeticoes,
+        'mediana_ms': round(statistics.median(tempos), 4),
+        'min_ms': round(tempos[0], 4),
+        'media_ms': round(statistics.fmean(tempos), 4),
+        'p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 4),
+    }
+
+
+def preparar_banco(pasta, funcionarios):
+    """Gera (ou reaproveita) o banco sintético com `funcionarios` funcionários"""
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"carga_{funcionarios}f_{ANOS}a_s{SEMENTE}.db")
+    engine = criar_engine_carga(caminho)
+
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        print(f"🏭 Gerando banco com {funcionarios} funcionários...")
+        gerador = GeradorCarga(engine, empresas=max(1, funcionarios // 100),
+                               funcionarios=funcionarios, anos=ANOS, semente=SEMENTE)
+        r = gerador.gerar()
+        print(f"   {r['registros']} registros em {r['segundos']}s")
+
+    return engine
+
+
+# ---------------------------------------------------------------- casos
+
+def caso_calculo_jornada(repeticoes):
+    entrada, saida = hora_do_dia(8, 0), hora_do_dia(18, 17)
+    return medir(
+        lambda: CalculoService.calcular_jornada_completa(entrada, saida, 1.0, 8.0),
+        repeticoes * 100
+    )
+
+def caso_calculo_lote(repeticoes):
+    import random
+    aleatorio = random.Random(SEMENTE)
+    entradas = [aleatorio.randrange(1440) for _ in range(10_000)]
+    saidas = [aleatorio.randrange(1440) for _ in range(10_000)]
+    return medir(lambda: CalculoService.calcular_lote(entradas, saidas, 1.0, 8.0), repeticoes)
+
+def caso_salvar_registro(Sessao, data_fim, repeticoes):
+    """Grava jornadas novas (depois do período gerado) e as remove no fim"""
+    contador = iter(range(1_000_000))
+    dia = data_fim + timedelta(days=1)
+
+    def salvar():
+        funcionario_id = next(contador) + 1
+        with Sessao() as db:
+            existente = JornadaService.buscar_existente(db, funcionario_id, dia)
+        with Sessao() as db:
+            JornadaService.registrar(db, funcionario_id, 8.0, dia, hora_do_dia(8, 0),
+                                     hora_do_dia(17, 30), 1.0, substituir_id=existente)
+
+    try:
+        return medir(salvar, repeticoes)
+    finally:
+        with Sessao() as db:
+            db.execute(delete(RegistroJornada).where(RegistroJornada.data > data_fim))
+            db.commit()
+
+def caso_gerar_relatorio(Sessao, data_fim, repeticoes):
+    """Mesmo período do filtro 'Últimos 30 dias' da tela"""
+    inicio = data_fim - timedelta(days=30)
+
+    def gerar():
+        with Sessao() as db:
+            ResumoService.consultar_periodo(db, inicio, data_fim)
+
+    return medir(gerar, repeticoes)
+
+def caso_carregar_registros(Sessao, repeticoes, paginas=10, tamanho=100):
+    from ui.registro_jornada_modern import RegistroJornadaModern
+
+    def carregar():
+        with Sessao() as db:
+            RegistroJornadaModern.contar_registros(db)
+            apos = None
+            for _ in range(paginas + 1):
+                pagina = RegistroJornadaModern.buscar_pagina_registros(db, apos, tamanho)
+                if not pagina:
+                    break
+                apos = pagina[-1][0]
+
+    return medir(carregar, repeticoes)
+
+def caso_coletar_contexto(Sessao, data_fim, repeticoes):
+    def coletar():
+        with Sessao() as db:
+            ContextoIA.montar(db, data_fim)
+
+    return medir(coletar, repeticoes)
+
+
+def executar(tamanhos, pasta, repeticoes):
+    resultado = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'processador': platform.processor() or platform.machine(),
+            'anos': ANOS,
+            'semente': SEMENTE,
+            'repeticoes': repeticoes,
+        },
+        'independente_do_banco': {
+            'calculo_jornada': caso_calculo_jornada(repeticoes),
+            'calculo_lote': caso_calculo_lote(repeticoes),
+        },
+        'por_tamanho': {},
+    }
+
+    for funcionarios in tamanhos:
+        engine = preparar_banco(pasta, funcionarios)
+        Sessao = sessionmaker(class_=SessaoRastreada, autocommit=False, autoflush=False, bind=engine)
+        with Sessao() as db:
+            data_fim = db.execute(select(func.max(RegistroJornada.data))).scalar()
+            registros = db.execute(select(func.count()).select_from(RegistroJornada)).scalar()
+
+        print(f"⏱️ Medindo {funcionarios} funcionários ({registros} registros)...")
+        resultado['por_tamanho'][str(funcionarios)] = {
+            'registros': registros,
+            'salvar_registro': caso_salvar_registro(Sessao, data_fim, repeticoes),
+            'gerar_relatorio': caso_gerar_relatorio(Sessao, data_fim, repeticoes),
+            'carregar_registros': caso_carregar_registros(Sessao, repeticoes),
+            'coletar_contexto': caso_coletar_contexto(Sessao, data_fim, repeticoes),
+        }
+        engine.dispose()
+
+    return resultado
+
+
+def _casos(resultado):
+    """(nome, estatísticas) de todos os casos, com o tamanho no nome"""
+    for nome, stats in resultado.get('independente_do_banco', {}).items():
+        yield nome, stats
+    for tamanho, casos in resultado.get('por_tamanho', {}).items():
+        for nome, stats in casos.items():
+            if isinstance(stats, dict):
+                yield f"{nome}@{tamanho}", stats
+
+
+def comparar(resultado, base, tolerancia=TOLERANCIA):
+    """
+    Compara medianas com a referência
+
+    Returns:
+        list: (caso, mediana_base, mediana_atual, razao, piorou)
+    """
+    referencia = dict(_casos(base))
+    linhas = []
+    for nome, stats in _casos(resultado):
+        if nome not in referencia:
+            continue
+        antes, agora = referencia[nome]['mediana_ms'], stats['mediana_ms']
+        razao = agora / antes if antes else float('inf')
+        linhas.append((nome, antes, agora, round(razao, 3), razao > 1 + tolerancia))
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos principais")
+    parser.add_argument('--tamanhos', default='1000,10000',
+                        help="funcionários por banco, separados por vírgula")
+    parser.add_argument('--pasta', default='bench_dbs', help="onde os bancos gerados ficam")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--saida', help="arquivo JSON de resultado (padrão: só imprime)")
+    parser.add_argument('--base', help="JSON de referência para comparação")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    parser.add_argument('--falhar', action='store_true',
+                        help="código de saída 1 se algum caso piorar além da tolerância")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(',') if t.strip()]
+    resultado = executar(tamanhos, args.pasta, args.repeticoes)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        print(f"💾 Resultado salvo em {args.saida}")
+    else:
+        print(texto)
+
+    if args.base:
+        with open(args.base, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        piorou = False
+        print(f"\n📊 Comparação com {args.base} (mediana, ms):")
+        for nome, antes, agora, razao, pior in comparar(resultado, base, args.tolerancia):
+            marca = "❌" if pior else "✅"
+            print(f"  {marca} {nome:32} {antes:10.3f} → {agora:10.3f}  ({razao:.2f}x)")
+            piorou = piorou or pior
+        if piorou and args.falhar:
+            sys.exit(1)
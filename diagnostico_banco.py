@@ -4,6 +4,7 @@ Script para diagnosticar e corrigir problemas no banco de dados
 """
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
+from models.tipos import SQL_CENTESIMOS_PARA_HORAS, SQL_DIAS_PARA_TEXTO
 
 DATABASE_URL = 'sqlite:///jornada_trabalho.db'
 
@@ -58,8 +59,12 @@ def diagnosticar_banco():
         print(f"\n   📊 Total de registros: {num_reg}")
         
         if num_reg > 0:
-            result = session.execute(text("""
-                SELECT r.id, r.funcionario_id, r.data, r.horas_extras, r.horas_faltantes
+            # Datas e horas ficam codificadas em inteiros (ver models/tipos.py)
+            result = session.execute(text(f"""
+                SELECT r.id, r.funcionario_id,
+                       {SQL_DIAS_PARA_TEXTO.format('r.data')},
+                       {SQL_CENTESIMOS_PARA_HORAS.format('r.horas_extras')},
+                       {SQL_CENTESIMOS_PARA_HORAS.format('r.horas_faltantes')}
                 FROM registros_jornada r
                 LIMIT 5
             """))
@@ -81,14 +86,14 @@ def diagnosticar_banco():
     if num_func > 0 and num_reg > 0:
         print("\n🧪 5. TESTE DE JOIN:")
         try:
-            result = session.execute(text("""
+            result = session.execute(text(f"""
                 SELECT 
                     f.id,
                     f.nome,
                     f.empresa,
                     COUNT(r.id) as num_registros,
-                    SUM(r.horas_extras) as total_extras,
-                    SUM(r.horas_faltantes) as total_faltas
+                    {SQL_CENTESIMOS_PARA_HORAS.format('SUM(r.horas_extras)')} as total_extras,
+                    {SQL_CENTESIMOS_PARA_HORAS.format('SUM(r.horas_faltantes)')} as total_faltas
                 FROM funcionarios f
                 LEFT JOIN registros_jornada r ON f.id = r.funcionario_id
                 GROUP BY f.id, f.nome, f.empresa
@@ -0,0 +1,91 @@
+"""
+models/banco_horas.py
+Banco de horas: lançamentos diários com saldos acumulados por funcionário
+
+Cada linha guarda o crédito (horas extras) e o débito (horas faltantes) do dia
+e as somas acumuladas desde o primeiro registro do funcionário, então o saldo
+em qualquer data ou o movimento de qualquer período é a diferença de duas
+linhas. banco_horas é mantido por services/banco_horas_service.py; os gatilhos
+abaixo só anotam, a cada alteração em registros_jornada, o primeiro dia que
+precisa ser refeito.
+"""
+from sqlalchemy import Column, ForeignKey, Integer
+from models.database import Base
+from models.tipos import DataDias
+
+class BancoHoras(Base):
+    __tablename__ = "banco_horas"
+
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), primary_key=True)
+    data = Column(DataDias, primary_key=True)
+    # Centésimos de hora inteiros (mesma unidade de registros_jornada.horas_extras):
+    # as somas acumuladas não acumulam erro de arredondamento
+    credito = Column(Integer, nullable=False, default=0)
+    debito = Column(Integer, nullable=False, default=0)
+    credito_acumulado = Column(Integer, nullable=False, default=0)
+    debito_acumulado = Column(Integer, nullable=False, default=0)
+    # Créditos vencidos sem compensação (prazo em services/banco_horas_service.py)
+    expirado_acumulado = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BancoHoras(funcionario_id={self.funcionario_id}, {self.data})>"
+
+
+class BancoHorasPendente(Base):
+    __tablename__ = "banco_horas_pendentes"
+
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), primary_key=True)
+    # Primeiro dia alterado desde a última atualização do banco de horas
+    data_inicio = Column(DataDias, nullable=False)
+
+    def __repr__(self):
+        return f"<BancoHorasPendente(funcionario_id={self.funcionario_id}, desde {self.data_inicio})>"
+
+
+def _marcar(alias):
+    """UPSERT que recua o dia pendente do funcionário para o dia do registro"""
+    return f"""
+        INSERT INTO banco_horas_pendentes (funcionario_id, data_inicio)
+        SELECT {alias}.funcionario_id, {alias}.data
+        WHERE {alias}.funcionario_id IS NOT NULL AND {alias}.data IS NOT NULL
+        ON CONFLICT (funcionario_id) DO UPDATE SET
+            data_inicio = MIN(data_inicio, excluded.data_inicio);
+    """
+
+# Gatilhos em registros_jornada, inclusive para gravações feitas com SQL direto
+GATILHOS_BANCO_HORAS = {
+    'trg_banco_horas_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_banco_horas_insert
+        AFTER INSERT ON registros_jornada
+        BEGIN
+            {_marcar('NEW')}
+        END
+    """,
+    'trg_banco_horas_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_banco_horas_delete
+        AFTER DELETE ON registros_jornada
+        BEGIN
+            {_marcar('OLD')}
+        END
+    """,
+    'trg_banco_horas_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_banco_horas_update
+        AFTER UPDATE OF funcionario_id, data, horas_extras, horas_faltantes
+        ON registros_jornada
+        BEGIN
+            {_marcar('OLD')}
+            {_marcar('NEW')}
+        END
+    """,
+}
+
+# Marca todos os funcionários com registros para refazer desde o primeiro dia
+SQL_MARCAR_TODOS = """
+    INSERT INTO banco_horas_pendentes (funcionario_id, data_inicio)
+    SELECT funcionario_id, MIN(data)
+    FROM registros_jornada
+    WHERE funcionario_id IS NOT NULL
+    GROUP BY funcionario_id
+    ON CONFLICT (funcionario_id) DO UPDATE SET
+        data_inicio = MIN(data_inicio, excluded.data_inicio)
+"""
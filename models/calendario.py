@@ -0,0 +1,41 @@
+"""
+models/calendario.py
+Calendário de dias não úteis por localidade e feriados estaduais/municipais cadastrados
+
+calendario é gerado por services/calendario_service.py (não editar à mão):
+uma linha por fim de semana, feriado ou ponto facultativo de cada localidade,
+com os tipos combinados em bits. Dia sem linha é dia útil.
+"""
+from sqlalchemy import Column, Integer, String
+from models.database import Base
+from models.tipos import DataDias
+
+class Calendario(Base):
+    __tablename__ = "calendario"
+
+    localidade = Column(String(60), primary_key=True)
+    # Mesma codificação de registros_jornada.data (junção direta por inteiro)
+    data = Column(DataDias, primary_key=True)
+    tipo = Column(Integer, nullable=False)
+    descricao = Column(String(200))
+
+    def __repr__(self):
+        return f"<Calendario({self.localidade} {self.data} tipo={self.tipo})>"
+
+
+class FeriadoLocal(Base):
+    __tablename__ = "feriados_locais"
+
+    id = Column(Integer, primary_key=True)
+    # Vale para a localidade e as que estão abaixo dela ('BR/SP' vale para 'BR/SP/Campinas')
+    localidade = Column(String(60), nullable=False, index=True)
+    descricao = Column(String(200), nullable=False)
+    # Data fixa (mes/dia) ou móvel (dias_apos_pascoa, ex.: 60 = Corpus Christi)
+    mes = Column(Integer)
+    dia = Column(Integer)
+    dias_apos_pascoa = Column(Integer)
+    # Bit de services/calendario_service.py (FERIADO_ESTADUAL, FERIADO_MUNICIPAL, PONTO_FACULTATIVO)
+    tipo = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<FeriadoLocal({self.localidade}: {self.descricao})>"
@@ -2,34 +2,180 @@
 models/database.py
 Configuração do banco de dados SQLAlchemy - ATUALIZADO
 """
-from sqlalchemy import create_engine
+import os
+import weakref
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from models.monitor_sql import MONITOR_ATIVO, instrumentar_engine, monitor_sql
 
 # Configuração do banco de dados SQLite
 DATABASE_URL = "sqlite:///horas_extras.db"
 
+# Perfis de PRAGMAs aplicados em cada conexão SQLite.
+# 'desempenho': WAL permite relatórios lendo enquanto jornadas são gravadas;
+# 'seguro': modo padrão do SQLite, usado como fallback quando WAL não é suportado
+# (ex.: banco em pasta de rede).
+PERFIS_SQLITE = {
+    'desempenho': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,        # ~64 MB (valor negativo = KiB)
+        'mmap_size': 268435456,      # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,        # ms aguardando o escritor liberar o banco
+    },
+    'seguro': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+}
+
+# Perfil escolhido via variável de ambiente (HORAS_EXTRAS_PERFIL_DB=seguro)
+PERFIL_SQLITE = os.getenv('HORAS_EXTRAS_PERFIL_DB', 'desempenho')
+
+def aplicar_perfil_sqlite(dbapi_connection, perfil=PERFIL_SQLITE):
+    """Aplica os PRAGMAs do perfil na conexão; cai para 'seguro' se falhar"""
+    pragmas = PERFIS_SQLITE.get(perfil, PERFIS_SQLITE['seguro'])
+    cursor = dbapi_connection.cursor()
+    try:
+        for nome, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nome}={valor}")
+            if nome == 'journal_mode':
+                modo = cursor.fetchone()[0]
+                # Banco em memória responde 'memory' e não precisa de fallback
+                if modo.lower() not in (str(valor).lower(), 'memory'):
+                    raise RuntimeError(f"journal_mode={valor} não suportado (ativo: {modo})")
+    except Exception as e:
+        if perfil == 'seguro':
+            raise
+        print(f"⚠️ Perfil SQLite '{perfil}' indisponível ({e}). Usando perfil 'seguro'.")
+        cursor.close()
+        aplicar_perfil_sqlite(dbapi_connection, 'seguro')
+        return
+    cursor.close()
+
+def configurar_engine(engine, perfil=None):
+    """Registra o perfil de desempenho em toda nova conexão do engine"""
+    if engine.dialect.name != 'sqlite':
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _ao_conectar(dbapi_connection, connection_record):
+        aplicar_perfil_sqlite(dbapi_connection, perfil or PERFIL_SQLITE)
+
+    return engine
+
 # Criação do engine
-engine = create_engine(DATABASE_URL, echo=False)
+engine = configurar_engine(create_engine(DATABASE_URL, echo=False))
+
+# Tempo de cada statement, origem (tela) e log de consultas lentas
+if MONITOR_ATIVO:
+    instrumentar_engine(engine, monitor_sql)
+
+class SessaoRastreada(Session):
+    """Session que se registra enquanto está aberta (ver estatisticas_sessoes)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _sessoes_abertas.add(self)
+
+    def close(self):
+        super().close()
+        _sessoes_abertas.discard(self)
+
+# Sessões criadas e ainda não fechadas (fracas: sessão esquecida e coletada some daqui)
+_sessoes_abertas = weakref.WeakSet()
+
+@event.listens_for(SessaoRastreada, "after_begin")
+def _ao_iniciar_transacao(session, transaction, connection):
+    # Sessão fechada e reutilizada volta a contar como aberta
+    _sessoes_abertas.add(session)
 
 # Criação da sessão
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=SessaoRastreada, autocommit=False, autoflush=False, bind=engine)
 
 # Base para os modelos
 Base = declarative_base()
 
-def get_db():
-    """Retorna uma sessão do banco de dados"""
+@contextmanager
+def sessao():
+    """
+    Sessão curta para uma ação da tela (unidade de trabalho)
+
+    Uso:
+        with sessao() as db:
+            ...
+            db.commit()
+
+    Exceção dentro do bloco desfaz a transação; ao sair a sessão é sempre
+    fechada, liberando a conexão e os objetos carregados (identity map).
+    """
     db = SessionLocal()
     try:
-        return db
-    except Exception as e:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
         db.close()
-        raise e
 
-def init_db():
-    """Inicializa o banco de dados criando todas as tabelas"""
+def estatisticas_sessoes():
+    """
+    Sessões abertas e objetos mantidos por elas
+
+    Returns:
+        dict: {'sessoes_abertas', 'objetos_identity_map'}
+    """
+    sessoes = list(_sessoes_abertas)
+    return {
+        'sessoes_abertas': len(sessoes),
+        'objetos_identity_map': sum(len(s.identity_map) for s in sessoes)
+    }
+
+def get_db():
+    """
+    Retorna uma sessão do banco de dados
+
+    Quem chama é responsável por fechá-la; telas novas devem usar sessao().
+    """
+    return SessionLocal()
+
+def importar_modelos():
+    """Importa todos os modelos, registrando suas tabelas em Base.metadata
+
+    create_all só cria as tabelas dos modelos já importados, e os
+    relationship() por nome ('Empresa', 'Funcionario') só resolvem com todos
+    os mapeamentos registrados. init_db e aplicar_migracoes chamam isto.
+    """
+    from models.banco_horas import BancoHoras, BancoHorasPendente
+    from models.calendario import Calendario, FeriadoLocal
     from models.empresa import Empresa
+    from models.fechamento_mensal import FechamentoMensal
     from models.funcionario import Funcionario
+    from models.marcacao import Marcacao
+    from models.recalculo_jornada import RecalculoJornada
+    from models.regra_empresa import RegraEmpresa
     from models.registro_jornada import RegistroJornada
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from models.resumo_mensal import ResumoMensal
+
+def init_db(forcar=False):
+    """
+    Inicializa o banco de dados criando todas as tabelas
+
+    Banco com PRAGMA user_version em dia pula create_all e as migrações (que
+    inspecionam o esquema tabela a tabela); forcar=True refaz tudo.
+
+    Returns:
+        bool: True se o esquema foi verificado/migrado, False se já estava em dia
+    """
+    from models.migracoes import VERSAO_ESQUEMA, aplicar_migracoes, versao_esquema
+    # Mesmo com o esquema em dia, os mapeamentos precisam estar registrados
+    importar_modelos()
+    if not forcar and versao_esquema(engine) >= VERSAO_ESQUEMA:
+        return False
+    # create_all, migrações e PRAGMA user_version, nesta ordem
+    aplicar_migracoes(engine)
+    return True
@@ -14,6 +14,8 @@ class Empresa(Base):
     endereco = Column(String(300))
     telefone = Column(String(20))
     email = Column(String(100))
+    # Calendário de feriados: 'BR', 'BR/UF' ou 'BR/UF/Município' (None = só nacionais)
+    localidade = Column(String(60))
     
     def __repr__(self):
         return f"<Empresa(nome={self.nome}, cnpj={self.cnpj})>"
@@ -26,5 +28,6 @@ class Empresa(Base):
             'cnpj': self.cnpj,
             'endereco': self.endereco,
             'telefone': self.telefone,
-            'email': self.email
+            'email': self.email,
+            'localidade': self.localidade
         }
\ No newline at end of file
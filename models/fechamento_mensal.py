@@ -0,0 +1,31 @@
+"""
+models/fechamento_mensal.py
+Fechamento mensal de horas: totais e valor das extras por funcionário e competência
+"""
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer
+from models.database import Base
+from models.tipos import HorasCentesimos
+
+class FechamentoMensal(Base):
+    __tablename__ = "fechamentos_mensais"
+    __table_args__ = (
+        Index('ix_fechamentos_mensais_empresa', 'ano', 'mes', 'empresa_id'),
+    )
+
+    ano = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), primary_key=True)
+    # Empresa no momento do fechamento (o funcionário pode mudar depois)
+    empresa_id = Column(Integer, ForeignKey('empresas.id', ondelete="SET NULL"))
+    horas_trabalhadas = Column(HorasCentesimos, nullable=False, default=0.0)
+    horas_extras = Column(HorasCentesimos, nullable=False, default=0.0)
+    horas_faltantes = Column(HorasCentesimos, nullable=False, default=0.0)
+    valor_hora = Column(Float, nullable=False)
+    valor_extras = Column(Float, nullable=False, default=0.0)
+    num_registros = Column(Integer, nullable=False, default=0)
+    # Registros cujas horas gravadas não batem com o recálculo pelas marcações
+    divergencias = Column(Integer, nullable=False, default=0)
+    fechado_em = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<FechamentoMensal(funcionario_id={self.funcionario_id}, {self.mes:02d}/{self.ano})>"
@@ -14,10 +14,13 @@ class Funcionario(Base):
     cargo = Column(String(100), nullable=False)
     carga_horaria_diaria = Column(Float, nullable=False)  # Em horas (ex: 8.0)
     valor_hora = Column(Float, nullable=False)  # Valor em reais
-    empresa_id = Column(Integer, ForeignKey('empresas.id', ondelete="SET NULL"))
+    pis = Column(String(14), index=True)  # PIS/PASEP do AFD da Portaria 1510 (só dígitos)
+    cpf = Column(String(11), index=True)  # CPF do AFD da Portaria 671 (só dígitos)
+    empresa_id = Column(Integer, ForeignKey('empresas.id', ondelete="SET NULL"), index=True)
     
-    # Relacionamento com Empresa
-    empresa = relationship("Empresa", backref="funcionarios")
+    # Relacionamento com Empresa ('selectin': ao carregar vários funcionários,
+    # as empresas vêm numa consulta só em vez de uma por funcionário)
+    empresa = relationship("Empresa", backref="funcionarios", lazy="selectin")
     
     def __repr__(self):
         return f"<Funcionario(nome={self.nome}, cargo={self.cargo})>"
@@ -30,6 +33,8 @@ class Funcionario(Base):
             'cargo': self.cargo,
             'carga_horaria_diaria': self.carga_horaria_diaria,
             'valor_hora': self.valor_hora,
+            'pis': self.pis,
+            'cpf': self.cpf,
             'empresa_id': self.empresa_id,
             'empresa_nome': self.empresa.nome if self.empresa else None
         }
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+models/marcacao.py
+Marcações de ponto individuais (cada batida do relógio)
+
+As jornadas de registros_jornada são derivadas destas marcações por
+services/marcacao_service.py; jornadas digitadas à mão não têm marcações.
+"""
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from models.database import Base
+from models.tipos import DataDias, HoraMinutos
+
+class Marcacao(Base):
+    __tablename__ = "marcacoes"
+    __table_args__ = (
+        # Uma marcação por funcionário/minuto (reimportar o AFD não duplica) e
+        # leitura em ordem de funcionário e horário para o pareamento
+        Index('uq_marcacoes_funcionario_momento', 'funcionario_id', 'data', 'hora', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), nullable=False)
+    # Dia e hora do relógio (a jornada pode ter começado na véspera)
+    data = Column(DataDias, nullable=False)
+    hora = Column(HoraMinutos, nullable=False)
+    # 'afd', 'api' ou 'manual'
+    origem = Column(String(10), nullable=False, default='afd')
+
+    def __repr__(self):
+        return f"<Marcacao(funcionario_id={self.funcionario_id}, {self.data} {self.hora})>"
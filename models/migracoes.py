@@ -0,0 +1,264 @@
+"""
+models/migracoes.py
+Migrações aplicadas em bancos já existentes (create_all não altera tabelas criadas)
+"""
+from sqlalchemy import Integer, inspect, text
+from sqlalchemy.schema import CreateTable
+
+def _indices_existentes(conn, tabela):
+    """Retorna os nomes dos índices de uma tabela"""
+    return {indice['name'] for indice in inspect(conn).get_indexes(tabela)}
+
+def migrar_coluna_pis(conn):
+    """Adiciona a coluna pis em funcionarios (identificação nos arquivos do relógio)"""
+    colunas = [col['name'] for col in inspect(conn).get_columns('funcionarios')]
+    if 'pis' not in colunas:
+        print("📦 Adicionando coluna 'pis' em 'funcionarios'...")
+        conn.execute(text("ALTER TABLE funcionarios ADD COLUMN pis VARCHAR(14)"))
+
+def migrar_coluna_cpf(conn):
+    """Adiciona a coluna cpf em funcionarios (AFD da Portaria 671), separada do pis"""
+    colunas = [col['name'] for col in inspect(conn).get_columns('funcionarios')]
+    if 'cpf' not in colunas:
+        print("📦 Adicionando coluna 'cpf' em 'funcionarios'...")
+        conn.execute(text("ALTER TABLE funcionarios ADD COLUMN cpf VARCHAR(11)"))
+
+def migrar_coluna_localidade(conn):
+    """Adiciona a coluna localidade em empresas (calendário de feriados)"""
+    colunas = [col['name'] for col in inspect(conn).get_columns('empresas')]
+    if 'localidade' not in colunas:
+        print("📦 Adicionando coluna 'localidade' em 'empresas'...")
+        conn.execute(text("ALTER TABLE empresas ADD COLUMN localidade VARCHAR(60)"))
+
+def migrar_indices_registros(conn):
+    """Remove duplicatas de registros_jornada e cria o índice único (funcionario_id, data)"""
+    from models.registro_jornada import RegistroJornada
+    
+    if 'uq_registros_jornada_funcionario_data' in _indices_existentes(conn, RegistroJornada.__tablename__):
+        return
+    
+    # Mantém apenas o registro mais recente de cada funcionário/dia,
+    # a mesma regra (MAX(id)) que a listagem usava para esconder duplicatas.
+    # As linhas removidas ficam copiadas em registros_jornada_duplicados.
+    duplicados = """
+        FROM registros_jornada
+        WHERE id NOT IN (
+            SELECT MAX(id)
+            FROM registros_jornada
+            GROUP BY funcionario_id, data
+        )
+    """
+    removidos = conn.execute(text(f"SELECT id, funcionario_id, data {duplicados} ORDER BY id")).all()
+    if not removidos:
+        return
+    
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS registros_jornada_duplicados AS "
+        "SELECT * FROM registros_jornada WHERE 0"
+    ))
+    conn.execute(text(f"INSERT INTO registros_jornada_duplicados SELECT * {duplicados}"))
+    conn.execute(text(f"DELETE {duplicados}"))
+    
+    print(f"🧹 {len(removidos)} registro(s) duplicado(s) removido(s); "
+          "cópia em 'registros_jornada_duplicados'")
+    for id_, funcionario_id, data in removidos[:20]:
+        print(f"   id={id_} funcionario_id={funcionario_id} data={data}")
+    if len(removidos) > 20:
+        print(f"   ... e mais {len(removidos) - 20}")
+
+def migrar_indices_declarados(conn):
+    """Cria os índices declarados nos modelos que ainda não existem no banco"""
+    from models.database import Base
+    
+    for tabela in Base.metadata.sorted_tables:
+        if not inspect(conn).has_table(tabela.name):
+            continue
+        existentes = _indices_existentes(conn, tabela.name)
+        for indice in tabela.indexes:
+            if indice.name not in existentes:
+                print(f"📦 Criando índice '{indice.name}'...")
+                indice.create(conn)
+
+def migrar_resumo_mensal(conn):
+    """Cria a tabela resumo_mensal e seus gatilhos, preenchendo o resumo na primeira vez"""
+    from models.resumo_mensal import ResumoMensal, GATILHOS_RESUMO, reconstruir_resumo
+    
+    ResumoMensal.__table__.create(conn, checkfirst=True)
+    
+    existentes = set(conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    )).scalars())
+    if all(nome in existentes for nome in GATILHOS_RESUMO):
+        return
+    
+    print("📦 Criando resumo mensal de horas...")
+    for sql in GATILHOS_RESUMO.values():
+        conn.execute(text(sql))
+    reconstruir_resumo(conn)
+
+def migrar_banco_horas(conn):
+    """Cria os gatilhos do banco de horas e agenda a montagem dos saldos na primeira vez"""
+    from models.banco_horas import BancoHoras, BancoHorasPendente, GATILHOS_BANCO_HORAS, SQL_MARCAR_TODOS
+    
+    BancoHoras.__table__.create(conn, checkfirst=True)
+    BancoHorasPendente.__table__.create(conn, checkfirst=True)
+    existentes = set(conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    )).scalars())
+    if all(nome in existentes for nome in GATILHOS_BANCO_HORAS):
+        return
+    
+    print("📦 Criando gatilhos do banco de horas...")
+    for sql in GATILHOS_BANCO_HORAS.values():
+        conn.execute(text(sql))
+    # Os saldos são montados por services/banco_horas_service.py na primeira consulta
+    conn.execute(text(SQL_MARCAR_TODOS))
+
+def migrar_codificacao_inteira(conn, lote=50_000):
+    """
+    Regrava registros_jornada com data, horários e horas como inteiros (models/tipos.py)
+
+    O SQLite não altera o tipo de uma coluna: a tabela é recriada com o esquema
+    do modelo e os dados copiados em lotes de `lote` ids, convertidos no
+    próprio SQL (horas direto em centésimos). resumo_mensal é descartado e
+    reconstruído por migrar_resumo_mensal; os índices voltam em migrar_indices_declarados.
+    """
+    from models.registro_jornada import RegistroJornada
+    from models.tipos import SQL_HORAS_PARA_CENTESIMOS, SQL_TEXTO_PARA_DIAS, SQL_TEXTO_PARA_MINUTOS
+    
+    tabela = RegistroJornada.__table__
+    colunas = {col['name']: col for col in inspect(conn).get_columns(tabela.name)}
+    if isinstance(colunas['data']['type'], Integer):
+        return
+    
+    invalidos = conn.execute(text(f"""
+        SELECT COUNT(*) FROM {tabela.name}
+        WHERE {SQL_TEXTO_PARA_DIAS.format('data')} IS NULL
+           OR instr(hora_entrada, ':') = 0 OR instr(hora_saida, ':') = 0
+    """)).scalar()
+    if invalidos:
+        raise RuntimeError(
+            f"{invalidos} registro(s) com data/hora em formato desconhecido em {tabela.name}; "
+            "corrija-os antes de abrir o sistema"
+        )
+    
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {tabela.name}")).scalar()
+    print(f"📦 Convertendo {total} registro(s) de jornada para inteiros...")
+    
+    temporaria = f"{tabela.name}_nova"
+    ddl = str(CreateTable(tabela).compile(dialect=conn.dialect))
+    conn.execute(text(ddl.replace(f"CREATE TABLE {tabela.name}", f"CREATE TABLE {temporaria}", 1)))
+    
+    copiar = text(f"""
+        INSERT INTO {temporaria} (id, funcionario_id, data, hora_entrada, hora_saida,
+                                  intervalo, horas_trabalhadas, horas_extras, horas_faltantes)
+        SELECT id, funcionario_id,
+               {SQL_TEXTO_PARA_DIAS.format('data')},
+               {SQL_TEXTO_PARA_MINUTOS.format('hora_entrada')},
+               {SQL_TEXTO_PARA_MINUTOS.format('hora_saida')},
+               {SQL_HORAS_PARA_CENTESIMOS.format('intervalo')},
+               {SQL_HORAS_PARA_CENTESIMOS.format('horas_trabalhadas')},
+               {SQL_HORAS_PARA_CENTESIMOS.format('horas_extras')},
+               {SQL_HORAS_PARA_CENTESIMOS.format('horas_faltantes')}
+        FROM {tabela.name}
+        WHERE id BETWEEN :de AND :ate
+    """)
+    menor, maior = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM {tabela.name}")).one()
+    if menor is not None:
+        for de in range(menor, maior + 1, lote):
+            conn.execute(copiar, {'de': de, 'ate': de + lote - 1})
+    
+    # Apagar a tabela leva junto os índices e os gatilhos do resumo
+    conn.execute(text(f"DROP TABLE {tabela.name}"))
+    conn.execute(text(f"ALTER TABLE {temporaria} RENAME TO {tabela.name}"))
+    conn.execute(text("DROP TABLE IF EXISTS resumo_mensal"))
+
+# Versões em que as colunas de horas guardavam minutos inteiros: da
+# codificação inteira (2) até a troca por centésimos (11)
+VERSAO_INTEIROS = 2
+VERSAO_CENTESIMOS = 11
+
+def migrar_horas_centesimos(conn):
+    """
+    Converte as colunas de horas gravadas em minutos (versões 2 a 10) para centésimos de hora
+
+    Minutos não guardavam a segunda casa (1,36 h virava 82 min = 1,37 h); o
+    valor original é o mais próximo com 2 casas, ROUND(minutos / 60, 2).
+    Os gatilhos de registros_jornada saem antes do UPDATE; migrar_resumo_mensal
+    e migrar_banco_horas os recriam, refazendo o resumo e marcando o banco de
+    horas para ser refeito. Versão 0 é banco novo (já em centésimos) ou em
+    texto, que migrar_codificacao_inteira converte direto para centésimos.
+    """
+    from models.banco_horas import GATILHOS_BANCO_HORAS
+    from models.registro_jornada import RegistroJornada
+    from models.resumo_mensal import GATILHOS_RESUMO
+    
+    versao = conn.execute(text("PRAGMA user_version")).scalar() or 0
+    if not VERSAO_INTEIROS <= versao < VERSAO_CENTESIMOS:
+        return
+    colunas = {col['name']: col for col in inspect(conn).get_columns(RegistroJornada.__tablename__)}
+    if not isinstance(colunas['data']['type'], Integer):
+        return
+    
+    total = conn.execute(text("SELECT COUNT(*) FROM registros_jornada")).scalar()
+    if not total:
+        return
+    print(f"📦 Convertendo horas de {total} registro(s) de minutos para centésimos de hora...")
+    
+    for nome in list(GATILHOS_RESUMO) + list(GATILHOS_BANCO_HORAS):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+    horas = ['horas_trabalhadas', 'horas_extras', 'horas_faltantes']
+    conn.execute(text(
+        "UPDATE registros_jornada SET "
+        + ', '.join(f"{c} = CAST(ROUND(ROUND({c} / 60.0, 2) * 100) AS INTEGER)"
+                    for c in ['intervalo'] + horas)
+    ))
+    # Fechamentos guardam somas do mês: arredondadas no total, sem refazer o mês
+    conn.execute(text(
+        "UPDATE fechamentos_mensais SET "
+        + ', '.join(f"{c} = CAST(ROUND({c} * 100 / 60.0) AS INTEGER)" for c in horas)
+    ))
+    conn.execute(text("DELETE FROM banco_horas"))
+    conn.execute(text("DELETE FROM banco_horas_pendentes"))
+
+# Ordem de execução das migrações
+MIGRACOES = [
+    migrar_coluna_pis,
+    migrar_coluna_cpf,
+    migrar_coluna_localidade,
+    migrar_indices_registros,
+    migrar_horas_centesimos,
+    migrar_codificacao_inteira,
+    migrar_indices_declarados,
+    migrar_resumo_mensal,
+    migrar_banco_horas,
+]
+
+# Gravada em PRAGMA user_version depois das migrações; aumentar sempre que
+# uma migração for adicionada ou um modelo ganhar tabela/índice novo
+VERSAO_ESQUEMA = VERSAO_CENTESIMOS
+
+def versao_esquema(bind):
+    """Versão gravada no banco (0 em banco novo ou fora do SQLite)"""
+    if bind.dialect.name != 'sqlite':
+        return 0
+    with bind.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+def aplicar_migracoes(bind):
+    """
+    Cria as tabelas que faltam, aplica todas as migrações e grava VERSAO_ESQUEMA
+
+    Tudo em uma única transação. create_all roda aqui, com todos os modelos
+    registrados, para que nenhum banco receba a versão sem ter todas as
+    tabelas (scripts que chamam só esta função, como o gerador de carga).
+    """
+    from models.database import Base, importar_modelos
+    
+    importar_modelos()
+    with bind.begin() as conn:
+        Base.metadata.create_all(conn)
+        for migracao in MIGRACOES:
+            migracao(conn)
+        if bind.dialect.name == 'sqlite':
+            conn.execute(text(f"PRAGMA user_version = {VERSAO_ESQUEMA}"))
@@ -0,0 +1,255 @@
+"""
+models/monitor_sql.py
+Instrumentação das consultas SQL do engine e log de consultas lentas
+
+Cada statement executado pelo engine é medido (eventos before/after_cursor_execute)
+e acumulado por texto SQL normalizado: execuções, tempo total/máximo, linhas
+afetadas (só escritas: o cursor não informa quantas linhas um SELECT devolve
+antes de serem lidas) e de qual tela/serviço veio (ex.: 'RelatoriosModern.gerar_relatorio',
+achado subindo a pilha de chamadas até o primeiro frame do pacote ui/services).
+
+Statements acima do limite vão para o log de lentas, um JSON por linha.
+
+Configuração (variáveis de ambiente):
+    HORAS_EXTRAS_MONITOR_SQL=0      desliga a instrumentação
+    HORAS_EXTRAS_SQL_LENTA_MS=200   limite em ms para o log de lentas
+    HORAS_EXTRAS_SQL_LOG=sql_lento.log
+
+Resumo do log de lentas (top por tempo total):
+    python -m models.monitor_sql sql_lento.log --top 20
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event
+
+MONITOR_ATIVO = os.getenv('HORAS_EXTRAS_MONITOR_SQL', '1') != '0'
+LIMITE_LENTA_MS = float(os.getenv('HORAS_EXTRAS_SQL_LENTA_MS', '200'))
+LOG_LENTAS = os.getenv('HORAS_EXTRAS_SQL_LOG', 'sql_lento.log')
+
+# Pacotes cujos frames identificam quem fez a consulta: a tela (ui) tem
+# preferência sobre o serviço que ela chamou
+PACOTES_ORIGEM = ('ui.', 'services.')
+
+# Frames ignorados ao procurar a origem fora dos pacotes acima
+_MODULOS_INTERNOS = ('sqlalchemy', 'models.database', 'models.monitor_sql',
+                     'contextlib', 'threading', 'concurrent')
+
+_ESPACOS = re.compile(r'\s+')
+
+
+def normalizar_sql(statement):
+    """Texto do statement em uma linha (chave de agregação)"""
+    return _ESPACOS.sub(' ', statement).strip()
+
+
+def origem_da_chamada(profundidade_maxima=60):
+    """
+    'Classe.metodo' (ou 'modulo.funcao') do código que disparou a consulta
+
+    Procura o frame mais próximo em ui/; sem ele, o mais próximo em services/;
+    sem nenhum dos dois, o primeiro frame fora do SQLAlchemy e deste módulo.
+    """
+    frame = sys._getframe(1)
+    achados = {}
+    for _ in range(profundidade_maxima):
+        if frame is None:
+            break
+        modulo = frame.f_globals.get('__name__', '')
+        if modulo.startswith(PACOTES_ORIGEM[0]):
+            return _nome_do_frame(frame, modulo)
+        for chave in PACOTES_ORIGEM[1:]:
+            if chave not in achados and modulo.startswith(chave):
+                achados[chave] = _nome_do_frame(frame, modulo)
+        if None not in achados and not modulo.startswith(_MODULOS_INTERNOS + PACOTES_ORIGEM):
+            achados[None] = _nome_do_frame(frame, modulo)
+        frame = frame.f_back
+
+    for chave in PACOTES_ORIGEM[1:] + (None,):
+        if chave in achados:
+            return achados[chave]
+    return '?'
+
+
+def _nome_do_frame(frame, modulo):
+    codigo = frame.f_code
+    nome = getattr(codigo, 'co_qualname', codigo.co_name)
+    instancia = frame.f_locals.get('self')
+    if instancia is not None and '.' not in nome:
+        nome = f"{type(instancia).__name__}.{nome}"
+    if '.' not in nome:
+        nome = f"{modulo.rsplit('.', 1)[-1]}.{nome}"
+    # Funções internas (lambda, closures) aparecem como Classe.metodo.<locals>.f
+    return nome.replace('.<locals>', '')
+
+
+class MonitorSQL:
+    """Estatísticas acumuladas por statement e log de lentas"""
+
+    def __init__(self, limite_lenta_ms=LIMITE_LENTA_MS, log_lentas=LOG_LENTAS):
+        self.limite_lenta_ms = limite_lenta_ms
+        self.log_lentas = log_lentas
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def registrar(self, statement, duracao_ms, linhas, origem, executemany=False):
+        sql = normalizar_sql(statement)
+        with self._lock:
+            s = self._stats.get(sql)
+            if s is None:
+                s = self._stats[sql] = {
+                    'execucoes': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'linhas': None, 'origens': Counter(), 'execucoes_origem': Counter()
+                }
+            s['execucoes'] += 1
+            s['total_ms'] += duracao_ms
+            s['max_ms'] = max(s['max_ms'], duracao_ms)
+            if linhas is not None and linhas >= 0:
+                s['linhas'] = (s['linhas'] or 0) + linhas
+            s['origens'][origem] += duracao_ms
+            s['execucoes_origem'][origem] += 1
+
+        if duracao_ms >= self.limite_lenta_ms:
+            self._gravar_lenta(sql, duracao_ms, linhas, origem, executemany)
+
+    def _gravar_lenta(self, sql, duracao_ms, linhas, origem, executemany):
+        if not self.log_lentas:
+            return
+        entrada = {
+            'quando': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(duracao_ms, 2),
+            'linhas': linhas if linhas is not None and linhas >= 0 else None,
+            'origem': origem,
+            'executemany': executemany,
+            'sql': sql,
+        }
+        try:
+            with self._lock, open(self.log_lentas, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o log de consultas lentas: {e}")
+
+    def top(self, n=20, por='total_ms'):
+        """
+        Statements com maior tempo (total_ms, max_ms ou execucoes)
+
+        Returns:
+            list: dicts com sql, execucoes, total_ms, media_ms, max_ms, linhas, origens
+                  (linhas é None para consultas que devolvem linhas)
+        """
+        with self._lock:
+            itens = [
+                {
+                    'sql': sql,
+                    'execucoes': s['execucoes'],
+                    'total_ms': round(s['total_ms'], 2),
+                    'media_ms': round(s['total_ms'] / s['execucoes'], 3),
+                    'max_ms': round(s['max_ms'], 2),
+                    'linhas': s['linhas'],
+                    'origens': [o for o, _ in s['origens'].most_common(3)],
+                }
+                for sql, s in self._stats.items()
+            ]
+        itens.sort(key=lambda i: i[por], reverse=True)
+        return itens[:n]
+
+    def por_origem(self):
+        """Tempo total e execuções por tela/serviço, do mais caro para o mais barato"""
+        totais = {}
+        with self._lock:
+            for s in self._stats.values():
+                for origem, ms in s['origens'].items():
+                    t = totais.setdefault(origem, {'origem': origem, 'total_ms': 0.0, 'execucoes': 0})
+                    t['total_ms'] += ms
+                    t['execucoes'] += s['execucoes_origem'][origem]
+        return sorted(
+            ({**t, 'total_ms': round(t['total_ms'], 2)} for t in totais.values()),
+            key=lambda t: t['total_ms'], reverse=True
+        )
+
+    def zerar(self):
+        with self._lock:
+            self._stats.clear()
+
+    def relatorio(self, n=20):
+        """Texto com o top de statements e o total por origem"""
+        linhas = [f"Top {n} statements por tempo total", ""]
+        for i, item in enumerate(self.top(n), 1):
+            linhas.append(
+                f"{i:3}. {item['total_ms']:10.1f} ms  {item['execucoes']:6}x  "
+                f"média {item['media_ms']:8.2f}  máx {item['max_ms']:8.1f}  "
+                f"linhas {_texto_linhas(item['linhas']):>6}  [{', '.join(item['origens'])}]"
+            )
+            linhas.append(f"     {item['sql'][:300]}")
+        linhas += ["", "Tempo por origem"]
+        for t in self.por_origem():
+            linhas.append(f"  {t['total_ms']:10.1f} ms  {t['origem']}")
+        return '\n'.join(linhas)
+
+
+def _texto_linhas(linhas):
+    return '—' if linhas is None else str(linhas)
+
+
+def instrumentar_engine(bind, monitor):
+    """Registra a medição de cada statement do engine no monitor"""
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('monitor_sql_inicio', []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get('monitor_sql_inicio')
+        if not inicios:
+            return
+        duracao_ms = (time.perf_counter() - inicios.pop()) * 1000
+        # rowcount só é conhecido para escritas; SELECT no sqlite3 devolve -1
+        # e as linhas ainda não foram lidas: fica sem contagem (None)
+        linhas = None if cursor.description is not None else getattr(cursor, 'rowcount', -1)
+        monitor.registrar(statement, duracao_ms, linhas, origem_da_chamada(), executemany)
+
+    @event.listens_for(bind, "handle_error")
+    def _erro(contexto):
+        # Statement que falhou não chega ao after_cursor_execute
+        conn = contexto.connection
+        if conn is not None and conn.info.get('monitor_sql_inicio'):
+            conn.info['monitor_sql_inicio'].pop()
+
+    return monitor
+
+
+monitor_sql = MonitorSQL()
+
+
+def resumir_log(caminho, n=20):
+    """Top de statements lentos de um log gravado pelo monitor"""
+    resumo = MonitorSQL(limite_lenta_ms=float('inf'), log_lentas=None)
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            try:
+                e = json.loads(linha)
+            except ValueError:
+                continue
+            resumo.registrar(e['sql'], e['ms'], e.get('linhas'), e.get('origem', '?'))
+    return resumo.relatorio(n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumo do log de consultas lentas")
+    parser.add_argument('log', nargs='?', default=LOG_LENTAS)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"❌ Log não encontrado: {args.log}")
+        sys.exit(1)
+    print(resumir_log(args.log, args.top))
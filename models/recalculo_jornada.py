@@ -0,0 +1,29 @@
+"""
+models/recalculo_jornada.py
+Recálculos pendentes de registros_jornada após mudança no cadastro do funcionário
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from models.database import Base
+from models.tipos import DataDias
+
+class RecalculoJornada(Base):
+    __tablename__ = "recalculos_jornada"
+    __table_args__ = (
+        Index('ix_recalculos_jornada_pendentes', 'concluido_em', 'funcionario_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), nullable=False)
+    # 'carga' recalcula extras/faltas dos registros; 'valor' só os totais derivados
+    tipo = Column(String(10), nullable=False)
+    # Primeiro dia afetado (None = todo o histórico)
+    data_inicio = Column(DataDias)
+    # Ponto de retomada: último dia já recalculado
+    ultima_data = Column(DataDias)
+    registros = Column(Integer, nullable=False, default=0)
+    motivo = Column(String(200))
+    criado_em = Column(DateTime, nullable=False)
+    concluido_em = Column(DateTime)
+
+    def __repr__(self):
+        return f"<RecalculoJornada(funcionario_id={self.funcionario_id}, tipo={self.tipo})>"
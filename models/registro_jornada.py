@@ -2,22 +2,35 @@
 models/registro_jornada.py
 Modelo de dados para Registro de Jornada
 """
-from sqlalchemy import Column, Integer, Float, Date, Time, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from models.database import Base
+from models.tipos import DataDias, HoraMinutos, HorasCentesimos
 
 class RegistroJornada(Base):
     __tablename__ = "registros_jornada"
+    __table_args__ = (
+        # Um registro por funcionário/dia; atende a checagem de duplicata
+        # e as consultas por funcionário em um período
+        Index('uq_registros_jornada_funcionario_data', 'funcionario_id', 'data', unique=True),
+        # Índice de cobertura para relatórios por período (BETWEEN em data
+        # agrupando por funcionário) sem precisar ler a tabela
+        Index('ix_registros_jornada_periodo', 'data', 'funcionario_id', 'horas_extras', 'horas_faltantes'),
+        # Paginação por chave (data, id) da listagem, do mais recente para o mais antigo
+        Index('ix_registros_jornada_data_id', 'data', 'id'),
+    )
     
+    # Gravados como inteiros (ver models/tipos.py); em Python continuam
+    # date, time e horas em float
     id = Column(Integer, primary_key=True, index=True)
     funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"))
-    data = Column(Date, nullable=False)
-    hora_entrada = Column(Time, nullable=False)
-    hora_saida = Column(Time, nullable=False)
-    intervalo = Column(Float, default=0.0)
-    horas_trabalhadas = Column(Float, nullable=False)
-    horas_extras = Column(Float, default=0.0)
-    horas_faltantes = Column(Float, default=0.0)
+    data = Column(DataDias, nullable=False)
+    hora_entrada = Column(HoraMinutos, nullable=False)
+    hora_saida = Column(HoraMinutos, nullable=False)
+    intervalo = Column(HorasCentesimos, default=0.0)
+    horas_trabalhadas = Column(HorasCentesimos, nullable=False)
+    horas_extras = Column(HorasCentesimos, default=0.0)
+    horas_faltantes = Column(HorasCentesimos, default=0.0)
     
     # Relacionamento
     funcionario = relationship("Funcionario", backref="registros")
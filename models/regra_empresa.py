@@ -0,0 +1,42 @@
+"""
+models/regra_empresa.py
+Percentuais de horas extras e adicional noturno da convenção coletiva de cada empresa
+
+Empresa sem linha aqui usa as regras da CLT (services/regras_service.py).
+"""
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer
+from models.database import Base
+from models.tipos import HoraMinutos
+
+class RegraEmpresa(Base):
+    __tablename__ = "regras_empresa"
+
+    empresa_id = Column(Integer, ForeignKey('empresas.id', ondelete="CASCADE"), primary_key=True)
+    # Adicional sobre a hora normal (0.5 = 50%)
+    percentual_extra = Column(Float, nullable=False, default=0.5)
+    # Extras do dia acima de horas_faixa pagas com percentual_excedente (None = sem faixa)
+    horas_faixa = Column(Float)
+    percentual_excedente = Column(Float)
+    # Domingos e feriados
+    percentual_descanso = Column(Float, nullable=False, default=1.0)
+    adicional_noturno = Column(Float, nullable=False, default=0.2)
+    inicio_noturno = Column(HoraMinutos, nullable=False)
+    fim_noturno = Column(HoraMinutos, nullable=False)
+    # Hora noturna de 52m30s (CLT art. 73 §1º)
+    hora_noturna_reduzida = Column(Boolean, nullable=False, default=True)
+
+    def __repr__(self):
+        return f"<RegraEmpresa(empresa_id={self.empresa_id}, extra={self.percentual_extra:.0%})>"
+
+    def to_dict(self):
+        """Regras no formato de REGRAS_CLT"""
+        return {
+            'percentual_extra': self.percentual_extra,
+            'horas_faixa': self.horas_faixa,
+            'percentual_excedente': self.percentual_excedente,
+            'percentual_descanso': self.percentual_descanso,
+            'adicional_noturno': self.adicional_noturno,
+            'inicio_noturno': self.inicio_noturno,
+            'fim_noturno': self.fim_noturno,
+            'hora_noturna_reduzida': self.hora_noturna_reduzida,
+        }
@@ -0,0 +1,109 @@
+"""
+models/resumo_mensal.py
+Resumo mensal materializado de horas por funcionário
+"""
+from sqlalchemy import Column, Integer, ForeignKey, Index, text
+from models.database import Base
+from models.tipos import HorasCentesimos, SQL_ANO, SQL_MES
+
+class ResumoMensal(Base):
+    __tablename__ = "resumo_mensal"
+    __table_args__ = (
+        Index('ix_resumo_mensal_competencia', 'ano', 'mes'),
+    )
+    
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), primary_key=True)
+    ano = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    # Centésimos de hora inteiros, como em registros_jornada: os gatilhos somam e
+    # subtraem sem acumular erro de ponto flutuante
+    horas_trabalhadas = Column(HorasCentesimos, nullable=False, default=0.0)
+    horas_extras = Column(HorasCentesimos, nullable=False, default=0.0)
+    horas_faltantes = Column(HorasCentesimos, nullable=False, default=0.0)
+    num_registros = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ResumoMensal(funcionario_id={self.funcionario_id}, {self.mes:02d}/{self.ano})>"
+
+# Expressões de competência a partir de registros_jornada.data (dias desde 1970)
+_ANO = SQL_ANO.format("{0}.data")
+_MES = SQL_MES.format("{0}.data")
+
+def _somar(alias, sinal):
+    """Gera o UPSERT que soma (sinal='+') ou subtrai (sinal='-') um registro do resumo"""
+    return f"""
+        INSERT INTO resumo_mensal (funcionario_id, ano, mes, horas_trabalhadas, horas_extras, horas_faltantes, num_registros)
+        SELECT
+            {alias}.funcionario_id, {_ANO.format(alias)}, {_MES.format(alias)},
+            {sinal}COALESCE({alias}.horas_trabalhadas, 0),
+            {sinal}COALESCE({alias}.horas_extras, 0),
+            {sinal}COALESCE({alias}.horas_faltantes, 0),
+            {sinal}1
+        WHERE {alias}.funcionario_id IS NOT NULL
+        ON CONFLICT (funcionario_id, ano, mes) DO UPDATE SET
+            horas_trabalhadas = horas_trabalhadas + excluded.horas_trabalhadas,
+            horas_extras = horas_extras + excluded.horas_extras,
+            horas_faltantes = horas_faltantes + excluded.horas_faltantes,
+            num_registros = num_registros + excluded.num_registros;
+    """
+
+def _limpar(alias):
+    """Remove a linha do resumo quando o mês fica sem registros"""
+    return f"""
+        DELETE FROM resumo_mensal
+        WHERE funcionario_id = {alias}.funcionario_id
+          AND ano = {_ANO.format(alias)}
+          AND mes = {_MES.format(alias)}
+          AND num_registros <= 0;
+    """
+
+# Gatilhos que mantêm o resumo atualizado a cada INSERT/UPDATE/DELETE em
+# registros_jornada, inclusive gravações feitas com SQL direto
+GATILHOS_RESUMO = {
+    'trg_resumo_mensal_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_mensal_insert
+        AFTER INSERT ON registros_jornada
+        WHEN NEW.funcionario_id IS NOT NULL
+        BEGIN
+            {_somar('NEW', '')}
+        END
+    """,
+    'trg_resumo_mensal_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_mensal_delete
+        AFTER DELETE ON registros_jornada
+        WHEN OLD.funcionario_id IS NOT NULL
+        BEGIN
+            {_somar('OLD', '-')}
+            {_limpar('OLD')}
+        END
+    """,
+    'trg_resumo_mensal_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_mensal_update
+        AFTER UPDATE OF funcionario_id, data, horas_trabalhadas, horas_extras, horas_faltantes
+        ON registros_jornada
+        BEGIN
+            {_somar('OLD', '-')}
+            {_limpar('OLD')}
+            {_somar('NEW', '')}
+        END
+    """,
+}
+
+# Recalcula o resumo inteiro a partir de registros_jornada
+SQL_RECONSTRUIR_RESUMO = f"""
+    INSERT INTO resumo_mensal (funcionario_id, ano, mes, horas_trabalhadas, horas_extras, horas_faltantes, num_registros)
+    SELECT
+        r.funcionario_id, {_ANO.format('r')}, {_MES.format('r')},
+        COALESCE(SUM(r.horas_trabalhadas), 0),
+        COALESCE(SUM(r.horas_extras), 0),
+        COALESCE(SUM(r.horas_faltantes), 0),
+        COUNT(*)
+    FROM registros_jornada r
+    WHERE r.funcionario_id IS NOT NULL
+    GROUP BY r.funcionario_id, {_ANO.format('r')}, {_MES.format('r')}
+"""
+
+def reconstruir_resumo(conn):
+    """Apaga e recalcula todo o resumo mensal (usar após cargas fora do ORM sem gatilhos)"""
+    conn.execute(text("DELETE FROM resumo_mensal"))
+    conn.execute(text(SQL_RECONSTRUIR_RESUMO))
@@ -0,0 +1,117 @@
+"""
+models/tipos.py
+Tipos de coluna gravados como inteiros (mesma API Python de Date/Time/Float)
+
+No SQLite, Date e Time do SQLAlchemy viram texto ('2024-05-31', '08:00:00.000000')
+e cada valor lido passa por um parse com expressão regular. Aqui o banco
+guarda inteiros pequenos e a conversão é aritmética:
+
+    DataDias          date   <-> dias desde 1970-01-01
+    HoraMinutos       time   <-> minutos desde a meia-noite (segundos são descartados)
+    HorasCentesimos   float  <-> centésimos de hora (horas com 2 casas, sem perda)
+
+Somas no SQL continuam corretas: func.sum() de uma coluna HorasCentesimos
+soma inteiros e o resultado volta em horas pelo mesmo tipo. SQL direto (sem o
+tipo) lê centésimos: use SQL_CENTESIMOS_PARA_HORAS para mostrar horas.
+"""
+from datetime import date, time
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+# date.toordinal() de 1970-01-01
+_ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+
+# Valores distintos guardados por tabela de conversão (datas, horários e
+# totais de horas repetem muito; o limite só evita crescer sem fim)
+LIMITE_TABELA = 200_000
+
+class _TabelaConversao(dict):
+    """
+    Cache inteiro -> valor Python; o método __getitem__ (em C) é o próprio
+    processador de resultado, então um valor já visto não executa Python
+    """
+
+    def __init__(self, converter):
+        super().__init__({None: None})
+        self.converter = converter
+
+    def __missing__(self, chave):
+        valor = self.converter(chave)
+        if len(self) < LIMITE_TABELA:
+            self[chave] = valor
+        return valor
+
+def _dias_para_data(valor):
+    return date.fromordinal(int(valor) + _ORDINAL_EPOCA)
+
+def _minutos_para_hora(valor):
+    minutos = int(valor)
+    return time(minutos // 60, minutos % 60)
+
+# Unidade gravada pelas colunas de horas: 1 hora = 100 centésimos. Minutos
+# (1,36 h = 81,6 min) perdiam a segunda casa; centésimos guardam 2 casas exatas
+CENTESIMOS_POR_HORA = 100
+
+def horas_para_centesimos(horas):
+    """Horas (float) -> inteiro gravado nas colunas HorasCentesimos"""
+    return int(round(float(horas) * CENTESIMOS_POR_HORA))
+
+def centesimos_para_horas(valor):
+    """Inteiro gravado nas colunas HorasCentesimos -> horas com 2 casas"""
+    return round(valor / CENTESIMOS_POR_HORA, 2)
+
+
+class _TipoInteiro(TypeDecorator):
+    """Base dos tipos abaixo: leitura pela tabela de conversão da classe"""
+    impl = Integer
+    cache_ok = True
+    _tabela = None
+
+    def process_result_value(self, valor, dialect):
+        return self._tabela[valor]
+
+    def result_processor(self, dialect, coltype):
+        return self._tabela.__getitem__
+
+class DataDias(_TipoInteiro):
+    """date gravada como número de dias desde 1970-01-01"""
+    cache_ok = True
+    _tabela = _TabelaConversao(_dias_para_data)
+
+    def process_bind_param(self, valor, dialect):
+        if valor is None or isinstance(valor, int):
+            return valor
+        return valor.toordinal() - _ORDINAL_EPOCA
+
+class HoraMinutos(_TipoInteiro):
+    """time gravada como minutos desde a meia-noite"""
+    cache_ok = True
+    _tabela = _TabelaConversao(_minutos_para_hora)
+
+    def process_bind_param(self, valor, dialect):
+        if valor is None or isinstance(valor, int):
+            return valor
+        return valor.hour * 60 + valor.minute
+
+class HorasCentesimos(_TipoInteiro):
+    """Horas (float) gravadas como centésimos de hora inteiros"""
+    cache_ok = True
+    _tabela = _TabelaConversao(centesimos_para_horas)
+
+    def process_bind_param(self, valor, dialect):
+        if valor is None:
+            return None
+        return horas_para_centesimos(valor)
+
+# Conversões equivalentes em SQL (SQLite), para gatilhos e migrações
+SQL_ANO = "CAST(strftime('%Y', {0} * 86400, 'unixepoch') AS INTEGER)"
+SQL_MES = "CAST(strftime('%m', {0} * 86400, 'unixepoch') AS INTEGER)"
+SQL_TEXTO_PARA_DIAS = "CAST(julianday({0}) - 2440587.5 AS INTEGER)"
+SQL_TEXTO_PARA_MINUTOS = (
+    "(CAST(substr({0}, 1, instr({0}, ':') - 1) AS INTEGER) * 60"
+    " + CAST(substr({0}, instr({0}, ':') + 1, 2) AS INTEGER))"
+)
+SQL_HORAS_PARA_CENTESIMOS = "CAST(ROUND({0} * 100) AS INTEGER)"
+SQL_CENTESIMOS_PARA_HORAS = "ROUND({0} / 100.0, 2)"
+SQL_DIAS_PARA_TEXTO = "date({0} * 86400, 'unixepoch')"
+SQL_MINUTOS_PARA_TEXTO = "printf('%02d:%02d', {0} / 60, {0} % 60)"
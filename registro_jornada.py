@@ -5,9 +5,13 @@ Sistema adaptado para trabalhar com o banco existente
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, Time, ForeignKey, func, text
+from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, func, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from models.tipos import (
+    DataDias, HoraMinutos, HorasCentesimos,
+    SQL_CENTESIMOS_PARA_HORAS, SQL_DIAS_PARA_TEXTO, SQL_MINUTOS_PARA_TEXTO
+)
 
 # =============================================================================
 # CONFIGURAÇÃO INICIAL
@@ -78,13 +82,14 @@ class RegistroJornada(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     funcionario_id = Column(Integer, ForeignKey('funcionarios.id', ondelete="CASCADE"), nullable=False)
-    data = Column(Date, nullable=False)
-    hora_entrada = Column(Time, nullable=False)
-    hora_saida = Column(Time, nullable=False)
-    intervalo = Column(Float, default=0.0)
-    horas_trabalhadas = Column(Float, nullable=False)
-    horas_extras = Column(Float, default=0.0)
-    horas_faltantes = Column(Float, default=0.0)
+    # Mesma codificação inteira de models/registro_jornada.py
+    data = Column(DataDias, nullable=False)
+    hora_entrada = Column(HoraMinutos, nullable=False)
+    hora_saida = Column(HoraMinutos, nullable=False)
+    intervalo = Column(HorasCentesimos, default=0.0)
+    horas_trabalhadas = Column(HorasCentesimos, nullable=False)
+    horas_extras = Column(HorasCentesimos, default=0.0)
+    horas_faltantes = Column(HorasCentesimos, default=0.0)
 
 # =============================================================================
 # FUNÇÕES DE CÁLCULO
@@ -123,13 +128,13 @@ def obter_relatorio_extras_faltas(session):
     """Gera relatório consolidado - ADAPTADO para usar SQL direto"""
     try:
         # Usa SQL direto para garantir compatibilidade
-        query = text("""
+        query = text(f"""
             SELECT 
                 f.id,
                 f.nome,
                 COALESCE(f.empresa, 'Sem Empresa') as empresa,
-                COALESCE(SUM(r.horas_extras), 0) as total_extras,
-                COALESCE(SUM(r.horas_faltantes), 0) as total_faltas
+                {SQL_CENTESIMOS_PARA_HORAS.format('COALESCE(SUM(r.horas_extras), 0)')} as total_extras,
+                {SQL_CENTESIMOS_PARA_HORAS.format('COALESCE(SUM(r.horas_faltantes), 0)')} as total_faltas
             FROM funcionarios f
             LEFT JOIN registros_jornada r ON f.id = r.funcionario_id
             GROUP BY f.id, f.nome, f.empresa
@@ -513,10 +518,14 @@ class TelaRegistroJornada:
             self.tree.delete(item)
         
         try:
-            query = text("""
-                SELECT r.id, f.nome, COALESCE(f.empresa, 'Sem Empresa'), r.data, 
-                       r.hora_entrada, r.hora_saida, r.horas_trabalhadas, 
-                       r.horas_extras, r.horas_faltantes
+            query = text(f"""
+                SELECT r.id, f.nome, COALESCE(f.empresa, 'Sem Empresa'),
+                       {SQL_DIAS_PARA_TEXTO.format('r.data')},
+                       {SQL_MINUTOS_PARA_TEXTO.format('r.hora_entrada')},
+                       {SQL_MINUTOS_PARA_TEXTO.format('r.hora_saida')},
+                       {SQL_CENTESIMOS_PARA_HORAS.format('r.horas_trabalhadas')},
+                       {SQL_CENTESIMOS_PARA_HORAS.format('r.horas_extras')},
+                       {SQL_CENTESIMOS_PARA_HORAS.format('r.horas_faltantes')}
                 FROM registros_jornada r
                 JOIN funcionarios f ON r.funcionario_id = f.id
                 ORDER BY r.data DESC
@@ -0,0 +1,546 @@
+"""
+services/api_servidor.py
+API HTTP/JSON local (asyncio) com os cálculos e relatórios de horas
+
+Outras estações e a folha de pagamento consultam o mesmo horas_extras.db por
+este servidor em vez de abrir cópias do arquivo:
+
+    python -m services.api_servidor --host 127.0.0.1 --porta 8765 --leitores 4
+
+    GET  /saude
+    POST /calculo/jornada        {hora_entrada, hora_saida, intervalo, carga_horaria_diaria
+                                  | funcionario_id, valor_hora?}
+    POST /jornadas               {registros: [{funcionario_id, data, hora_entrada,
+                                  hora_saida, intervalo}]}  (UPSERT por funcionário e dia)
+    GET  /jornadas               ?funcionario_id=&inicio=&fim=&limite=&apos=
+    GET  /funcionarios           ?empresa_id=&limite=&apos=
+    GET  /relatorios/periodo     ?inicio=&fim=&empresa_id=&limite=&apos=
+    GET  /relatorios/empresas    ?inicio=&fim=
+
+Datas em AAAA-MM-DD ou DD/MM/AAAA, horas em HH:MM. Listas são paginadas por
+chave (keyset): a resposta traz 'proximo', que vai em ?apos= na página
+seguinte (null = última página).
+
+Leituras rodam em um pool de threads, cada uma com sua conexão aberta (WAL
+permite ler enquanto se grava). Escritas entram em uma fila atendida por uma
+única thread, que grava as requisições pendentes juntas em uma transação
+(cada uma em seu SAVEPOINT: erro em uma não desfaz as outras).
+"""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time
+from urllib.parse import parse_qs, urlsplit
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.database import engine
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.registro_jornada import RegistroJornada
+from services.calculo_service import CalculoService
+from services.importacao_service import ImportacaoService
+from services.relatorio_service import RelatorioService
+from services.resumo_service import ResumoService
+
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8765
+LEITORES_PADRAO = 4
+
+LIMITE_PAGINA = 100
+LIMITE_PAGINA_MAXIMO = 1000
+MAX_REGISTROS_POR_REQUISICAO = 5000
+# Requisições de escrita gravadas na mesma transação
+MAX_ESCRITAS_POR_GRUPO = 64
+# Corpo e cabeçalhos (bytes)
+MAX_CORPO = 8 * 1024 * 1024
+MAX_CABECALHO = 16 * 1024
+
+_MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ErroAPI(Exception):
+    """Erro devolvido ao cliente como {'erro': mensagem} com o status HTTP"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+# ------------------------------------------------------------ conversões
+
+def _para_json(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    raise TypeError(f"tipo não serializável: {type(valor).__name__}")
+
+def _data(valor, campo):
+    try:
+        return ImportacaoService._ler_data(str(valor))
+    except (ValueError, TypeError):
+        raise ErroAPI(400, f"{campo}: data inválida ({valor!r})")
+
+def _hora(valor, campo):
+    try:
+        return ImportacaoService._ler_hora(str(valor))
+    except (ValueError, TypeError):
+        raise ErroAPI(400, f"{campo}: hora inválida ({valor!r})")
+
+def _numero(valor, campo, tipo=float, minimo=None):
+    try:
+        numero = tipo(valor)
+    except (ValueError, TypeError):
+        raise ErroAPI(400, f"{campo}: número inválido ({valor!r})")
+    if minimo is not None and numero < minimo:
+        raise ErroAPI(400, f"{campo}: deve ser >= {minimo}")
+    return numero
+
+def _parametro(consulta, nome, conversor=None, obrigatorio=False):
+    valores = consulta.get(nome)
+    if not valores or valores[0] == '':
+        if obrigatorio:
+            raise ErroAPI(400, f"parâmetro obrigatório: {nome}")
+        return None
+    return conversor(valores[0], nome) if conversor else valores[0]
+
+def _inteiro(valor, campo):
+    return _numero(valor, campo, int, minimo=0)
+
+def _periodo(consulta):
+    inicio = _parametro(consulta, 'inicio', _data, obrigatorio=True)
+    fim = _parametro(consulta, 'fim', _data, obrigatorio=True)
+    if inicio > fim:
+        raise ErroAPI(400, "data inicial depois da final")
+    return inicio, fim
+
+def _limite(consulta):
+    limite = _parametro(consulta, 'limite', _inteiro) or LIMITE_PAGINA
+    return max(1, min(limite, LIMITE_PAGINA_MAXIMO))
+
+def _pagina(itens, limite, chave):
+    """Corta a consulta feita com limite + 1 e devolve o cursor da próxima página"""
+    if len(itens) > limite:
+        itens = itens[:limite]
+        return {'itens': itens, 'proximo': chave(itens[-1])}
+    return {'itens': itens, 'proximo': None}
+
+
+# ------------------------------------------------------- leitura e escrita
+
+class PoolLeitura:
+    """Threads de leitura, cada uma com uma conexão aberta durante toda a vida do servidor"""
+
+    def __init__(self, bind, leitores):
+        self.bind = bind
+        self._executor = ThreadPoolExecutor(max_workers=leitores, thread_name_prefix='api-leitura')
+        self._local = threading.local()
+        self._conexoes = []
+        self._lock = threading.Lock()
+
+    def _executar(self, funcao):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = self._local.conexao = self.bind.connect()
+            with self._lock:
+                self._conexoes.append(conexao)
+        try:
+            with Session(bind=conexao) as db:
+                return funcao(db)
+        finally:
+            # Encerra a transação de leitura (o snapshot do WAL não fica preso)
+            conexao.rollback()
+
+    async def ler(self, funcao):
+        """Executa funcao(db) em uma thread de leitura"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._executar, funcao)
+
+    def fechar(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conexao in self._conexoes:
+                conexao.close()
+            self._conexoes.clear()
+
+
+class FilaEscrita:
+    """Único escritor do banco: requisições enfileiradas e gravadas em grupo"""
+
+    def __init__(self, bind, max_por_grupo=MAX_ESCRITAS_POR_GRUPO):
+        self.bind = bind
+        self.max_por_grupo = max_por_grupo
+        self._fila = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='api-escrita')
+        self._tarefa = None
+
+    def iniciar(self):
+        self._tarefa = asyncio.create_task(self._atender())
+        return self
+
+    async def gravar(self, funcao):
+        """Enfileira funcao(conn) e espera o commit do grupo em que ela entrou"""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((funcao, futuro))
+        return await futuro
+
+    async def _atender(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            grupo = [await self._fila.get()]
+            while len(grupo) < self.max_por_grupo and not self._fila.empty():
+                grupo.append(self._fila.get_nowait())
+
+            try:
+                resultados = await loop.run_in_executor(self._executor, self._gravar_grupo, grupo)
+            except Exception as e:
+                # Falha no commit: nada do grupo foi gravado
+                resultados = [(False, e)] * len(grupo)
+
+            for (_, futuro), (ok, valor) in zip(grupo, resultados):
+                if futuro.done():
+                    continue
+                if ok:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+
+    def _gravar_grupo(self, grupo):
+        resultados = []
+        with self.bind.begin() as conn:
+            for funcao, _ in grupo:
+                try:
+                    with conn.begin_nested():
+                        resultados.append((True, funcao(conn)))
+                except Exception as e:
+                    resultados.append((False, e))
+        return resultados
+
+    async def fechar(self):
+        if self._tarefa:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+
+# ------------------------------------------------------------- servidor
+
+class ServidorAPI:
+    """Servidor HTTP/1.1 mínimo (keep-alive, corpo JSON com Content-Length)"""
+
+    def __init__(self, bind=None, leitores=LEITORES_PADRAO):
+        self.bind = bind or engine
+        self.leitores = leitores
+        self.leitura = None
+        self.escrita = None
+        self._servidor = None
+        self.rotas = {
+            ('GET', '/saude'): self.saude,
+            ('POST', '/calculo/jornada'): self.calcular_jornada,
+            ('POST', '/jornadas'): self.registrar_jornadas,
+            ('GET', '/jornadas'): self.listar_jornadas,
+            ('GET', '/funcionarios'): self.listar_funcionarios,
+            ('GET', '/relatorios/periodo'): self.relatorio_periodo,
+            ('GET', '/relatorios/empresas'): self.relatorio_empresas,
+        }
+
+    async def iniciar(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        self.leitura = PoolLeitura(self.bind, self.leitores)
+        self.escrita = FilaEscrita(self.bind).iniciar()
+        self._servidor = await asyncio.start_server(self._atender, host, porta, limit=MAX_CABECALHO)
+        return self._servidor.sockets[0].getsockname()[:2]
+
+    async def servir(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        host, porta = await self.iniciar(host, porta)
+        print(f"🌐 API em http://{host}:{porta} ({self.leitores} leitores, 1 escritor)")
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.fechar()
+
+    async def fechar(self):
+        if self._servidor:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if self.escrita:
+            await self.escrita.fechar()
+        if self.leitura:
+            self.leitura.fechar()
+
+    # ------------------------------------------------------------ HTTP
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(reader)
+                except ErroAPI as e:
+                    await self._responder(writer, e.status, {'erro': e.mensagem}, manter=False)
+                    break
+                if requisicao is None:
+                    break
+
+                metodo, caminho, consulta, corpo, manter = requisicao
+                status, resposta = await self._despachar(metodo, caminho, consulta, corpo)
+                await self._responder(writer, status, resposta, manter)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _ler_requisicao(self, reader):
+        try:
+            cabecalho = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErroAPI(413, "cabeçalho muito grande")
+
+        linhas = cabecalho.decode('latin-1').split('\r\n')
+        try:
+            metodo, alvo, versao = linhas[0].split(' ')
+        except ValueError:
+            raise ErroAPI(400, "linha de requisição inválida")
+
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if ':' in linha:
+                nome, valor = linha.split(':', 1)
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+        tamanho = _numero(cabecalhos.get('content-length', 0), 'Content-Length', int, minimo=0)
+        if tamanho > MAX_CORPO:
+            raise ErroAPI(413, f"corpo maior que {MAX_CORPO} bytes")
+        corpo = await reader.readexactly(tamanho) if tamanho else b''
+
+        conexao = cabecalhos.get('connection', '').lower()
+        manter = conexao != 'close' if versao == 'HTTP/1.1' else conexao == 'keep-alive'
+
+        partes = urlsplit(alvo)
+        return metodo.upper(), partes.path.rstrip('/') or '/', parse_qs(partes.query), corpo, manter
+
+    async def _despachar(self, metodo, caminho, consulta, corpo):
+        rota = self.rotas.get((metodo, caminho))
+        if rota is None:
+            if any(c == caminho for _, c in self.rotas):
+                return 405, {'erro': f"método {metodo} não permitido em {caminho}"}
+            return 404, {'erro': f"rota não encontrada: {caminho}"}
+
+        try:
+            dados = None
+            if metodo == 'POST':
+                try:
+                    dados = json.loads(corpo or b'{}')
+                except ValueError:
+                    raise ErroAPI(400, "corpo não é um JSON válido")
+                if not isinstance(dados, dict):
+                    raise ErroAPI(400, "corpo deve ser um objeto JSON")
+            return 200, await rota(consulta, dados)
+        except ErroAPI as e:
+            return e.status, {'erro': e.mensagem}
+        except Exception as e:
+            print(f"❌ Erro em {metodo} {caminho}: {e}")
+            return 500, {'erro': str(e)}
+
+    async def _responder(self, writer, status, resposta, manter):
+        corpo = json.dumps(resposta, ensure_ascii=False, default=_para_json).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {_MOTIVOS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode('latin-1') + corpo
+        )
+        await writer.drain()
+
+    # ------------------------------------------------------------- rotas
+
+    async def saude(self, consulta, dados):
+        from models.migracoes import versao_esquema
+        versao = await self.leitura.ler(lambda db: versao_esquema(self.bind))
+        return {'status': 'ok', 'versao_esquema': versao}
+
+    async def calcular_jornada(self, consulta, dados):
+        entrada = _hora(dados.get('hora_entrada'), 'hora_entrada')
+        saida = _hora(dados.get('hora_saida'), 'hora_saida')
+        intervalo = _numero(dados.get('intervalo', 0), 'intervalo', minimo=0)
+        carga = dados.get('carga_horaria_diaria')
+        valor_hora = dados.get('valor_hora')
+
+        if dados.get('funcionario_id') is not None:
+            funcionario_id = _inteiro(dados['funcionario_id'], 'funcionario_id')
+            funcionario = await self.leitura.ler(lambda db: db.execute(
+                select(Funcionario.carga_horaria_diaria, Funcionario.valor_hora)
+                .where(Funcionario.id == funcionario_id)
+            ).first())
+            if funcionario is None:
+                raise ErroAPI(404, f"funcionário {funcionario_id} não encontrado")
+            carga = funcionario.carga_horaria_diaria if carga is None else carga
+            valor_hora = funcionario.valor_hora if valor_hora is None else valor_hora
+
+        if carga is None:
+            raise ErroAPI(400, "informe carga_horaria_diaria ou funcionario_id")
+
+        resultado = CalculoService.calcular_jornada_completa(
+            entrada, saida, intervalo, _numero(carga, 'carga_horaria_diaria', minimo=0)
+        )
+        if valor_hora is not None:
+            resultado['valor_extras'] = CalculoService.calcular_valor_horas_extras(
+                resultado['horas_extras'], _numero(valor_hora, 'valor_hora', minimo=0)
+            )
+        return resultado
+
+    async def registrar_jornadas(self, consulta, dados):
+        registros = dados.get('registros')
+        if not isinstance(registros, list) or not registros:
+            raise ErroAPI(400, "informe 'registros' (lista não vazia)")
+        if len(registros) > MAX_REGISTROS_POR_REQUISICAO:
+            raise ErroAPI(413, f"máximo de {MAX_REGISTROS_POR_REQUISICAO} registros por requisição")
+
+        jornadas = []
+        erros = []
+        for indice, r in enumerate(registros):
+            try:
+                if not isinstance(r, dict):
+                    raise ErroAPI(400, "registro deve ser um objeto")
+                jornadas.append({
+                    'indice': indice,
+                    'funcionario_id': _inteiro(r.get('funcionario_id'), 'funcionario_id'),
+                    'data': _data(r.get('data'), 'data'),
+                    'hora_entrada': _hora(r.get('hora_entrada'), 'hora_entrada'),
+                    'hora_saida': _hora(r.get('hora_saida'), 'hora_saida'),
+                    'intervalo': _numero(r.get('intervalo', 0), 'intervalo', minimo=0),
+                })
+            except ErroAPI as e:
+                erros.append({'indice': indice, 'erro': e.mensagem})
+
+        def gravar(conn):
+            ids = {j['funcionario_id'] for j in jornadas}
+            cargas = dict(conn.execute(
+                select(Funcionario.id, Funcionario.carga_horaria_diaria).where(Funcionario.id.in_(ids))
+            ).all()) if ids else {}
+            validos = []
+            for j in jornadas:
+                if j['funcionario_id'] in cargas:
+                    validos.append(j)
+                else:
+                    erros.append({'indice': j['indice'],
+                                  'erro': f"funcionário {j['funcionario_id']} não encontrado"})
+            return ImportacaoService.gravar_lote(conn, validos, cargas)
+
+        gravados = await self.escrita.gravar(gravar) if jornadas else 0
+        erros.sort(key=lambda e: e['indice'])
+        return {'gravados': gravados, 'erros': erros}
+
+    async def listar_jornadas(self, consulta, dados):
+        funcionario_id = _parametro(consulta, 'funcionario_id', _inteiro, obrigatorio=True)
+        inicio, fim = _periodo(consulta)
+        apos = _parametro(consulta, 'apos', _data)
+        limite = _limite(consulta)
+
+        r = RegistroJornada
+        filtro = select(
+            r.data, r.hora_entrada, r.hora_saida, r.intervalo,
+            r.horas_trabalhadas, r.horas_extras, r.horas_faltantes
+        ).where(
+            r.funcionario_id == funcionario_id,
+            r.data >= inicio, r.data <= fim
+        )
+        if apos:
+            filtro = filtro.where(r.data > apos)
+
+        linhas = await self.leitura.ler(lambda db: db.execute(
+            filtro.order_by(r.data).limit(limite + 1)
+        ).mappings().all())
+        return _pagina([dict(l) for l in linhas], limite, lambda item: item['data'].isoformat())
+
+    async def listar_funcionarios(self, consulta, dados):
+        empresa_id = _parametro(consulta, 'empresa_id', _inteiro)
+        apos = _parametro(consulta, 'apos', _inteiro) or 0
+        limite = _limite(consulta)
+
+        filtro = select(
+            Funcionario.id, Funcionario.nome, Funcionario.cargo, Funcionario.carga_horaria_diaria,
+            Funcionario.valor_hora, Funcionario.empresa_id, Empresa.nome.label('empresa_nome')
+        ).outerjoin(Empresa, Funcionario.empresa_id == Empresa.id).where(Funcionario.id > apos)
+        if empresa_id:
+            filtro = filtro.where(Funcionario.empresa_id == empresa_id)
+
+        linhas = await self.leitura.ler(lambda db: db.execute(
+            filtro.order_by(Funcionario.id).limit(limite + 1)
+        ).mappings().all())
+        return _pagina([dict(l) for l in linhas], limite, lambda item: item['id'])
+
+    async def relatorio_periodo(self, consulta, dados):
+        inicio, fim = _periodo(consulta)
+        empresa_id = _parametro(consulta, 'empresa_id', _inteiro)
+        apos = _parametro(consulta, 'apos', _inteiro) or 0
+        limite = _limite(consulta)
+
+        filtro = ResumoService.consulta_periodo(inicio, fim, empresa_id=empresa_id).where(
+            Funcionario.id > apos
+        ).order_by(Funcionario.id).limit(limite + 1)
+
+        linhas = await self.leitura.ler(lambda db: db.execute(filtro).all())
+        itens = [
+            {
+                'funcionario_id': r.funcionario_id,
+                'nome': r.nome,
+                'empresa': r.empresa_nome,
+                'cargo': r.cargo,
+                'horas_trabalhadas': r.total_trabalhadas,
+                'horas_extras': r.total_extras,
+                'horas_faltantes': r.total_faltantes,
+                'num_registros': r.num_registros,
+                'valor_extras': CalculoService.calcular_valor_horas_extras(r.total_extras, r.valor_hora),
+            }
+            for r in linhas
+        ]
+        pagina = _pagina(itens, limite, lambda item: item['funcionario_id'])
+        pagina.update({'inicio': inicio, 'fim': fim})
+        return pagina
+
+    async def relatorio_empresas(self, consulta, dados):
+        inicio, fim = _periodo(consulta)
+        linhas = await self.leitura.ler(lambda db: ResumoService.totais_por_empresa(db, inicio, fim))
+        return {
+            'inicio': inicio,
+            'fim': fim,
+            'itens': [
+                {
+                    'empresa_id': r.empresa_id,
+                    'empresa': r.empresa_nome or "Sem empresa",
+                    'horas_trabalhadas': r.total_trabalhadas,
+                    'horas_extras': r.total_extras,
+                    'horas_faltantes': r.total_faltantes,
+                    'num_funcionarios': r.num_funcionarios,
+                    'saldo': RelatorioService.mensagem_saldo(r.total_extras, r.total_faltantes),
+                }
+                for r in linhas
+            ],
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="API HTTP/JSON local de horas extras")
+    parser.add_argument('--host', default=HOST_PADRAO,
+                        help="endereço de escuta (padrão: só esta máquina)")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--leitores', type=int, default=LEITORES_PADRAO,
+                        help="threads/conexões de leitura")
+    args = parser.parse_args()
+
+    init_db()
+    try:
+        asyncio.run(ServidorAPI(leitores=args.leitores).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        print("👋 API encerrada")
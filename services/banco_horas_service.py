@@ -0,0 +1,312 @@
+"""
+services/banco_horas_service.py
+Banco de horas: compensação de horas extras com horas faltantes, com prazo de validade
+
+Para cada funcionário, banco_horas guarda por dia com movimento as somas
+acumuladas de créditos (C), débitos (D) e créditos vencidos (E), em centésimos
+de hora (o inteiro gravado em registros_jornada).
+O saldo em uma data t é C(t) - D(t) - E(t), lido da última linha até t, e o
+movimento de um período é a diferença entre as linhas das duas pontas.
+
+Validade (HORAS_EXTRAS_BANCO_HORAS_MESES, padrão 6; 0 = sem validade): os
+débitos compensam primeiro os créditos mais antigos, e o crédito não
+compensado até o dia em que completa N meses vence no fim desse dia. Tudo
+que foi creditado até lim(t) = t - N meses tem de estar compensado ou vencido
+no fim do dia t, então
+
+    E(t) = max(E(t - 1), C(lim(t)) - D(t))
+
+e E de uma data sem linha sai da última linha mais uma consulta a C(lim(t)).
+Mudar o prazo exige --reconstruir.
+
+Os gatilhos de registros_jornada anotam o primeiro dia alterado de cada
+funcionário em banco_horas_pendentes; atualizar() refaz só as linhas a partir
+desse dia e é chamado antes de cada consulta, então inclusões e correções
+retroativas não reconstroem o banco inteiro.
+
+    python -m services.banco_horas_service --funcionario 5 [--data 31/12/2024]
+    python -m services.banco_horas_service --funcionario 5 --de 01/01/2024 --ate 30/06/2024
+    python -m services.banco_horas_service --saldos [--data 31/12/2024] [--empresa 3]
+    python -m services.banco_horas_service --reconstruir
+"""
+import bisect
+import calendar
+import os
+from datetime import date, datetime, timedelta
+from sqlalchemy import Integer, and_, delete, func, insert, select, text, type_coerce
+from sqlalchemy.orm import aliased
+from models.banco_horas import BancoHoras, BancoHorasPendente, SQL_MARCAR_TODOS
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.registro_jornada import RegistroJornada
+from models.tipos import centesimos_para_horas
+
+MESES_VALIDADE = int(os.getenv('HORAS_EXTRAS_BANCO_HORAS_MESES', '6'))
+
+_EPOCA = date(1970, 1, 1)
+
+
+def _dia(data):
+    return (data - _EPOCA).days
+
+
+def _limite(dia, meses):
+    """Último dia cujos créditos já venceram em `dia` (dia - meses, dias desde 1970)"""
+    d = _EPOCA + timedelta(days=dia)
+    ano, mes = divmod(d.year * 12 + d.month - 1 - meses, 12)
+    mes += 1
+    return _dia(date(ano, mes, min(d.day, calendar.monthrange(ano, mes)[1])))
+
+
+def _horas(centesimos):
+    return centesimos_para_horas(centesimos)
+
+
+class BancoHorasService:
+
+    @staticmethod
+    def atualizar(conn, funcionario_id=None):
+        """
+        Refaz as linhas de banco_horas dos funcionários com alterações pendentes
+
+        conn deve estar em transação de escrita (engine.begin() ou db.connection()).
+
+        Returns:
+            int: funcionários atualizados
+        """
+        p = BancoHorasPendente
+        consulta = select(p.funcionario_id, type_coerce(p.data_inicio, Integer))
+        if funcionario_id is not None:
+            consulta = consulta.where(p.funcionario_id == funcionario_id)
+        pendentes = conn.execute(consulta).all()
+
+        for func_id, desde in pendentes:
+            BancoHorasService._refazer(conn, func_id, desde)
+            conn.execute(delete(p).where(p.funcionario_id == func_id))
+        return len(pendentes)
+
+    @staticmethod
+    def reconstruir(conn):
+        """Refaz o banco de horas de todos os funcionários (após mudar o prazo de validade)"""
+        conn.execute(delete(BancoHoras))
+        conn.execute(text(SQL_MARCAR_TODOS))
+        return BancoHorasService.atualizar(conn)
+
+    @staticmethod
+    def _refazer(conn, funcionario_id, desde, meses=None):
+        """Regrava as linhas de banco_horas do funcionário a partir do dia `desde`"""
+        meses = MESES_VALIDADE if meses is None else meses
+        b = BancoHoras
+        dia_b = type_coerce(b.data, Integer)
+
+        def ultima_linha(ate):
+            return conn.execute(
+                select(dia_b, b.credito_acumulado, b.debito_acumulado, b.expirado_acumulado)
+                .where(b.funcionario_id == funcionario_id, dia_b <= ate)
+                .order_by(dia_b.desc()).limit(1)
+            ).first()
+
+        anterior = ultima_linha(desde - 1)
+        c_acum, d_acum, e_acum = anterior[1:] if anterior else (0, 0, 0)
+
+        # Créditos acumulados desde lim(desde - 1), o mais antigo consultado no trecho
+        dias, creditos = [], []
+        base = 0
+        if meses:
+            inicio = _limite(desde - 1, meses)
+            linha_base = ultima_linha(inicio)
+            base = linha_base[1] if linha_base else 0
+            for dia, credito in conn.execute(
+                select(dia_b, b.credito_acumulado)
+                .where(b.funcionario_id == funcionario_id, dia_b > inicio, dia_b < desde)
+                .order_by(dia_b)
+            ):
+                dias.append(dia)
+                creditos.append(credito)
+
+        def credito_ate(dia):
+            i = bisect.bisect_right(dias, dia)
+            return creditos[i - 1] if i else base
+
+        r = RegistroJornada
+        dia_r = type_coerce(r.data, Integer)
+        registros = conn.execute(
+            select(dia_r, type_coerce(r.horas_extras, Integer), type_coerce(r.horas_faltantes, Integer))
+            .where(r.funcionario_id == funcionario_id, dia_r >= desde)
+            .order_by(dia_r)
+        )
+
+        linhas = []
+        for dia, extras, faltantes in registros:
+            credito, debito = extras or 0, faltantes or 0
+            if not credito and not debito:
+                continue
+            d_anterior = d_acum
+            c_acum += credito
+            d_acum += debito
+            if meses:
+                # Vencimentos entre a linha anterior e esta, e no próprio dia
+                e_acum = max(e_acum,
+                             credito_ate(_limite(dia - 1, meses)) - d_anterior,
+                             credito_ate(_limite(dia, meses)) - d_acum)
+            linhas.append({
+                'funcionario_id': funcionario_id, 'data': dia,
+                'credito': credito, 'debito': debito,
+                'credito_acumulado': c_acum, 'debito_acumulado': d_acum, 'expirado_acumulado': e_acum,
+            })
+            dias.append(dia)
+            creditos.append(c_acum)
+
+        conn.execute(delete(b).where(b.funcionario_id == funcionario_id, dia_b >= desde))
+        if linhas:
+            conn.execute(insert(b), linhas)
+
+    @staticmethod
+    def _acumulados(conn, funcionario_id, dia, meses=None):
+        """(C, D, E) em centésimos de hora no fim do dia, em duas consultas por chave"""
+        meses = MESES_VALIDADE if meses is None else meses
+        b = BancoHoras
+        dia_b = type_coerce(b.data, Integer)
+        linha = conn.execute(
+            select(b.credito_acumulado, b.debito_acumulado, b.expirado_acumulado)
+            .where(b.funcionario_id == funcionario_id, dia_b <= dia)
+            .order_by(dia_b.desc()).limit(1)
+        ).first()
+        credito, debito, expirado = linha or (0, 0, 0)
+        if meses:
+            vencido = conn.execute(
+                select(b.credito_acumulado)
+                .where(b.funcionario_id == funcionario_id, dia_b <= _limite(dia, meses))
+                .order_by(dia_b.desc()).limit(1)
+            ).scalar() or 0
+            expirado = max(expirado, vencido - debito)
+        return credito, debito, expirado
+
+    @staticmethod
+    def saldo(conn, funcionario_id, data=None):
+        """
+        Banco de horas do funcionário no fim do dia `data` (padrão: hoje)
+
+        Returns:
+            dict: credito, debito, expirado e saldo acumulados, em horas
+        """
+        BancoHorasService.atualizar(conn, funcionario_id)
+        credito, debito, expirado = BancoHorasService._acumulados(conn, funcionario_id, _dia(data or date.today()))
+        return {
+            'credito': _horas(credito), 'debito': _horas(debito), 'expirado': _horas(expirado),
+            'saldo': _horas(credito - debito - expirado),
+        }
+
+    @staticmethod
+    def movimento(conn, funcionario_id, data_inicio, data_fim):
+        """
+        Créditos, débitos e vencimentos do período e os saldos das pontas
+
+        Returns:
+            dict: credito, debito, expirado, saldo_inicial, saldo_final (horas)
+        """
+        BancoHorasService.atualizar(conn, funcionario_id)
+        c0, d0, e0 = BancoHorasService._acumulados(conn, funcionario_id, _dia(data_inicio) - 1)
+        c1, d1, e1 = BancoHorasService._acumulados(conn, funcionario_id, _dia(data_fim))
+        return {
+            'credito': _horas(c1 - c0), 'debito': _horas(d1 - d0), 'expirado': _horas(e1 - e0),
+            'saldo_inicial': _horas(c0 - d0 - e0), 'saldo_final': _horas(c1 - d1 - e1),
+        }
+
+    @staticmethod
+    def saldos(conn, data=None, empresa_id=None, meses=None):
+        """
+        Banco de horas de todos os funcionários no fim do dia `data`
+
+        Returns:
+            list: dicts funcionario_id, nome, empresa, credito, debito, expirado, saldo
+                  (horas), de quem tem movimento, ordenado por nome
+        """
+        meses = MESES_VALIDADE if meses is None else meses
+        BancoHorasService.atualizar(conn)
+        dia = _dia(data or date.today())
+
+        def linha_ate(ate):
+            # Última linha de cada funcionário até `ate` (uma busca no índice por funcionário)
+            b, ultima = aliased(BancoHoras), aliased(BancoHoras)
+            ultimo_dia = select(func.max(type_coerce(ultima.data, Integer))).where(
+                ultima.funcionario_id == b.funcionario_id,
+                type_coerce(ultima.data, Integer) <= ate
+            ).scalar_subquery()
+            return b, and_(b.funcionario_id == Funcionario.id, type_coerce(b.data, Integer) == ultimo_dia)
+
+        b, condicao = linha_ate(dia)
+        consulta = select(
+            Funcionario.id, Funcionario.nome, func.coalesce(Empresa.nome, 'Sem Empresa'),
+            b.credito_acumulado, b.debito_acumulado, b.expirado_acumulado
+        ).select_from(Funcionario).join(b, condicao).outerjoin(Empresa, Funcionario.empresa_id == Empresa.id)
+        if meses:
+            v, condicao_vencido = linha_ate(_limite(dia, meses))
+            consulta = consulta.add_columns(v.credito_acumulado).outerjoin(v, condicao_vencido)
+        if empresa_id:
+            consulta = consulta.where(Funcionario.empresa_id == empresa_id)
+
+        resultado = []
+        for func_id, nome, empresa, credito, debito, expirado, *vencido in conn.execute(
+            consulta.order_by(Funcionario.nome, Funcionario.id)
+        ):
+            if vencido:
+                expirado = max(expirado, (vencido[0] or 0) - debito)
+            resultado.append({
+                'funcionario_id': func_id, 'nome': nome, 'empresa': empresa,
+                'credito': _horas(credito), 'debito': _horas(debito), 'expirado': _horas(expirado),
+                'saldo': _horas(credito - debito - expirado),
+            })
+        return resultado
+
+
+def _data(texto):
+    return datetime.strptime(texto, '%d/%m/%Y').date()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from models.database import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Banco de horas por funcionário")
+    parser.add_argument('--funcionario', type=int)
+    parser.add_argument('--data', type=_data, help="saldo no fim do dia DD/MM/AAAA (padrão: hoje)")
+    parser.add_argument('--de', type=_data, help="início do período (com --ate)")
+    parser.add_argument('--ate', type=_data, help="fim do período (com --de)")
+    parser.add_argument('--saldos', action='store_true', help="saldo de todos os funcionários")
+    parser.add_argument('--empresa', type=int)
+    parser.add_argument('--reconstruir', action='store_true',
+                        help="refaz todo o banco (necessário ao mudar HORAS_EXTRAS_BANCO_HORAS_MESES)")
+    args = parser.parse_args()
+
+    init_db()
+    validade = f"{MESES_VALIDADE} meses" if MESES_VALIDADE else "sem validade"
+
+    if args.reconstruir:
+        inicio = time.perf_counter()
+        with engine.begin() as conn:
+            total = BancoHorasService.reconstruir(conn)
+        print(f"✅ Banco de horas refeito para {total} funcionário(s) em "
+              f"{time.perf_counter() - inicio:.1f}s ({validade})")
+
+    if args.funcionario and args.de and args.ate:
+        with engine.begin() as conn:
+            m = BancoHorasService.movimento(conn, args.funcionario, args.de, args.ate)
+        print(f"🏦 Funcionário {args.funcionario}, {args.de:%d/%m/%Y} a {args.ate:%d/%m/%Y} ({validade})")
+        print(f"   saldo inicial {m['saldo_inicial']:+.2f}h  créditos {m['credito']:.2f}h  "
+              f"débitos {m['debito']:.2f}h  vencidos {m['expirado']:.2f}h  saldo final {m['saldo_final']:+.2f}h")
+    elif args.funcionario:
+        with engine.begin() as conn:
+            s = BancoHorasService.saldo(conn, args.funcionario, args.data)
+        print(f"🏦 Funcionário {args.funcionario} em {(args.data or date.today()):%d/%m/%Y} ({validade})")
+        print(f"   créditos {s['credito']:.2f}h  débitos {s['debito']:.2f}h  "
+              f"vencidos {s['expirado']:.2f}h  saldo {s['saldo']:+.2f}h")
+
+    if args.saldos:
+        with engine.begin() as conn:
+            saldos = BancoHorasService.saldos(conn, args.data, args.empresa)
+        for s in saldos:
+            print(f"   {s['funcionario_id']:6d}  {s['nome'][:30]:30s}  {s['saldo']:+9.2f}h  "
+                  f"(vencidas {s['expirado']:.2f}h)")
+        print(f"🏦 {len(saldos)} funcionário(s) com banco de horas ({validade})")
@@ -2,7 +2,15 @@
 services/calculo_service.py
 Serviço para cálculo de horas trabalhadas, extras e faltantes
 """
-from datetime import datetime, time, timedelta
+
+# numpy é opcional; sem ele, o cálculo em lote usa um laço em Python puro
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+MINUTOS_POR_DIA = 24 * 60
+SEGUNDOS_POR_DIA = MINUTOS_POR_DIA * 60
 
 class CalculoService:
     
@@ -19,17 +27,14 @@ class CalculoService:
         Returns:
             float: horas trabalhadas
         """
-        # Converte time para datetime para fazer cálculos
-        dt_entrada = datetime.combine(datetime.today(), hora_entrada)
-        dt_saida = datetime.combine(datetime.today(), hora_saida)
+        # Segundos inteiros, a mesma conta de calcular_lote
+        segundos = CalculoService.segundos_do_dia(hora_saida) - CalculoService.segundos_do_dia(hora_entrada)
         
         # Se saída for menor que entrada, passou da meia-noite
-        if dt_saida < dt_entrada:
-            dt_saida += timedelta(days=1)
+        if segundos < 0:
+            segundos += SEGUNDOS_POR_DIA
         
-        # Calcula diferença
-        diferenca = dt_saida - dt_entrada
-        horas_totais = diferenca.total_seconds() / 3600
+        horas_totais = segundos / 3600
         
         # Subtrai intervalo
         horas_trabalhadas = horas_totais - intervalo
@@ -94,4 +99,120 @@ class CalculoService:
         Returns:
             float: valor em reais
         """
-        return round(horas_extras * valor_hora * percentual, 2)
\ No newline at end of file
+        return round(horas_extras * valor_hora * percentual, 2)
+    
+    @staticmethod
+    def segundos_do_dia(hora):
+        """Converte um objeto time em segundos inteiros desde a meia-noite (microssegundos são descartados)"""
+        return hora.hour * 3600 + hora.minute * 60 + hora.second
+    
+    @staticmethod
+    def minutos_do_dia(hora):
+        """
+        Converte um objeto time em minutos desde a meia-noite
+        
+        Args:
+            hora: objeto time
+        
+        Returns:
+            float: minutos (segundos viram fração de minuto; microssegundos são descartados)
+        """
+        minutos = hora.hour * 60 + hora.minute
+        if hora.second:
+            minutos += hora.second / 60
+        return minutos
+    
+    @staticmethod
+    def calcular_lote(entradas_min, saidas_min, intervalos, cargas_horarias):
+        """
+        Calcula várias jornadas de uma vez (versão vetorizada de calcular_jornada_completa)
+        
+        Segue as mesmas regras do cálculo individual: os minutos viram
+        segundos inteiros, saída menor que a entrada passa da meia-noite e
+        todos os valores são arredondados em 2 casas, com resultado idêntico.
+        
+        Args:
+            entradas_min: sequência/array de minutos desde a meia-noite
+            saidas_min: sequência/array de minutos desde a meia-noite
+            intervalos: sequência/array de horas de intervalo (ou um único float)
+            cargas_horarias: sequência/array de cargas diárias em horas (ou um único float)
+        
+        Returns:
+            dict: {horas_trabalhadas, horas_extras, horas_faltantes} como arrays
+                  numpy (ou listas, quando numpy não está instalado)
+        """
+        if np is None:
+            return CalculoService._calcular_lote_python(
+                entradas_min, saidas_min, intervalos, cargas_horarias
+            )
+        
+        entradas = np.asarray(entradas_min, dtype=np.float64)
+        saidas = np.asarray(saidas_min, dtype=np.float64)
+        intervalos = np.broadcast_to(np.asarray(intervalos, dtype=np.float64), entradas.shape)
+        cargas = np.broadcast_to(np.asarray(cargas_horarias, dtype=np.float64), entradas.shape)
+        
+        # Segundos inteiros (minutos fracionários vêm de horários com segundos)
+        segundos = np.rint(saidas * 60) - np.rint(entradas * 60)
+        # Saída menor que entrada: soma um dia
+        segundos = np.where(segundos < 0, segundos + SEGUNDOS_POR_DIA, segundos)
+        
+        # Mesma conta do caminho escalar: segundos / 3600
+        horas_trabalhadas = CalculoService._arredondar(segundos / 3600 - intervalos)
+        
+        diferenca = horas_trabalhadas - cargas
+        positiva = diferenca > 0
+        arredondada = CalculoService._arredondar(np.abs(diferenca))
+        horas_extras = np.where(positiva, arredondada, 0.0)
+        horas_faltantes = np.where(positiva, 0.0, arredondada)
+        
+        return {
+            'horas_trabalhadas': horas_trabalhadas,
+            'horas_extras': horas_extras,
+            'horas_faltantes': horas_faltantes
+        }
+    
+    @staticmethod
+    def _arredondar(valores):
+        """
+        Arredonda um array em 2 casas com o mesmo resultado do round() do Python
+        
+        np.round multiplica por 100 antes de arredondar e pode divergir do
+        round() nos empates (ex.: 2.675). Só esses casos voltam para o round().
+        """
+        centesimos = valores * 100
+        resultado = np.round(centesimos) / 100
+        fracao = np.abs(centesimos - np.floor(centesimos))
+        empates = np.flatnonzero(np.abs(fracao - 0.5) < 1e-6)
+        if empates.size:
+            resultado = np.array(resultado, copy=True)
+            planos = valores.ravel()
+            resultado.ravel()[empates] = [round(float(planos[i]), 2) for i in empates]
+        return resultado
+    
+    @staticmethod
+    def _calcular_lote_python(entradas_min, saidas_min, intervalos, cargas_horarias):
+        """Fallback de calcular_lote sem numpy"""
+        entradas = list(entradas_min)
+        total = len(entradas)
+        if isinstance(intervalos, (int, float)):
+            intervalos = [intervalos] * total
+        if isinstance(cargas_horarias, (int, float)):
+            cargas_horarias = [cargas_horarias] * total
+        
+        resultado = {'horas_trabalhadas': [], 'horas_extras': [], 'horas_faltantes': []}
+        
+        for entrada, saida, intervalo, carga in zip(entradas, saidas_min, intervalos, cargas_horarias):
+            segundos = round(saida * 60) - round(entrada * 60)
+            if segundos < 0:
+                segundos += SEGUNDOS_POR_DIA
+            
+            horas_trabalhadas = round(segundos / 3600 - intervalo, 2)
+            horas_extras, horas_faltantes = CalculoService.calcular_horas_extras_e_faltantes(
+                horas_trabalhadas, carga
+            )
+            
+            resultado['horas_trabalhadas'].append(horas_trabalhadas)
+            resultado['horas_extras'].append(horas_extras)
+            resultado['horas_faltantes'].append(horas_faltantes)
+        
+        return resultado
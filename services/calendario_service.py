@@ -0,0 +1,409 @@
+"""
+services/calendario_service.py
+Calendário de fins de semana, feriados e pontos facultativos por localidade
+
+Localidades são hierárquicas: 'BR', 'BR/SP', 'BR/SP/Campinas'. Os feriados
+nacionais (fixos e móveis, calculados pela Páscoa) valem para todas; os
+cadastrados em feriados_locais valem para a localidade e as que estão abaixo.
+
+Cada ano de uma localidade é montado uma vez em um mapa compacto de 366 bytes
+(um byte por dia, tipos combinados em bits) e guardado em memória. Calendario
+junta os anos de um período em um único vetor indexado por dias desde
+1970-01-01, a mesma codificação de registros_jornada.data, então consultar o
+tipo de um dia, ou de um array numpy de dias, é uma indexação direta.
+
+Para SQL, a tabela calendario guarda os dias não úteis de cada localidade e
+pode ser juntada com registros_jornada.data:
+
+    SELECT r.*, COALESCE(c.tipo, 0) AS tipo_dia
+    FROM registros_jornada r
+    LEFT JOIN calendario c ON c.localidade = 'BR/SP' AND c.data = r.data
+
+    python -m services.calendario_service --gerar 2024 2026
+    python -m services.calendario_service --listar BR/SP/Campinas --ano 2025
+    python -m services.calendario_service --adicionar BR/SP "Revolução Constitucionalista" --data 09/07 --tipo estadual
+"""
+import threading
+from datetime import date, timedelta
+from sqlalchemy import delete, func, insert, select
+from models.calendario import Calendario, FeriadoLocal
+from models.empresa import Empresa
+
+# numpy é opcional; sem ele, as consultas em lote devolvem listas
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Tipos de dia (bits; um dia pode ter mais de um)
+SABADO = 1
+DOMINGO = 2
+FERIADO_NACIONAL = 4
+FERIADO_ESTADUAL = 8
+FERIADO_MUNICIPAL = 16
+PONTO_FACULTATIVO = 32
+
+FIM_DE_SEMANA = SABADO | DOMINGO
+FERIADO = FERIADO_NACIONAL | FERIADO_ESTADUAL | FERIADO_MUNICIPAL
+# Repouso remunerado: horas trabalhadas nesses dias são pagas em dobro
+DESCANSO = DOMINGO | FERIADO
+
+TIPOS_LOCAIS = {
+    'estadual': FERIADO_ESTADUAL,
+    'municipal': FERIADO_MUNICIPAL,
+    'facultativo': PONTO_FACULTATIVO,
+}
+
+LOCALIDADE_PADRAO = 'BR'
+
+# (mês, dia, descrição, primeiro ano em que vale)
+FERIADOS_NACIONAIS = [
+    (1, 1, "Confraternização Universal", None),
+    (4, 21, "Tiradentes", None),
+    (5, 1, "Dia do Trabalho", None),
+    (9, 7, "Independência do Brasil", None),
+    (10, 12, "Nossa Senhora Aparecida", None),
+    (11, 2, "Finados", None),
+    (11, 15, "Proclamação da República", None),
+    (11, 20, "Dia Nacional de Zumbi e da Consciência Negra", 2024),
+    (12, 25, "Natal", None),
+]
+
+# (dias após a Páscoa, descrição, tipo); Carnaval e Corpus Christi são
+# feriados só onde lei local determinar (cadastrar em feriados_locais)
+MOVEIS_NACIONAIS = [
+    (-48, "Carnaval (segunda-feira)", PONTO_FACULTATIVO),
+    (-47, "Carnaval", PONTO_FACULTATIVO),
+    (-2, "Sexta-feira Santa", FERIADO_NACIONAL),
+    (60, "Corpus Christi", PONTO_FACULTATIVO),
+]
+
+_EPOCA = date(1970, 1, 1)
+
+
+def pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return date(ano, mes, dia)
+
+
+def normalizar_localidade(localidade):
+    """'sp/campinas' -> 'BR/SP/Campinas'; vazio -> 'BR'"""
+    partes = [p.strip() for p in (localidade or '').split('/') if p.strip()]
+    if not partes or partes[0].upper() != LOCALIDADE_PADRAO:
+        partes.insert(0, LOCALIDADE_PADRAO)
+    partes[0] = LOCALIDADE_PADRAO
+    if len(partes) > 1:
+        partes[1] = partes[1].upper()
+    return '/'.join(partes)
+
+
+def localidades_acima(localidade):
+    """'BR/SP/Campinas' -> ['BR', 'BR/SP', 'BR/SP/Campinas']"""
+    partes = normalizar_localidade(localidade).split('/')
+    return ['/'.join(partes[:i]) for i in range(1, len(partes) + 1)]
+
+
+def dias_desde_epoca(data):
+    return (data - _EPOCA).days
+
+
+def montar_ano(ano, localidade, feriados_locais=()):
+    """
+    Mapa dos dias do ano da localidade
+
+    Args:
+        feriados_locais: tuplas (localidade, descricao, mes, dia, dias_apos_pascoa, tipo)
+
+    Returns:
+        tuple: (bytearray com o tipo de cada dia do ano, dict índice do dia -> descrição)
+    """
+    primeiro = date(ano, 1, 1)
+    total = (date(ano + 1, 1, 1) - primeiro).days
+    tipos = bytearray(total)
+    descricoes = {}
+
+    dia_semana = primeiro.weekday()
+    for i in range(total):
+        semana = (dia_semana + i) % 7
+        if semana == 5:
+            tipos[i] = SABADO
+        elif semana == 6:
+            tipos[i] = DOMINGO
+
+    def marcar(data, tipo, descricao):
+        i = (data - primeiro).days
+        tipos[i] |= tipo
+        if i not in descricoes:
+            descricoes[i] = descricao
+        elif descricao not in descricoes[i]:
+            descricoes[i] = f"{descricoes[i]}; {descricao}"
+
+    domingo_pascoa = pascoa(ano)
+    for mes, dia, descricao, desde in FERIADOS_NACIONAIS:
+        if desde is None or ano >= desde:
+            marcar(date(ano, mes, dia), FERIADO_NACIONAL, descricao)
+    for dias, descricao, tipo in MOVEIS_NACIONAIS:
+        marcar(domingo_pascoa + timedelta(days=dias), tipo, descricao)
+
+    acima = set(localidades_acima(localidade))
+    for local, descricao, mes, dia, dias_apos_pascoa, tipo in feriados_locais:
+        if normalizar_localidade(local) not in acima:
+            continue
+        if dias_apos_pascoa is not None:
+            marcar(domingo_pascoa + timedelta(days=dias_apos_pascoa), tipo, descricao)
+        else:
+            try:
+                marcar(date(ano, mes, dia), tipo, descricao)
+            except ValueError:
+                # 29/02 em ano não bissexto
+                continue
+
+    return tipos, descricoes
+
+
+class CalendarioPeriodo:
+    """Tipos de dia de uma localidade em um intervalo de anos, indexados por dias desde 1970"""
+
+    def __init__(self, localidade, ano_inicio, anos):
+        self.localidade = localidade
+        self.ano_inicio = ano_inicio
+        self.ano_fim = ano_inicio + len(anos) - 1
+        self.base = dias_desde_epoca(date(ano_inicio, 1, 1))
+        self.tipos = bytes().join(bytes(tipos) for tipos, _ in anos)
+        self._tipos = np.frombuffer(self.tipos, dtype=np.uint8) if np is not None else None
+        self._descricoes = {}
+        deslocamento = 0
+        for tipos, descricoes in anos:
+            for i, texto in descricoes.items():
+                self._descricoes[deslocamento + i] = texto
+            deslocamento += len(tipos)
+
+    def _indice(self, dia):
+        if isinstance(dia, date):
+            dia = dias_desde_epoca(dia)
+        indice = dia - self.base
+        if not 0 <= indice < len(self.tipos):
+            raise IndexError(f"dia fora do calendário {self.ano_inicio}-{self.ano_fim}")
+        return indice
+
+    def tipo(self, dia):
+        """Bits do dia (date ou dias desde 1970)"""
+        return self.tipos[self._indice(dia)]
+
+    def descricao(self, dia):
+        return self._descricoes.get(self._indice(dia))
+
+    def dia_util(self, dia):
+        return not self.tipo(dia) & (FIM_DE_SEMANA | FERIADO)
+
+    def tipos_lote(self, dias):
+        """Tipos de vários dias (dias desde 1970) de uma vez"""
+        if self._tipos is None:
+            return [self.tipos[d - self.base] for d in dias]
+        return self._tipos[np.asarray(dias, dtype=np.int64) - self.base]
+
+    def descanso_lote(self, dias):
+        """True para domingos e feriados"""
+        tipos = self.tipos_lote(dias)
+        if self._tipos is None:
+            return [bool(t & DESCANSO) for t in tipos]
+        return (tipos & DESCANSO) != 0
+
+
+# Anos já montados (localidade, ano) -> (tipos, descricoes) e feriados locais cadastrados
+_anos = {}
+_feriados_locais = None
+_lock = threading.Lock()
+
+
+class CalendarioService:
+
+    @staticmethod
+    def feriados_locais(conn):
+        """Feriados cadastrados, como tuplas para montar_ano (lidos uma vez)"""
+        global _feriados_locais
+        with _lock:
+            if _feriados_locais is None:
+                _feriados_locais = [
+                    tuple(linha) for linha in conn.execute(select(
+                        FeriadoLocal.localidade, FeriadoLocal.descricao, FeriadoLocal.mes,
+                        FeriadoLocal.dia, FeriadoLocal.dias_apos_pascoa, FeriadoLocal.tipo
+                    ))
+                ]
+            return _feriados_locais
+
+    @staticmethod
+    def ano(conn, localidade, ano):
+        localidade = normalizar_localidade(localidade)
+        chave = (localidade, ano)
+        mapa = _anos.get(chave)
+        if mapa is None:
+            mapa = montar_ano(ano, localidade, CalendarioService.feriados_locais(conn))
+            with _lock:
+                _anos[chave] = mapa
+        return mapa
+
+    @staticmethod
+    def calendario(conn, localidade, ano_inicio, ano_fim=None):
+        """CalendarioPeriodo da localidade de ano_inicio a ano_fim (inclusive)"""
+        localidade = normalizar_localidade(localidade)
+        anos = [CalendarioService.ano(conn, localidade, a) for a in range(ano_inicio, (ano_fim or ano_inicio) + 1)]
+        return CalendarioPeriodo(localidade, ano_inicio, anos)
+
+    @staticmethod
+    def invalidar():
+        """Descarta os anos montados (chamar depois de alterar feriados_locais)"""
+        global _feriados_locais
+        with _lock:
+            _anos.clear()
+            _feriados_locais = None
+
+    @staticmethod
+    def adicionar_feriado(db, localidade, descricao, tipo, mes=None, dia=None, dias_apos_pascoa=None):
+        """
+        Cadastra um feriado local (quem chama faz o commit e depois materializar)
+
+        Args:
+            tipo: FERIADO_ESTADUAL, FERIADO_MUNICIPAL ou PONTO_FACULTATIVO
+        """
+        if dias_apos_pascoa is None and (mes is None or dia is None):
+            raise ValueError("informe mes/dia ou dias_apos_pascoa")
+        feriado = FeriadoLocal(
+            localidade=normalizar_localidade(localidade), descricao=descricao, mes=mes, dia=dia,
+            dias_apos_pascoa=dias_apos_pascoa, tipo=tipo
+        )
+        db.add(feriado)
+        CalendarioService.invalidar()
+        return feriado
+
+    @staticmethod
+    def localidades(conn):
+        """'BR', as localidades das empresas e as dos feriados cadastrados"""
+        encontradas = {LOCALIDADE_PADRAO}
+        for (localidade,) in conn.execute(select(Empresa.localidade).distinct()):
+            encontradas.add(normalizar_localidade(localidade))
+        for (localidade,) in conn.execute(select(FeriadoLocal.localidade).distinct()):
+            encontradas.add(normalizar_localidade(localidade))
+        return sorted(encontradas)
+
+    @staticmethod
+    def materializar(conn, ano_inicio, ano_fim, localidades=None):
+        """
+        Regrava a tabela calendario dos anos e localidades (padrão: todas em uso)
+
+        Returns:
+            int: linhas gravadas
+        """
+        gravadas = 0
+        for localidade in localidades or CalendarioService.localidades(conn):
+            localidade = normalizar_localidade(localidade)
+            for ano in range(ano_inicio, ano_fim + 1):
+                tipos, descricoes = CalendarioService.ano(conn, localidade, ano)
+                primeiro = date(ano, 1, 1)
+                conn.execute(delete(Calendario).where(
+                    Calendario.localidade == localidade,
+                    Calendario.data.between(primeiro, date(ano, 12, 31))
+                ))
+                linhas = [
+                    {'localidade': localidade, 'data': primeiro + timedelta(days=i),
+                     'tipo': tipo, 'descricao': descricoes.get(i)}
+                    for i, tipo in enumerate(tipos) if tipo
+                ]
+                conn.execute(insert(Calendario), linhas)
+                gravadas += len(linhas)
+        return gravadas
+
+    @staticmethod
+    def garantir(conn, ano_inicio, ano_fim, localidades=None):
+        """Materializa só os anos/localidades que ainda não estão na tabela calendario"""
+        gravadas = 0
+        for localidade in localidades or CalendarioService.localidades(conn):
+            localidade = normalizar_localidade(localidade)
+            for ano in range(ano_inicio, ano_fim + 1):
+                # Todo ano tem fins de semana: ano sem linhas não foi gerado
+                existe = conn.execute(select(func.count()).select_from(Calendario).where(
+                    Calendario.localidade == localidade,
+                    Calendario.data.between(date(ano, 1, 1), date(ano, 12, 31))
+                )).scalar()
+                if not existe:
+                    gravadas += CalendarioService.materializar(conn, ano, ano, [localidade])
+        return gravadas
+
+    @staticmethod
+    def tipo_dia(coluna_data, localidade):
+        """Expressão SQL com os bits do dia (0 = dia útil) para usar em consultas"""
+        return func.coalesce(
+            select(Calendario.tipo).where(
+                Calendario.localidade == localidade,
+                Calendario.data == coluna_data
+            ).scalar_subquery(),
+            0
+        )
+
+
+def _data_mes_dia(texto):
+    dia, mes = texto.split('/')
+    return int(mes), int(dia)
+
+
+if __name__ == "__main__":
+    import argparse
+    from sqlalchemy.orm import Session
+    from models.database import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Calendário de feriados por localidade")
+    parser.add_argument('--gerar', nargs=2, type=int, metavar=('ANO_INICIO', 'ANO_FIM'),
+                        help="regrava a tabela calendario desses anos para todas as localidades em uso")
+    parser.add_argument('--listar', metavar='LOCALIDADE', help="lista os dias não úteis da localidade")
+    parser.add_argument('--ano', type=int, default=date.today().year)
+    parser.add_argument('--adicionar', nargs=2, metavar=('LOCALIDADE', 'DESCRICAO'),
+                        help="cadastra um feriado local (use --data ou --pascoa)")
+    parser.add_argument('--data', type=_data_mes_dia, help="DD/MM do feriado fixo")
+    parser.add_argument('--pascoa', type=int, help="dias após a Páscoa do feriado móvel (ex.: 60)")
+    parser.add_argument('--tipo', choices=TIPOS_LOCAIS, default='municipal')
+    args = parser.parse_args()
+
+    init_db()
+
+    if args.adicionar:
+        if not args.data and args.pascoa is None:
+            parser.error("--adicionar exige --data DD/MM ou --pascoa N")
+        localidade, descricao = args.adicionar
+        mes, dia = args.data or (None, None)
+        with Session(engine) as db:
+            CalendarioService.adicionar_feriado(db, localidade, descricao, TIPOS_LOCAIS[args.tipo],
+                                                mes=mes, dia=dia, dias_apos_pascoa=args.pascoa)
+            db.commit()
+        # Anos já gerados dessa localidade (e das que estão abaixo) passam a incluir o feriado
+        with engine.begin() as conn:
+            anos = conn.execute(select(func.min(Calendario.data), func.max(Calendario.data))).one()
+            if anos[0]:
+                CalendarioService.materializar(conn, anos[0].year, anos[1].year)
+        print(f"✅ Feriado '{descricao}' cadastrado em {normalizar_localidade(localidade)}")
+
+    if args.gerar:
+        with engine.begin() as conn:
+            linhas = CalendarioService.materializar(conn, *args.gerar)
+        print(f"✅ {linhas} dia(s) não úteis gravados em calendario ({args.gerar[0]}-{args.gerar[1]})")
+
+    if args.listar:
+        with engine.connect() as conn:
+            tipos, descricoes = CalendarioService.ano(conn, args.listar, args.ano)
+        nomes = [(FERIADO_NACIONAL, 'nacional'), (FERIADO_ESTADUAL, 'estadual'),
+                 (FERIADO_MUNICIPAL, 'municipal'), (PONTO_FACULTATIVO, 'facultativo')]
+        print(f"📅 {normalizar_localidade(args.listar)} em {args.ano}")
+        for i, texto in sorted(descricoes.items()):
+            data = date(args.ano, 1, 1) + timedelta(days=i)
+            marcas = ', '.join(n for bit, n in nomes if tipos[i] & bit)
+            print(f"   {data:%d/%m} ({data:%a})  {texto} [{marcas}]")
+        print(f"   {sum(1 for t in tipos if not t)} dia(s) útil(eis)")
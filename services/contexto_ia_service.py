@@ -0,0 +1,163 @@
+"""
+services/contexto_ia_service.py
+Contexto de dados enviado ao Gemini pelo chat, com cache e envio por diferença
+
+O contexto (empresas, funcionários e totais dos últimos 30 dias) é montado
+com três consultas e guardado em memória. Qualquer INSERT/UPDATE/DELETE nas
+tabelas de origem, feito pelo ORM ou por SQL direto no engine, muda a versão
+dos dados e força a remontagem na próxima pergunta.
+
+A serialização é compacta: JSON sem espaços, cada tabela como colunas + linhas
+e funcionários referenciando a empresa pelo id.
+"""
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models.database import engine
+from services.diretorio_service import DiretorioService
+from services.resumo_service import ResumoService
+
+# Dias cobertos pelo resumo enviado à IA
+DIAS_RESUMO = 30
+
+# Escritas nessas tabelas invalidam o contexto
+_ESCRITA_RELEVANTE = re.compile(
+    r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b.*\b(empresas|funcionarios|registros_jornada)\b',
+    re.IGNORECASE | re.DOTALL
+)
+
+_lock = threading.Lock()
+_versao_dados = 0
+
+def versao_dados():
+    """Contador que muda a cada escrita nas tabelas do contexto"""
+    return _versao_dados
+
+def invalidar_contexto():
+    """Marca o contexto como desatualizado"""
+    global _versao_dados
+    with _lock:
+        _versao_dados += 1
+
+def registrar_invalidacao(bind):
+    """Escuta as escritas do engine e invalida o contexto no commit"""
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def _ao_executar(conn, cursor, statement, parameters, context, executemany):
+        if _ESCRITA_RELEVANTE.match(statement):
+            conn.info['contexto_ia_alterado'] = True
+            invalidar_contexto()
+
+    @event.listens_for(bind, "commit")
+    def _ao_commit(conn):
+        # Invalida de novo no commit: um contexto remontado entre a escrita e o
+        # commit pode ter lido os dados antigos
+        if conn.info.pop('contexto_ia_alterado', False):
+            invalidar_contexto()
+
+    @event.listens_for(bind, "rollback")
+    def _ao_rollback(conn):
+        conn.info.pop('contexto_ia_alterado', None)
+
+registrar_invalidacao(engine)
+
+
+class ContextoIA:
+    """Cache do contexto montado para o chat"""
+
+    def __init__(self):
+        self._versao = None
+        self._dia = None
+        self._contexto = None
+        self._lock = threading.Lock()
+
+    def obter(self, db):
+        """
+        Retorna o contexto atual, remontando só se os dados ou o dia mudaram
+
+        Returns:
+            dict: {'hoje', 'empresas', 'funcionarios', 'resumo_ultimos_30_dias'};
+                  o mesmo objeto é devolvido enquanto nada mudar
+        """
+        hoje = datetime.now().date()
+        with self._lock:
+            versao = versao_dados()
+            if self._contexto is None or versao != self._versao or hoje != self._dia:
+                self._contexto = ContextoIA.montar(db, hoje)
+                self._versao = versao
+                self._dia = hoje
+            return self._contexto
+
+    @staticmethod
+    def montar(db, hoje):
+        """Consulta o banco e monta o contexto (sem carregamento preguiçoso)"""
+        empresas = DiretorioService.listar_empresas(db)
+        funcionarios = DiretorioService.listar_funcionarios(db)
+
+        resumo = ResumoService.consultar_periodo(
+            db, hoje - timedelta(days=DIAS_RESUMO), hoje, ordenar_por='funcionario_id'
+        )
+
+        return {
+            'hoje': hoje.strftime('%d/%m/%Y'),
+            'empresas': {
+                'colunas': ['id', 'nome', 'cnpj'],
+                'linhas': [[e.id, e.nome, e.cnpj] for e in empresas]
+            },
+            'funcionarios': {
+                'colunas': ['id', 'nome', 'cargo', 'empresa_id', 'carga_horaria'],
+                'linhas': [
+                    [f.id, f.nome, f.cargo, f.empresa_id, f.carga_horaria_diaria]
+                    for f in funcionarios
+                ]
+            },
+            'resumo_ultimos_30_dias': {
+                'colunas': ['funcionario_id', 'horas_extras', 'horas_faltantes', 'num_registros'],
+                'linhas': [
+                    [r.funcionario_id,
+                     round(float(r.total_extras or 0), 2),
+                     round(float(r.total_faltantes or 0), 2),
+                     r.num_registros]
+                    for r in resumo
+                ]
+            }
+        }
+
+    @staticmethod
+    def diferenca(anterior, atual):
+        """
+        O que mudou entre dois contextos, por tabela (linhas pela 1ª coluna)
+
+        Returns:
+            dict: {'hoje'?, tabela: {'colunas', 'alterados', 'removidos'}};
+                  vazio se nada mudou
+        """
+        delta = {}
+        if anterior.get('hoje') != atual.get('hoje'):
+            delta['hoje'] = atual['hoje']
+
+        for tabela, dados in atual.items():
+            if not isinstance(dados, dict):
+                continue
+            antes = {linha[0]: linha for linha in anterior.get(tabela, {}).get('linhas', [])}
+            agora = {linha[0]: linha for linha in dados['linhas']}
+
+            alterados = [linha for chave, linha in agora.items() if antes.get(chave) != linha]
+            removidos = [chave for chave in antes if chave not in agora]
+            if alterados or removidos:
+                delta[tabela] = {'colunas': dados['colunas'], 'alterados': alterados}
+                if removidos:
+                    delta[tabela]['removidos'] = removidos
+
+        return delta
+
+    @staticmethod
+    def serializar(dados):
+        """JSON compacto (sem indentação nem espaços)"""
+        return json.dumps(dados, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+# Cache compartilhado pelas telas de chat
+contexto_ia = ContextoIA()
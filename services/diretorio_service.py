@@ -0,0 +1,78 @@
+"""
+services/diretorio_service.py
+Listas de funcionários e empresas para combos, chat e contexto da IA
+
+Uma única consulta com JOIN traz o funcionário e o nome da empresa, em vez de
+carregar Funcionario e acessar func.empresa linha a linha (um SELECT extra por
+funcionário). As linhas retornadas são Rows leves (acesso por atributo), não
+objetos do ORM, e podem ser usadas depois que a sessão for fechada.
+"""
+from sqlalchemy import func, select
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+
+class DiretorioService:
+
+    @staticmethod
+    def consulta_funcionarios(empresa_id=None):
+        """SELECT de funcionários com o nome da empresa (sem executar)"""
+        consulta = select(
+            Funcionario.id,
+            Funcionario.nome,
+            Funcionario.cargo,
+            Funcionario.carga_horaria_diaria,
+            Funcionario.valor_hora,
+            Funcionario.pis,
+            Funcionario.cpf,
+            Funcionario.empresa_id,
+            Empresa.nome.label('empresa_nome')
+        ).outerjoin(
+            Empresa, Funcionario.empresa_id == Empresa.id
+        ).order_by(
+            Funcionario.nome, Funcionario.id
+        )
+
+        if empresa_id:
+            consulta = consulta.where(Funcionario.empresa_id == empresa_id)
+
+        return consulta
+
+    @staticmethod
+    def listar_funcionarios(db, empresa_id=None):
+        """
+        Funcionários (opcionalmente de uma empresa), ordenados por nome
+
+        Returns:
+            list: linhas com id, nome, cargo, carga_horaria_diaria, valor_hora,
+                  pis, cpf, empresa_id, empresa_nome (None se sem empresa)
+        """
+        return db.execute(DiretorioService.consulta_funcionarios(empresa_id)).all()
+
+    @staticmethod
+    def listar_empresas(db, contar_funcionarios=False):
+        """
+        Empresas ordenadas por nome
+
+        Args:
+            contar_funcionarios: inclui a coluna num_funcionarios (mesma consulta)
+
+        Returns:
+            list: linhas com id, nome, cnpj[, num_funcionarios]
+        """
+        colunas = [Empresa.id, Empresa.nome, Empresa.cnpj]
+
+        if not contar_funcionarios:
+            return db.execute(select(*colunas).order_by(Empresa.nome, Empresa.id)).all()
+
+        return db.execute(
+            select(
+                *colunas,
+                func.count(Funcionario.id).label('num_funcionarios')
+            ).outerjoin(
+                Funcionario, Funcionario.empresa_id == Empresa.id
+            ).group_by(
+                *colunas
+            ).order_by(
+                Empresa.nome, Empresa.id
+            )
+        ).all()
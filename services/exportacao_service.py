@@ -0,0 +1,304 @@
+"""
+services/exportacao_service.py
+Exportação do relatório de horas extras para CSV, XLSX e PDF
+
+As linhas são lidas do banco em partes (stream_results/yield_per) e escritas
+no arquivo à medida que chegam, então o uso de memória não depende do número
+de funcionários ou de registros do período. Exceção: o reportlab mantém as
+páginas já desenhadas até salvar o PDF, então o PDF cresce com o número de
+páginas; para arquivos muito grandes prefira CSV ou XLSX.
+
+openpyxl (XLSX) e reportlab (PDF) são opcionais; CSV funciona sempre.
+"""
+import csv
+import os
+from sqlalchemy import select
+from models.database import engine
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.registro_jornada import RegistroJornada
+from services.calculo_service import CalculoService
+from services.resumo_service import SEM_EMPRESA, ResumoService
+
+# Bibliotecas opcionais para XLSX e PDF
+try:
+    from openpyxl import Workbook
+except Exception:
+    Workbook = None
+
+try:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas as pdf_canvas
+except Exception:
+    pdf_canvas = None
+
+# Linhas lidas do banco por vez
+TAMANHO_PARTE = 1000
+
+FORMATOS = ('csv', 'xlsx', 'pdf')
+
+COLUNAS_RESUMO = ("ID", "Funcionário", "Empresa", "Cargo", "H.Trabalhadas",
+                  "H.Extra", "H.Falta", "Registros", "Valor")
+COLUNAS_DETALHE = ("ID", "Funcionário", "Empresa", "Data", "Entrada", "Saída",
+                   "Intervalo", "H.Trabalhadas", "H.Extra", "H.Falta")
+
+
+class ErroExportacao(Exception):
+    """Formato desconhecido ou biblioteca do formato não instalada"""
+
+
+class _ExportacaoCancelada(Exception):
+    """Interrompe o escritor no meio do arquivo quando a exportação é cancelada"""
+
+
+class ExportacaoService:
+
+    # ------------------------------------------------------------- consultas
+
+    @staticmethod
+    def linhas_resumo(conn, data_inicio, data_fim, empresa_id=None, funcionario_id=None):
+        """Gera as linhas do relatório (uma por funcionário), já formatadas"""
+        consulta = ResumoService.consulta_periodo(
+            data_inicio, data_fim, empresa_id, funcionario_id
+        ).order_by(Empresa.nome, Funcionario.nome, Funcionario.id)
+
+        resultado = conn.execution_options(
+            stream_results=True, yield_per=TAMANHO_PARTE
+        ).execute(consulta)
+
+        for r in resultado:
+            h_extra = r.total_extras or 0
+            yield (
+                r.funcionario_id,
+                r.nome,
+                r.empresa_nome or "Sem empresa",
+                r.cargo,
+                round(r.total_trabalhadas or 0, 2),
+                round(h_extra, 2),
+                round(r.total_faltantes or 0, 2),
+                r.num_registros,
+                round(CalculoService.calcular_valor_horas_extras(h_extra, r.valor_hora), 2)
+            )
+
+    @staticmethod
+    def linhas_detalhe(conn, data_inicio, data_fim, empresa_id=None, funcionario_id=None):
+        """Gera os registros diários do período, ordenados por funcionário e data"""
+        consulta = select(
+            Funcionario.id,
+            Funcionario.nome,
+            Empresa.nome,
+            RegistroJornada.data,
+            RegistroJornada.hora_entrada,
+            RegistroJornada.hora_saida,
+            RegistroJornada.intervalo,
+            RegistroJornada.horas_trabalhadas,
+            RegistroJornada.horas_extras,
+            RegistroJornada.horas_faltantes
+        ).join(
+            Funcionario, RegistroJornada.funcionario_id == Funcionario.id
+        ).outerjoin(
+            Empresa, Funcionario.empresa_id == Empresa.id
+        ).where(
+            RegistroJornada.data.between(data_inicio, data_fim)
+        )
+
+        if empresa_id == SEM_EMPRESA:
+            consulta = consulta.where(Funcionario.empresa_id.is_(None))
+        elif empresa_id:
+            consulta = consulta.where(Funcionario.empresa_id == empresa_id)
+        if funcionario_id:
+            consulta = consulta.where(RegistroJornada.funcionario_id == funcionario_id)
+
+        consulta = consulta.order_by(Funcionario.nome, Funcionario.id, RegistroJornada.data)
+
+        resultado = conn.execution_options(
+            stream_results=True, yield_per=TAMANHO_PARTE
+        ).execute(consulta)
+
+        for (func_id, nome, empresa, data, entrada, saida, intervalo,
+             trabalhadas, extras, faltantes) in resultado:
+            yield (
+                func_id,
+                nome,
+                empresa or "Sem empresa",
+                data.strftime('%d/%m/%Y') if data else "",
+                entrada.strftime('%H:%M') if entrada else "",
+                saida.strftime('%H:%M') if saida else "",
+                intervalo or 0,
+                trabalhadas or 0,
+                extras or 0,
+                faltantes or 0
+            )
+
+    # -------------------------------------------------------------- escritores
+
+    @staticmethod
+    def _escrever_csv(caminho, secoes):
+        # utf-8-sig e ';' para o Excel em português abrir sem assistente
+        with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+            escritor = csv.writer(arquivo, delimiter=';')
+            for i, (_, titulo, colunas, linhas) in enumerate(secoes):
+                if i:
+                    escritor.writerow([])
+                if len(secoes) > 1:
+                    escritor.writerow([titulo])
+                escritor.writerow(colunas)
+                for linha in linhas:
+                    escritor.writerow(
+                        [str(v).replace('.', ',') if isinstance(v, float) else v for v in linha]
+                    )
+
+    @staticmethod
+    def _escrever_xlsx(caminho, secoes):
+        if Workbook is None:
+            raise ErroExportacao("Exportação XLSX requer o pacote openpyxl (pip install openpyxl)")
+
+        # write_only grava cada linha direto no arquivo temporário da planilha
+        livro = Workbook(write_only=True)
+        for aba, _, colunas, linhas in secoes:
+            planilha = livro.create_sheet(title=aba)
+            planilha.append(list(colunas))
+            for linha in linhas:
+                planilha.append(list(linha))
+        livro.save(caminho)
+
+    @staticmethod
+    def _escrever_pdf(caminho, secoes):
+        if pdf_canvas is None:
+            raise ErroExportacao("Exportação PDF requer o pacote reportlab (pip install reportlab)")
+
+        largura, altura = landscape(A4)
+        margem, altura_linha = 30, 14
+        pdf = pdf_canvas.Canvas(caminho, pagesize=(largura, altura))
+
+        for _, titulo, colunas, linhas in secoes:
+            passo = (largura - 2 * margem) / len(colunas)
+
+            def cabecalho():
+                pdf.setFont('Helvetica-Bold', 12)
+                pdf.drawString(margem, altura - margem, titulo)
+                pdf.setFont('Helvetica-Bold', 8)
+                y = altura - margem - 2 * altura_linha
+                for i, coluna in enumerate(colunas):
+                    pdf.drawString(margem + i * passo, y, coluna)
+                pdf.setFont('Helvetica', 8)
+                return y - altura_linha
+
+            # Cada página é finalizada (showPage) assim que enche
+            y = cabecalho()
+            for linha in linhas:
+                if y < margem:
+                    pdf.showPage()
+                    y = cabecalho()
+                for i, valor in enumerate(linha):
+                    texto = f"{valor:.2f}" if isinstance(valor, float) else str(valor)
+                    pdf.drawString(margem + i * passo, y, texto[:28])
+                y -= altura_linha
+            pdf.showPage()
+
+        pdf.save()
+
+    # ------------------------------------------------------------------ API
+
+    @staticmethod
+    def formato_do_caminho(caminho):
+        """Deduz o formato pela extensão do arquivo"""
+        extensao = os.path.splitext(caminho)[1].lower().lstrip('.')
+        if extensao not in FORMATOS:
+            raise ErroExportacao(f"Formato não suportado: '{extensao}'. Use {', '.join(FORMATOS)}")
+        return extensao
+
+    @staticmethod
+    def exportar(caminho, data_inicio, data_fim, empresa_id=None, funcionario_id=None,
+                 detalhe=False, formato=None, progresso=None, cancelado=None, bind=None):
+        """
+        Exporta o relatório do período para arquivo
+
+        Args:
+            caminho: arquivo de destino
+            detalhe: inclui os registros diários além dos totais por funcionário
+            formato: 'csv', 'xlsx' ou 'pdf' (padrão: extensão do caminho)
+            progresso: callable(linhas_escritas) chamado a cada TAMANHO_PARTE linhas
+            cancelado: callable() -> bool; True interrompe e remove o arquivo parcial
+            bind: engine (padrão: engine da aplicação)
+
+        Returns:
+            dict: {linhas, cancelado}
+        """
+        formato = formato or ExportacaoService.formato_do_caminho(caminho)
+        escritor = {
+            'csv': ExportacaoService._escrever_csv,
+            'xlsx': ExportacaoService._escrever_xlsx,
+            'pdf': ExportacaoService._escrever_pdf,
+        }.get(formato)
+        if escritor is None:
+            raise ErroExportacao(f"Formato não suportado: '{formato}'")
+
+        resultado = {'linhas': 0, 'cancelado': False}
+
+        def contar(linhas):
+            # Conta linhas escritas, avisa progresso e verifica cancelamento
+            for linha in linhas:
+                yield linha
+                resultado['linhas'] += 1
+                if resultado['linhas'] % TAMANHO_PARTE == 0:
+                    if cancelado and cancelado():
+                        raise _ExportacaoCancelada()
+                    if progresso:
+                        progresso(resultado['linhas'])
+
+        filtros = (data_inicio, data_fim, empresa_id, funcionario_id)
+        periodo = f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
+
+        with (bind or engine).connect() as conn:
+            secoes = [(
+                "Resumo",
+                f"Horas extras {periodo}",
+                COLUNAS_RESUMO,
+                contar(ExportacaoService.linhas_resumo(conn, *filtros))
+            )]
+            if detalhe:
+                # Começa a ser lida só depois que a seção de totais terminou
+                secoes.append((
+                    "Registros",
+                    f"Registros {periodo}",
+                    COLUNAS_DETALHE,
+                    contar(ExportacaoService.linhas_detalhe(conn, *filtros))
+                ))
+            try:
+                escritor(caminho, secoes)
+            except _ExportacaoCancelada:
+                resultado['cancelado'] = True
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+        if progresso and not resultado['cancelado']:
+            progresso(resultado['linhas'])
+        return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="Exporta o relatório de horas extras")
+    parser.add_argument('arquivo', help="destino (.csv, .xlsx ou .pdf)")
+    parser.add_argument('inicio', help="data inicial (DD/MM/AAAA)")
+    parser.add_argument('fim', help="data final (DD/MM/AAAA)")
+    parser.add_argument('--empresa', type=int, help="ID da empresa (0: funcionários sem empresa)")
+    parser.add_argument('--funcionario', type=int, help="ID do funcionário")
+    parser.add_argument('--detalhe', action='store_true', help="inclui os registros diários")
+    args = parser.parse_args()
+
+    init_db()
+    r = ExportacaoService.exportar(
+        args.arquivo,
+        datetime.strptime(args.inicio, '%d/%m/%Y').date(),
+        datetime.strptime(args.fim, '%d/%m/%Y').date(),
+        empresa_id=args.empresa,
+        funcionario_id=args.funcionario,
+        detalhe=args.detalhe,
+        progresso=lambda n: print(f"📤 {n} linhas escritas...")
+    )
+    print(f"✅ Exportação concluída: {r['linhas']} linhas em {args.arquivo}")
@@ -0,0 +1,299 @@
+"""
+services/fechamento_service.py
+Fechamento mensal em paralelo: horas, faltas e valor das extras de todos os
+funcionários, gravados em fechamentos_mensais
+
+Os funcionários são divididos em faixas de id (ou por empresa) e cada parte é
+calculada em um processo separado, com sua própria conexão somente leitura.
+Cada processo lê os registros da competência, recalcula as horas pelas
+marcações (CalculoService.calcular_lote) para contar divergências e totaliza
+por funcionário; o processo principal junta as partes e grava tudo em uma
+única transação (refazer o fechamento substitui o anterior).
+
+    python -m services.fechamento_service --mes 11/2024 --processos 16
+    python -m services.fechamento_service --mes 11/2024 --particao empresa
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import quote
+from sqlalchemy import Integer, create_engine, delete, insert, select, type_coerce
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from models.database import engine
+from models.fechamento_mensal import FechamentoMensal
+from models.funcionario import Funcionario
+from models.registro_jornada import RegistroJornada
+from models.tipos import centesimos_para_horas, horas_para_centesimos
+from services.calculo_service import CalculoService
+from services.relatorio_service import RelatorioService
+
+PARTICOES = ('faixa', 'empresa')
+
+# Partes por processo: partes menores equilibram a carga quando uma faixa
+# de funcionários tem mais registros que as outras
+PARTES_POR_PROCESSO = 4
+
+# Diferença (em centésimos de hora) tolerada entre as horas gravadas e o recálculo
+TOLERANCIA_CENTESIMOS = 1
+
+# Conexão somente leitura do processo trabalhador (ver _iniciar_trabalhador)
+_conexao = None
+
+
+def url_somente_leitura(url):
+    """URL do mesmo banco aberto em modo somente leitura (só SQLite em arquivo)"""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return url
+    caminho = quote(os.path.abspath(url.database))
+    return make_url(f"sqlite:///file:{caminho}?mode=ro&uri=true")
+
+
+def _iniciar_trabalhador(url, novo_processo=True):
+    """Abre a conexão do processo (chamado uma vez por processo do pool)"""
+    global _conexao
+    if novo_processo:
+        # Processo criado por fork herda o pool do engine principal: descarta sem fechar
+        engine.dispose(close=False)
+
+    motor = create_engine(url_somente_leitura(url), poolclass=NullPool)
+    _conexao = motor.connect()
+    if motor.dialect.name == 'sqlite':
+        for pragma in ("query_only = 1", "cache_size = -64000", "mmap_size = 268435456",
+                       "busy_timeout = 5000"):
+            _conexao.exec_driver_sql(f"PRAGMA {pragma}")
+
+
+def _bruto(coluna):
+    """Valor inteiro gravado (minutos nos horários, centésimos nas horas), sem a conversão do tipo"""
+    return type_coerce(coluna, Integer)
+
+
+def _fechar_parte(data_inicio, data_fim, particao, chave):
+    """
+    Totais por funcionário de uma parte (executado no processo trabalhador)
+
+    Args:
+        particao: 'faixa' (chave = (primeiro_id, ultimo_id)) ou 'empresa' (chave = id ou None)
+
+    Returns:
+        tuple: (lista de dicts prontos para fechamentos_mensais, registros lidos)
+    """
+    r = RegistroJornada
+    consulta = select(
+        Funcionario.id,
+        Funcionario.empresa_id,
+        Funcionario.carga_horaria_diaria,
+        Funcionario.valor_hora,
+        _bruto(r.hora_entrada).label('entrada'),
+        _bruto(r.hora_saida).label('saida'),
+        _bruto(r.intervalo).label('intervalo'),
+        _bruto(r.horas_trabalhadas).label('trabalhadas'),
+        _bruto(r.horas_extras).label('extras'),
+        _bruto(r.horas_faltantes).label('faltantes')
+    ).outerjoin(
+        # Na condição do join: funcionário sem registros no mês entra zerado
+        r, (r.funcionario_id == Funcionario.id) & r.data.between(data_inicio, data_fim)
+    )
+    if particao == 'faixa':
+        consulta = consulta.where(Funcionario.id.between(*chave))
+    elif chave is None:
+        consulta = consulta.where(Funcionario.empresa_id.is_(None))
+    else:
+        consulta = consulta.where(Funcionario.empresa_id == chave)
+
+    linhas = _conexao.execute(consulta.order_by(Funcionario.id)).all()
+    _conexao.rollback()
+
+    registros = [l for l in linhas if l.entrada is not None]
+    recalculo = CalculoService.calcular_lote(
+        [l.entrada for l in registros],
+        [l.saida for l in registros],
+        [centesimos_para_horas(l.intervalo or 0) for l in registros],
+        [l.carga_horaria_diaria for l in registros]
+    )
+    divergentes = iter([
+        abs(horas_para_centesimos(trabalhadas) - (l.trabalhadas or 0)) > TOLERANCIA_CENTESIMOS
+        or abs(horas_para_centesimos(extras) - (l.extras or 0)) > TOLERANCIA_CENTESIMOS
+        or abs(horas_para_centesimos(faltantes) - (l.faltantes or 0)) > TOLERANCIA_CENTESIMOS
+        for l, trabalhadas, extras, faltantes in zip(
+            registros,
+            recalculo['horas_trabalhadas'],
+            recalculo['horas_extras'],
+            recalculo['horas_faltantes']
+        )
+    ])
+
+    totais = {}
+    for l in linhas:
+        t = totais.get(l.id)
+        if t is None:
+            t = totais[l.id] = [l.empresa_id, l.valor_hora, 0, 0, 0, 0, 0]
+        if l.entrada is None:
+            continue
+        t[2] += l.trabalhadas or 0
+        t[3] += l.extras or 0
+        t[4] += l.faltantes or 0
+        t[5] += 1
+        # Mesma ordem de `registros`
+        t[6] += next(divergentes)
+
+    resultado = []
+    for funcionario_id, (empresa_id, valor_hora, trabalhadas, extras, faltantes,
+                         num_registros, divergencias) in totais.items():
+        resultado.append({
+            'funcionario_id': funcionario_id,
+            'empresa_id': empresa_id,
+            # Somas em centésimos: HorasCentesimos grava de volta os mesmos inteiros
+            'horas_trabalhadas': centesimos_para_horas(trabalhadas),
+            'horas_extras': centesimos_para_horas(extras),
+            'horas_faltantes': centesimos_para_horas(faltantes),
+            'valor_hora': valor_hora,
+            # Mesmo valor dos relatórios
+            'valor_extras': CalculoService.calcular_valor_horas_extras(centesimos_para_horas(extras), valor_hora),
+            'num_registros': num_registros,
+            'divergencias': divergencias,
+        })
+    return resultado, len(registros)
+
+
+class FechamentoService:
+
+    @staticmethod
+    def dividir(conn, particao='faixa', partes=PARTES_POR_PROCESSO):
+        """
+        Chaves das partes do fechamento
+
+        Returns:
+            list: faixas (primeiro_id, ultimo_id) com o mesmo número de
+                  funcionários, ou ids de empresa (None = sem empresa)
+        """
+        if particao == 'empresa':
+            return list(conn.execute(
+                select(Funcionario.empresa_id).distinct().order_by(Funcionario.empresa_id)
+            ).scalars())
+
+        ids = list(conn.execute(select(Funcionario.id).order_by(Funcionario.id)).scalars())
+        if not ids:
+            return []
+        tamanho = -(-len(ids) // max(1, partes))
+        return [(ids[i], ids[min(i + tamanho, len(ids)) - 1]) for i in range(0, len(ids), tamanho)]
+
+    @staticmethod
+    def fechar_mes(ano, mes, processos=None, particao='faixa', progresso=None, bind=None):
+        """
+        Calcula e grava o fechamento da competência em fechamentos_mensais
+
+        Args:
+            processos: processos do pool (padrão: número de núcleos; 1 = sem pool)
+            particao: 'faixa' de ids de funcionário ou uma parte por 'empresa'
+            progresso: callable(partes_concluidas, total_partes)
+
+        Returns:
+            dict: ano, mes, funcionarios, registros, divergencias, total_extras,
+                  total_faltantes, total_valor, partes, processos, segundos
+        """
+        if particao not in PARTICOES:
+            raise ValueError(f"partição desconhecida: {particao}")
+        bind = bind or engine
+        processos = max(1, processos or os.cpu_count() or 1)
+        inicio = time.perf_counter()
+        data_inicio, data_fim = RelatorioService.mes(ano, mes)
+
+        with bind.connect() as conn:
+            chaves = FechamentoService.dividir(conn, particao, processos * PARTES_POR_PROCESSO)
+
+        linhas = []
+        registros = 0
+        if processos == 1:
+            _iniciar_trabalhador(bind.url, novo_processo=False)
+            try:
+                for i, chave in enumerate(chaves, 1):
+                    parte, lidos = _fechar_parte(data_inicio, data_fim, particao, chave)
+                    linhas += parte
+                    registros += lidos
+                    if progresso:
+                        progresso(i, len(chaves))
+            finally:
+                _conexao.close()
+        else:
+            url = bind.url.render_as_string(hide_password=False)
+            with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_trabalhador,
+                                     initargs=(url,)) as pool:
+                futuros = [pool.submit(_fechar_parte, data_inicio, data_fim, particao, chave)
+                           for chave in chaves]
+                for i, futuro in enumerate(as_completed(futuros), 1):
+                    parte, lidos = futuro.result()
+                    linhas += parte
+                    registros += lidos
+                    if progresso:
+                        progresso(i, len(chaves))
+
+        fechado_em = datetime.now()
+        for linha in linhas:
+            linha.update(ano=ano, mes=mes, fechado_em=fechado_em)
+
+        with bind.begin() as conn:
+            conn.execute(delete(FechamentoMensal).where(
+                FechamentoMensal.ano == ano, FechamentoMensal.mes == mes
+            ))
+            if linhas:
+                conn.execute(insert(FechamentoMensal), linhas)
+
+        total_extras = sum(round(l['horas_extras'], 2) for l in linhas)
+        total_faltantes = sum(round(l['horas_faltantes'], 2) for l in linhas)
+        return {
+            'ano': ano,
+            'mes': mes,
+            'funcionarios': len(linhas),
+            'registros': registros,
+            'divergencias': sum(l['divergencias'] for l in linhas),
+            'total_extras': round(total_extras, 2),
+            'total_faltantes': round(total_faltantes, 2),
+            'total_valor': round(sum(l['valor_extras'] for l in linhas), 2),
+            'partes': len(chaves),
+            'processos': processos,
+            'segundos': round(time.perf_counter() - inicio, 3),
+        }
+
+
+def _competencia(texto):
+    mes, ano = texto.split('/')
+    return int(ano), int(mes)
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="Fechamento mensal em paralelo")
+    parser.add_argument('--mes', type=_competencia, help="competência MM/AAAA (padrão: mês passado)")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="processos em paralelo (padrão: número de núcleos)")
+    parser.add_argument('--particao', choices=PARTICOES, default='faixa',
+                        help="dividir por faixa de funcionários ou por empresa")
+    args = parser.parse_args()
+
+    if args.mes:
+        ano, mes = args.mes
+    else:
+        anterior = RelatorioService.periodo("Mês passado")[0]
+        ano, mes = anterior.year, anterior.month
+
+    init_db()
+    print(f"📅 Fechando {mes:02d}/{ano}...")
+
+    def mostrar(feitas, total):
+        print(f"\r   {feitas}/{total} partes", end='', flush=True)
+
+    r = FechamentoService.fechar_mes(ano, mes, processos=args.processos,
+                                     particao=args.particao, progresso=mostrar)
+    print()
+    print(f"✅ {r['funcionarios']} funcionário(s), {r['registros']} registro(s) em "
+          f"{r['segundos']:.2f}s ({r['processos']} processo(s), {r['partes']} partes)")
+    print(f"   Extras: {r['total_extras']:.2f}h  Faltas: {r['total_faltantes']:.2f}h  "
+          f"Valor: R$ {r['total_valor']:,.2f}")
+    if r['divergencias']:
+        print(f"⚠️ {r['divergencias']} registro(s) com horas diferentes do recálculo pelas marcações")
@@ -0,0 +1,301 @@
+"""
+services/gerador_carga.py
+Gera um banco sintético (empresas, funcionários e anos de jornadas) para testes de desempenho
+
+Uso:
+    python -m services.gerador_carga carga.db --empresas 50 --funcionarios 200000 --anos 1
+
+Os turnos são realistas: expediente diurno, meio período e noturno cruzando a
+meia-noite, com intervalos, atrasos, horas extras, saídas antecipadas,
+faltas e alguns sábados. Uma fração das jornadas é gravada de novo com outro
+horário (como um arquivo de ponto reimportado), passando pelo UPSERT de
+(funcionario_id, data).
+
+As horas calculadas vêm de CalculoService.calcular_lote e as linhas são
+inseridas em lote com executemany, já no formato de armazenamento de cada
+coluna (obtido do próprio tipo SQLAlchemy da coluna). Mesma semente, mesmo banco.
+"""
+import argparse
+import os
+import time
+from datetime import date, time as hora_do_dia, timedelta
+from sqlalchemy import create_engine, insert
+from models.database import Base, configurar_engine, importar_modelos
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.registro_jornada import RegistroJornada
+from models.migracoes import VERSAO_ESQUEMA, aplicar_migracoes
+from services.calculo_service import CalculoService, MINUTOS_POR_DIA
+
+# numpy é necessário aqui: gerar dezenas de milhões de linhas em Python puro
+# levaria horas
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Células (funcionário x dia) geradas por vez; limita a memória do lote
+CELULAS_POR_LOTE = 2_000_000
+
+# Turnos: (proporção, entrada em minutos, carga diária, intervalo em horas)
+TURNOS = {
+    'diurno':       (0.60, 8 * 60, 8.0, 1.0),
+    'seis_horas':   (0.10, 7 * 60, 6.0, 0.25),
+    'meio_periodo': (0.15, 13 * 60, 4.0, 0.0),
+    'noturno':      (0.15, 22 * 60, 7.0, 1.0),   # sai de madrugada
+}
+
+PROB_FALTA = 0.03
+PROB_SABADO = 0.10
+PROB_HORA_EXTRA = 0.25
+PROB_SAIDA_ANTECIPADA = 0.10
+
+COLUNAS_REGISTRO = ('funcionario_id', 'data', 'hora_entrada', 'hora_saida', 'intervalo',
+                    'horas_trabalhadas', 'horas_extras', 'horas_faltantes')
+
+SQL_INSERIR = (
+    f"INSERT INTO {RegistroJornada.__tablename__} ({', '.join(COLUNAS_REGISTRO)}) "
+    f"VALUES ({', '.join('?' * len(COLUNAS_REGISTRO))})"
+)
+SQL_REGRAVAR = SQL_INSERIR + (
+    " ON CONFLICT(funcionario_id, data) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in COLUNAS_REGISTRO[2:])
+)
+
+
+class GeradorCarga:
+    """Gera o banco sintético; use gerar() ou a linha de comando"""
+
+    def __init__(self, bind, empresas=20, funcionarios=1000, anos=1, data_fim=None,
+                 duplicados=0.01, semente=42):
+        if np is None:
+            raise RuntimeError("O gerador de carga requer numpy (pip install numpy)")
+
+        self.bind = bind
+        self.num_empresas = empresas
+        self.num_funcionarios = funcionarios
+        self.duplicados = duplicados
+        self.rng = np.random.default_rng(semente)
+
+        self.data_fim = data_fim or date(2024, 12, 31)
+        self.data_inicio = self.data_fim - timedelta(days=365 * anos - 1)
+        self.dias = (self.data_fim - self.data_inicio).days + 1
+
+        # Valores no formato gravado pelo tipo de cada coluna (models/tipos.py),
+        # calculados uma vez por dia / minuto do dia
+        dialeto = bind.dialect
+        colunas = RegistroJornada.__table__.c
+        formatar_data = _conversor(colunas.data.type, dialeto)
+        formatar_hora = _conversor(colunas.hora_entrada.type, dialeto)
+        self._formatar_horas = _conversor(colunas.horas_trabalhadas.type, dialeto)
+
+        datas = [self.data_inicio + timedelta(days=i) for i in range(self.dias)]
+        self._datas_db = np.array([formatar_data(d) for d in datas], dtype=object)
+        self._horas_db = np.array(
+            [formatar_hora(hora_do_dia(m // 60, m % 60)) for m in range(MINUTOS_POR_DIA)], dtype=object
+        )
+        self._dia_semana = np.array([d.weekday() for d in datas], dtype=np.int8)
+
+    # ------------------------------------------------------------- cadastros
+
+    def _gerar_cadastros(self, conn):
+        """Empresas e funcionários; retorna os parâmetros de turno por funcionário"""
+        conn.execute(insert(Empresa), [
+            {
+                'nome': f"Empresa Sintética {i:04d}",
+                'cnpj': f"{i:08d}/0001-{i % 100:02d}",
+                'endereco': f"Rua {i}, {i * 7 % 1000}",
+                'telefone': f"(11) 9{i:04d}-{i * 13 % 10000:04d}",
+                'email': f"rh{i}@empresa{i}.com.br",
+            }
+            for i in range(1, self.num_empresas + 1)
+        ])
+
+        nomes_turno = list(TURNOS)
+        proporcoes = np.array([TURNOS[t][0] for t in nomes_turno])
+        turno = self.rng.choice(len(nomes_turno), size=self.num_funcionarios,
+                                p=proporcoes / proporcoes.sum())
+        empresa = self.rng.integers(1, self.num_empresas + 1, size=self.num_funcionarios)
+        valor_hora = np.round(self.rng.uniform(12, 80, size=self.num_funcionarios), 2)
+
+        funcionarios = []
+        for i in range(self.num_funcionarios):
+            nome_turno = nomes_turno[turno[i]]
+            funcionarios.append({
+                'nome': f"Funcionário {i + 1:07d}",
+                'cargo': nome_turno.replace('_', ' ').title(),
+                'carga_horaria_diaria': TURNOS[nome_turno][2],
+                'valor_hora': float(valor_hora[i]),
+                'pis': f"{10_000_000_000 + i + 1}",
+                'empresa_id': int(empresa[i]),
+            })
+            if len(funcionarios) == 50_000:
+                conn.execute(insert(Funcionario), funcionarios)
+                funcionarios = []
+        if funcionarios:
+            conn.execute(insert(Funcionario), funcionarios)
+
+        entrada = np.array([TURNOS[t][1] for t in nomes_turno])[turno]
+        carga = np.array([TURNOS[t][2] for t in nomes_turno])[turno]
+        intervalo = np.array([TURNOS[t][3] for t in nomes_turno])[turno]
+        return entrada, carga, intervalo
+
+    # -------------------------------------------------------------- jornadas
+
+    def _gerar_lote(self, primeiro, ultimo, entrada_base, carga, intervalo):
+        """Jornadas dos funcionários [primeiro, ultimo) em todos os dias do período"""
+        k, d = ultimo - primeiro, self.dias
+        rng = self.rng
+
+        # Quem trabalha em cada dia: seg-sex, alguns sábados, menos as faltas
+        util = self._dia_semana < 5
+        trabalha = (util | ((self._dia_semana == 5) & (rng.random((k, d)) < PROB_SABADO)))
+        trabalha &= rng.random((k, d)) >= PROB_FALTA
+        linha, dia = np.nonzero(trabalha)
+
+        n = linha.size
+        entrada = entrada_base[primeiro:ultimo][linha] + np.rint(rng.normal(0, 8, n))
+        carga_l = carga[primeiro:ultimo][linha]
+        intervalo_l = intervalo[primeiro:ultimo][linha]
+
+        # Variação da saída: hora extra, saída antecipada ou só alguns minutos
+        sorteio = rng.random(n)
+        desvio = np.rint(rng.normal(0, 5, n))
+        extra = sorteio < PROB_HORA_EXTRA
+        desvio[extra] = rng.integers(15, 181, size=int(extra.sum()))
+        cedo = (sorteio >= PROB_HORA_EXTRA) & (sorteio < PROB_HORA_EXTRA + PROB_SAIDA_ANTECIPADA)
+        desvio[cedo] = -rng.integers(15, 121, size=int(cedo.sum()))
+
+        entrada = np.mod(entrada, MINUTOS_POR_DIA).astype(np.int64)
+        saida = np.mod(entrada + (carga_l + intervalo_l) * 60 + desvio, MINUTOS_POR_DIA).astype(np.int64)
+
+        return self._linhas(linha + primeiro + 1, dia, entrada, saida, intervalo_l, carga_l)
+
+    def _linhas(self, funcionario_id, dia, entrada, saida, intervalo, carga):
+        """Tuplas prontas para o executemany (ordem de COLUNAS_REGISTRO)"""
+        horas = CalculoService.calcular_lote(entrada, saida, intervalo, carga)
+        formatar = self._formatar_horas
+        return list(zip(
+            funcionario_id.tolist(),
+            self._datas_db[dia].tolist(),
+            self._horas_db[entrada].tolist(),
+            self._horas_db[saida].tolist(),
+            map(formatar, intervalo.tolist()),
+            map(formatar, horas['horas_trabalhadas'].tolist()),
+            map(formatar, horas['horas_extras'].tolist()),
+            map(formatar, horas['horas_faltantes'].tolist()),
+        )), (funcionario_id, dia, entrada, saida, intervalo, carga)
+
+    def _regravacoes(self, colunas):
+        """Parte das jornadas do lote com a saída corrigida (vai pelo UPSERT)"""
+        funcionario_id, dia, entrada, saida, intervalo, carga = colunas
+        escolhidos = np.flatnonzero(self.rng.random(funcionario_id.size) < self.duplicados)
+        if not escolhidos.size:
+            return []
+        ajuste = self.rng.integers(-60, 61, size=escolhidos.size)
+        nova_saida = np.mod(saida[escolhidos] + ajuste, MINUTOS_POR_DIA)
+        linhas, _ = self._linhas(funcionario_id[escolhidos], dia[escolhidos], entrada[escolhidos],
+                                 nova_saida, intervalo[escolhidos], carga[escolhidos])
+        return linhas
+
+    # ------------------------------------------------------------------ API
+
+    def gerar(self, progresso=None):
+        """
+        Cria as tabelas e preenche o banco
+
+        Args:
+            progresso: callable(funcionarios_processados, registros_gravados)
+
+        Returns:
+            dict: {empresas, funcionarios, registros, regravados, segundos}
+        """
+        inicio = time.perf_counter()
+        # Tabelas e índices de todos os modelos, como em init_db; os gatilhos
+        # do resumo mensal só entram no fim
+        importar_modelos()
+        Base.metadata.create_all(self.bind)
+
+        # Índices secundários atrasam a carga: saem agora e são recriados de
+        # uma vez por aplicar_migracoes (o único fica, o UPSERT depende dele)
+        for indice in RegistroJornada.__table__.indexes:
+            if not indice.unique:
+                indice.drop(self.bind)
+
+        resultado = {'empresas': self.num_empresas, 'funcionarios': self.num_funcionarios,
+                     'registros': 0, 'regravados': 0}
+
+        with self.bind.begin() as conn:
+            # As linhas já saem na codificação atual: o banco recebe a versão
+            # antes delas para que nenhuma migração de dados as converta de novo
+            conn.exec_driver_sql(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+            entrada, carga, intervalo = self._gerar_cadastros(conn)
+
+        por_lote = max(1, CELULAS_POR_LOTE // self.dias)
+        for primeiro in range(0, self.num_funcionarios, por_lote):
+            ultimo = min(primeiro + por_lote, self.num_funcionarios)
+            linhas, colunas = self._gerar_lote(primeiro, ultimo, entrada, carga, intervalo)
+            regravacoes = self._regravacoes(colunas)
+
+            with self.bind.begin() as conn:
+                conn.exec_driver_sql(SQL_INSERIR, linhas)
+                if regravacoes:
+                    conn.exec_driver_sql(SQL_REGRAVAR, regravacoes)
+
+            resultado['registros'] += len(linhas)
+            resultado['regravados'] += len(regravacoes)
+            if progresso:
+                progresso(ultimo, resultado['registros'])
+
+        # Gatilhos, índices secundários e resumo mensal (reconstruído uma vez)
+        aplicar_migracoes(self.bind)
+
+        resultado['segundos'] = round(time.perf_counter() - inicio, 1)
+        return resultado
+
+
+def _conversor(tipo, dialeto):
+    """Função que converte um valor Python para o formato gravado pela coluna"""
+    return tipo.dialect_impl(dialeto).bind_processor(dialeto) or (lambda valor: valor)
+
+
+def criar_engine_carga(caminho):
+    """Engine para o banco sintético, com o mesmo perfil de PRAGMAs da aplicação"""
+    return configurar_engine(create_engine(f"sqlite:///{caminho}"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um banco sintético de jornadas")
+    parser.add_argument('banco', help="arquivo SQLite a criar (ex.: carga.db)")
+    parser.add_argument('--empresas', type=int, default=20)
+    parser.add_argument('--funcionarios', type=int, default=1000)
+    parser.add_argument('--anos', type=int, default=1, help="anos de jornadas até --fim")
+    parser.add_argument('--fim', help="último dia (DD/MM/AAAA, padrão 31/12/2024)")
+    parser.add_argument('--duplicados', type=float, default=0.01,
+                        help="fração de jornadas regravadas com outro horário")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--sobrescrever', action='store_true', help="apaga o banco se já existir")
+    args = parser.parse_args()
+
+    if os.path.exists(args.banco):
+        if not args.sobrescrever:
+            parser.error(f"{args.banco} já existe (use --sobrescrever)")
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(args.banco + sufixo):
+                os.remove(args.banco + sufixo)
+
+    from datetime import datetime
+    data_fim = datetime.strptime(args.fim, '%d/%m/%Y').date() if args.fim else None
+
+    gerador = GeradorCarga(
+        criar_engine_carga(args.banco),
+        empresas=args.empresas,
+        funcionarios=args.funcionarios,
+        anos=args.anos,
+        data_fim=data_fim,
+        duplicados=args.duplicados,
+        semente=args.semente
+    )
+    r = gerador.gerar(progresso=lambda f, n: print(f"⏳ {f}/{args.funcionarios} funcionários, {n} registros"))
+    print(f"✅ {r['registros']} registros ({r['regravados']} regravados) de {r['funcionarios']} "
+          f"funcionários em {r['empresas']} empresas - {r['segundos']}s")
@@ -3,26 +3,59 @@ services/ia_service.py
 Serviço simples para integração com Gemini (Google Generative AI) e heurísticas de análise.
 
 O arquivo tenta configurar a biblioteca `genai` quando disponível e usa uma
-lista de modelos para tentar conectar. Caso a biblioteca ou a chave de API
+lista de modelos para tentar conectar; a verificação roda em segundo plano
+e o resultado fica em cache no disco. Caso a biblioteca ou a chave de API
 não estejam disponíveis, o serviço permanece em modo degradado (não habilitado)
 e oferece respostas fallback baseadas em regras locais.
 """
 
+import hashlib
+import json
 import os
+import threading
+import time
 from typing import List, Dict, Any
 
-# dotenv é opcional; se existir, carrega variáveis de ambiente do .env
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except Exception:
-    pass
+# google.generativeai (opcional) leva perto de 1s para importar; só é
+# carregado por importar_genai(), na primeira instância do serviço ou no
+# aquecimento da inicialização
+genai = None
+_genai_importado = False
+_import_lock = threading.Lock()
 
-# Tentativa de importar a biblioteca genai (opcional)
-try:
-    import google.generativeai as genai   
-except Exception:
-    genai = None
+def importar_genai():
+    """Carrega o .env (dotenv opcional) e a biblioteca genai; None se ausente"""
+    global genai, _genai_importado
+    with _import_lock:
+        if not _genai_importado:
+            try:
+                from dotenv import load_dotenv
+                load_dotenv()
+            except Exception:
+                pass
+            try:
+                import google.generativeai as modulo
+                genai = modulo
+            except Exception:
+                genai = None
+            _genai_importado = True
+        return genai
+
+
+# Resultado da verificação do modelo fica em disco por CACHE_TTL segundos,
+# evitando uma chamada de rede a cada abertura do assistente
+CACHE_MODELO = os.getenv('HORAS_EXTRAS_CACHE_IA', '.ia_modelo_cache.json')
+CACHE_TTL = int(os.getenv('HORAS_EXTRAS_CACHE_IA_TTL', str(24 * 3600)))
+
+MODELOS_PARA_TENTAR = [
+    'gemini-2.0-flash'
+]
+
+# Estados do serviço (consultados pela tela de chat)
+DESABILITADO = 'desabilitado'   # sem chave ou sem biblioteca
+VERIFICANDO = 'verificando'     # verificação do modelo em andamento
+PRONTO = 'pronto'               # modelo disponível
+ERRO = 'erro'                   # nenhum modelo respondeu
 
 
 class IAService:
@@ -31,83 +64,161 @@ class IAService:
     A classe é tolerante à ausência da biblioteca `genai` ou da variável
     de ambiente `GEMINI_API_KEY`. Nestes casos, `habilitado` fica `False`
     e os métodos retornam respostas fallback.
+
+    O construtor não acessa a rede: se o cache em disco confirma o modelo,
+    o serviço já nasce `PRONTO`; caso contrário a verificação roda em uma
+    thread e `estado` fica `VERIFICANDO` até terminar.
     """
 
-    def __init__(self):
-        """Inicializa o serviço de IA e tenta conectar ao Gemini."""
-        self.api_key = os.getenv('GEMINI_API_KEY')
+    def __init__(self, genai_modulo=None, api_key=None, cache_path=None, cache_ttl=None,
+                 verificar=True):
+        """Inicializa o serviço de IA sem bloquear.
+
+        Args:
+            genai_modulo: módulo compatível com `google.generativeai`
+                (padrão: importar_genai(); testes podem passar um falso).
+            api_key: chave da API (padrão: GEMINI_API_KEY).
+            cache_path: arquivo do cache do modelo (padrão: CACHE_MODELO).
+            cache_ttl: validade do cache em segundos (padrão: CACHE_TTL).
+            verificar: inicia a verificação em segundo plano se não houver cache.
+        """
+        self.genai = genai_modulo if genai_modulo is not None else importar_genai()
+        self.api_key = api_key if api_key is not None else os.getenv('GEMINI_API_KEY')
+        self.cache_path = cache_path or CACHE_MODELO
+        self.cache_ttl = CACHE_TTL if cache_ttl is None else cache_ttl
         self.model = None
-        self.habilitado = False
+        self.nome_modelo = None
+        self.estado = DESABILITADO
+        self.erro = None
+        self._verificado = threading.Event()
+        self._lock = threading.Lock()
 
         if not self.api_key:
             print("⚠️ API Key do Gemini não encontrada. Funcionalidades de IA desabilitadas.")
+            self._verificado.set()
             return
 
-        if genai is None:
+        if self.genai is None:
             print("⚠️ Biblioteca 'genai' não instalada. Instale via 'pip install google-generativeai'.")
+            self._verificado.set()
             return
 
         try:
-            genai.configure(api_key=self.api_key)
-
-            modelos_para_tentar = [
-                'gemini-2.0-flash'
-            ]
-
-            for nome_modelo in modelos_para_tentar:
-                try:
-                    print(f"🔄 Tentando modelo: {nome_modelo}")
-                    self.model = genai.GenerativeModel(nome_modelo)
-                    # Teste simples: apenas tente instanciar/usar o modelo.
-                    # APIs podem variar; encapsulamos em try/except para ser tolerante.
-                    try:
-                        test_resp = None
-                        # Tenta chamada mais comum (pode variar conforme versão)
-                        if hasattr(self.model, 'generate_content'):
-                            test_resp = self.model.generate_content("teste")
-                        elif hasattr(self.model, 'generate'):
-                            test_resp = self.model.generate({"input": "teste"})
-
-                        print(f"✅ Modelo '{nome_modelo}' inicializado com sucesso.")
-                        self.habilitado = True
-                        break
-                    except Exception:
-                        # Se a chamada de teste falhar, tenta próximo modelo
-                        self.model = None
-                        continue
-                except Exception as e:
-                    print(f"⚠️ Modelo '{nome_modelo}' não disponível: {str(e)[:120]}")
-                    continue
-
-            if not self.habilitado:
-                print("❌ Nenhum modelo Gemini disponível. Execute os testes para diagnóstico.")
-
+            self.genai.configure(api_key=self.api_key)
         except Exception as e:
             print(f"❌ Erro ao configurar Gemini: {e}")
-            self.model = None
-            self.habilitado = False
+            self._finalizar(ERRO, erro=str(e))
+            return
+
+        nome_cache = self._ler_cache()
+        if nome_cache:
+            # Criar o objeto do modelo é local; nenhuma chamada de rede aqui
+            self.model = self.genai.GenerativeModel(nome_cache)
+            self._finalizar(PRONTO, nome_cache)
+            return
+
+        self.estado = VERIFICANDO
+        if verificar:
+            threading.Thread(target=self.verificar_modelo, name='ia-verificacao', daemon=True).start()
+
+    @property
+    def habilitado(self) -> bool:
+        """True quando há um modelo pronto para responder."""
+        return self.estado == PRONTO
+
+    def aguardar_verificacao(self, timeout=None) -> bool:
+        """Bloqueia até a verificação terminar (ou `timeout`); retorna `habilitado`."""
+        self._verificado.wait(timeout)
+        return self.habilitado
+
+    def verificar_modelo(self):
+        """Procura um modelo disponível e grava o resultado no cache.
+
+        Usa `genai.get_model` (só metadados, sem gerar texto) quando a
+        biblioteca oferece; senão conta tokens ou, por último, gera um texto curto.
+        """
+        for nome_modelo in MODELOS_PARA_TENTAR:
+            try:
+                print(f"🔄 Tentando modelo: {nome_modelo}")
+                modelo = self.genai.GenerativeModel(nome_modelo)
+                if hasattr(self.genai, 'get_model'):
+                    self.genai.get_model(f"models/{nome_modelo}")
+                elif hasattr(modelo, 'count_tokens'):
+                    modelo.count_tokens("teste")
+                elif hasattr(modelo, 'generate_content'):
+                    modelo.generate_content("teste")
+
+                print(f"✅ Modelo '{nome_modelo}' inicializado com sucesso.")
+                self.model = modelo
+                self._gravar_cache(nome_modelo)
+                self._finalizar(PRONTO, nome_modelo)
+                return True
+            except Exception as e:
+                # Se a verificação falhar, tenta próximo modelo
+                print(f"⚠️ Modelo '{nome_modelo}' não disponível: {str(e)[:120]}")
+                self.erro = str(e)
+
+        print("❌ Nenhum modelo Gemini disponível. Execute os testes para diagnóstico.")
+        self._finalizar(ERRO, erro=self.erro)
+        return False
+
+    def _finalizar(self, estado, nome_modelo=None, erro=None):
+        with self._lock:
+            self.estado = estado
+            self.nome_modelo = nome_modelo
+            if erro:
+                self.erro = erro
+        self._verificado.set()
+
+    def _chave_cache(self) -> str:
+        # A chave da API não vai para o disco, só um resumo dela
+        return hashlib.sha256(self.api_key.encode('utf-8')).hexdigest()[:16]
+
+    def _ler_cache(self):
+        """Nome do modelo confirmado no cache, se ainda válido para esta chave."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if (cache.get('chave') == self._chave_cache()
+                    and cache.get('modelo') in MODELOS_PARA_TENTAR
+                    and time.time() - cache.get('verificado_em', 0) < self.cache_ttl):
+                return cache['modelo']
+        except Exception:
+            pass
+        return None
+
+    def _gravar_cache(self, nome_modelo):
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'chave': self._chave_cache(),
+                    'modelo': nome_modelo,
+                    'verificado_em': time.time()
+                }, f)
+        except Exception as e:
+            print(f"⚠️ Não foi possível gravar o cache da IA: {e}")
+
+    def invalidar_cache(self):
+        """Apaga o cache (ex.: o modelo em cache passou a falhar)."""
+        try:
+            os.remove(self.cache_path)
+        except OSError:
+            pass
 
     def responder_consulta(self, prompt: str) -> str:
         """Retorna uma resposta para a consulta `prompt`.
 
         Quando a IA não está habilitada, retorna uma mensagem fallback.
         """
+        if self.estado == VERIFICANDO:
+            self.aguardar_verificacao(timeout=30)
         if not self.habilitado or self.model is None:
             return "[IA indisponível] Resposta automática: verifique configuração do GEMINI_API_KEY ou instale 'google-generativeai'."
 
         try:
             # Tenta usar APIs comuns de forma tolerante
             if hasattr(self.model, 'generate_content'):
-                resp = self.model.generate_content(prompt)
-                # Pode ser string ou objeto; normalize para string
-                if isinstance(resp, str):
-                    return resp
-                # tenta extrair texto de campos comuns
-                for attr in ('text', 'output', 'content'):
-                    val = getattr(resp, attr, None)
-                    if val:
-                        return str(val)
-                return str(resp)
+                return self._texto_resposta(self.model.generate_content(prompt))
 
             if hasattr(self.model, 'generate'):
                 resp = self.model.generate({"input": prompt})
@@ -119,8 +230,42 @@ class IAService:
             return "[IA] Não foi possível obter resposta do modelo configurado."
 
         except Exception as e:
+            # Força nova verificação na próxima abertura
+            self.invalidar_cache()
             return f"[IA Erro] {str(e)}"
 
+    @staticmethod
+    def _texto_resposta(resp) -> str:
+        """Normaliza a resposta do modelo (string ou objeto) para texto."""
+        if isinstance(resp, str):
+            return resp
+        # tenta extrair texto de campos comuns
+        for attr in ('text', 'output', 'content'):
+            val = getattr(resp, attr, None)
+            if val:
+                return str(val)
+        return str(resp)
+
+    def iniciar_conversa(self):
+        """Abre uma conversa em que o modelo guarda as mensagens anteriores.
+
+        Retorna `None` quando a IA não está habilitada ou o modelo não
+        oferece chat; nesse caso use `responder_consulta` com o prompt completo.
+        """
+        if self.estado == VERIFICANDO:
+            self.aguardar_verificacao(timeout=30)
+        if not self.habilitado or self.model is None or not hasattr(self.model, 'start_chat'):
+            return None
+        return self.model.start_chat(history=[])
+
+    def responder_conversa(self, conversa, mensagem: str) -> str:
+        """Envia `mensagem` dentro da `conversa` aberta por `iniciar_conversa`.
+
+        Diferente de `responder_consulta`, erros da API são propagados: quem
+        chama precisa saber se a mensagem (e os dados nela) chegou ao modelo.
+        """
+        return self._texto_resposta(conversa.send_message(mensagem))
+
     def analisar_inconsistencias(self, registros: List[Any]) -> List[Dict[str, Any]]:
         """Analisa registros e retorna lista de inconsistências encontradas.
 
@@ -158,4 +303,15 @@ class IAService:
             except Exception:
                 continue
 
-        return problemas
\ No newline at end of file
+        return problemas
+
+_ia_service = None
+_ia_lock = threading.Lock()
+
+def obter_ia_service() -> IAService:
+    """Instância compartilhada: reabrir o chat não refaz a verificação."""
+    global _ia_service
+    with _ia_lock:
+        if _ia_service is None:
+            _ia_service = IAService()
+        return _ia_service
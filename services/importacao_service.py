@@ -0,0 +1,397 @@
+"""
+services/importacao_service.py
+Importação em lote de arquivos de ponto (CSV e AFD) para registros_jornada
+
+Os arquivos são lidos em streaming, as horas são calculadas em lote pelo
+CalculoService e cada lote é gravado com um único UPSERT (executemany) em
+uma única transação. As marcações do AFD são guardadas em marcacoes e as
+jornadas dos dias importados derivadas delas por services/marcacao_service.py.
+"""
+import csv
+import os
+from datetime import date, datetime, time
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from models.database import engine
+from models.registro_jornada import RegistroJornada
+from services.calculo_service import CalculoService
+
+# Registros gravados por transação
+TAMANHO_LOTE = 5000
+
+# Mensagens de erro guardadas no resultado (o restante é só contado)
+MAX_ERROS_DETALHADOS = 50
+
+class ErroImportacao(Exception):
+    """Erro que impede a importação do arquivo inteiro"""
+
+
+def somente_digitos(valor):
+    """PIS/CPF só com dígitos ('123.456.789-09' -> '12345678909'); None se vazio"""
+    return ''.join(ch for ch in (valor or '') if ch.isdigit()) or None
+
+
+class ImportacaoService:
+
+    @staticmethod
+    def detectar_formato(caminho):
+        """Retorna 'csv' ou 'afd' pela extensão ou pelo conteúdo da primeira linha"""
+        extensao = os.path.splitext(caminho)[1].lower()
+        if extensao == '.csv':
+            return 'csv'
+
+        with open(caminho, encoding='latin-1') as arquivo:
+            primeira = arquivo.readline().strip()
+
+        # AFD: 9 dígitos de NSR seguidos do tipo de registro ('1' no cabeçalho)
+        if len(primeira) > 10 and primeira[:10].isdigit():
+            return 'afd'
+        return 'csv'
+
+    @staticmethod
+    def _ler_data(valor):
+        """Aceita DD/MM/AAAA ou AAAA-MM-DD (sem strptime, que domina o tempo de leitura)"""
+        valor = valor.strip()
+        if '-' in valor:
+            ano, mes, dia = valor.split('-')
+        else:
+            dia, mes, ano = valor.split('/')
+        return date(int(ano), int(mes), int(dia))
+
+    @staticmethod
+    def _ler_hora(valor):
+        """Aceita HH:MM ou HH:MM:SS"""
+        partes = valor.strip().split(':')
+        if len(partes) not in (2, 3):
+            raise ValueError(f"hora inválida: {valor!r}")
+        return time(*(int(p) for p in partes))
+
+    @staticmethod
+    def ler_csv(caminho):
+        """
+        Lê um CSV de jornadas linha a linha
+
+        Colunas: funcionario_id, pis ou cpf, data, entrada, saida e intervalo
+        (opcional, em horas). O separador (',' ou ';') é detectado automaticamente.
+
+        Yields:
+            tuple: (numero_linha, dict da jornada) ou (numero_linha, mensagem de erro)
+        """
+        with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;')
+            except csv.Error:
+                dialeto = csv.excel
+
+            leitor = csv.DictReader(arquivo, dialect=dialeto)
+            campos = {c.strip().lower() for c in (leitor.fieldnames or [])}
+            obrigatorios = {'data', 'entrada', 'saida'}
+            if not obrigatorios <= campos or not ({'funcionario_id', 'pis', 'cpf'} & campos):
+                raise ErroImportacao(
+                    "CSV precisa das colunas funcionario_id (ou pis/cpf), data, entrada e saida"
+                )
+
+            for numero, linha in enumerate(leitor, start=2):
+                linha = {(k or '').strip().lower(): (v or '').strip() for k, v in linha.items()}
+                try:
+                    intervalo = linha.get('intervalo') or '0'
+                    yield numero, {
+                        'funcionario_id': int(linha['funcionario_id']) if linha.get('funcionario_id') else None,
+                        'pis': somente_digitos(linha.get('pis')),
+                        'cpf': somente_digitos(linha.get('cpf')),
+                        'data': ImportacaoService._ler_data(linha['data']),
+                        'hora_entrada': ImportacaoService._ler_hora(linha['entrada']),
+                        'hora_saida': ImportacaoService._ler_hora(linha['saida']),
+                        'intervalo': float(intervalo.replace(',', '.'))
+                    }
+                except (ValueError, KeyError) as e:
+                    yield numero, f"Linha {numero}: {e}"
+
+    @staticmethod
+    def ler_marcacoes_afd(caminho):
+        """
+        Lê as marcações (registro tipo 3) de um AFD
+
+        Suporta o layout da Portaria 1510 (data DDMMAAAA + hora HHMM + PIS) e o
+        da Portaria 671 (data/hora ISO 8601 + CPF).
+
+        Yields:
+            tuple: (numero_linha, (('pis' ou 'cpf', identificador), data, hora))
+                   ou (numero_linha, mensagem de erro)
+        """
+        with open(caminho, encoding='latin-1') as arquivo:
+            for numero, linha in enumerate(arquivo, start=1):
+                linha = linha.rstrip('\r\n')
+                if len(linha) < 10 or linha[9] != '3':
+                    continue
+                try:
+                    if len(linha) >= 34 and linha[14] == '-':
+                        # Portaria 671: AAAA-MM-DDThh:mm:00-0300 + CPF
+                        momento = datetime.strptime(linha[10:26], "%Y-%m-%dT%H:%M")
+                        tipo, identificador = 'cpf', linha[34:46]
+                    else:
+                        # Portaria 1510: DDMMAAAA + HHMM + PIS
+                        momento = datetime.strptime(linha[10:22], "%d%m%Y%H%M")
+                        tipo, identificador = 'pis', linha[22:34]
+                    identificador = identificador.strip().lstrip('0')
+                    if not identificador:
+                        raise ValueError("identificador vazio")
+                    yield numero, ((tipo, identificador), momento.date(), momento.time())
+                except ValueError as e:
+                    yield numero, f"Linha {numero}: marcação inválida ({e})"
+
+    @staticmethod
+    def _carregar_funcionarios(conn):
+        """
+        Mapas id -> carga horária e ('pis' ou 'cpf', identificador) -> id (uma única consulta)
+
+        Os identificadores são guardados sem zeros à esquerda, como lidos do AFD.
+        """
+        cargas = {}
+        identificadores = {}
+        for func_id, pis, cpf, carga in conn.execute(text(
+            "SELECT id, pis, cpf, carga_horaria_diaria FROM funcionarios"
+        )):
+            cargas[func_id] = carga
+            if pis:
+                identificadores[('pis', pis.lstrip('0'))] = func_id
+            if cpf:
+                identificadores[('cpf', cpf.lstrip('0'))] = func_id
+        return cargas, identificadores
+
+    @staticmethod
+    def gravar_lote(conn, jornadas, cargas):
+        """
+        Calcula as horas do lote de uma vez e faz UPSERT por (funcionario_id, data)
+
+        Args:
+            conn: conexão dentro de uma transação
+            jornadas: lista de dicts com funcionario_id, data, hora_entrada,
+                      hora_saida e intervalo
+            cargas: dict funcionario_id -> carga_horaria_diaria
+        """
+        if not jornadas:
+            return 0
+
+        resultado = CalculoService.calcular_lote(
+            [CalculoService.minutos_do_dia(j['hora_entrada']) for j in jornadas],
+            [CalculoService.minutos_do_dia(j['hora_saida']) for j in jornadas],
+            [j['intervalo'] for j in jornadas],
+            [cargas[j['funcionario_id']] for j in jornadas]
+        )
+
+        linhas = [
+            {
+                'funcionario_id': j['funcionario_id'],
+                'data': j['data'],
+                'hora_entrada': j['hora_entrada'],
+                'hora_saida': j['hora_saida'],
+                'intervalo': j['intervalo'],
+                'horas_trabalhadas': float(trabalhadas),
+                'horas_extras': float(extras),
+                'horas_faltantes': float(faltantes)
+            }
+            for j, trabalhadas, extras, faltantes in zip(
+                jornadas,
+                resultado['horas_trabalhadas'],
+                resultado['horas_extras'],
+                resultado['horas_faltantes']
+            )
+        ]
+
+        stmt = insert(RegistroJornada.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['funcionario_id', 'data'],
+            set_={
+                coluna: stmt.excluded[coluna]
+                for coluna in ('hora_entrada', 'hora_saida', 'intervalo',
+                               'horas_trabalhadas', 'horas_extras', 'horas_faltantes')
+            }
+        )
+        conn.execute(stmt, linhas)
+        return len(linhas)
+
+    @staticmethod
+    def importar(caminho, formato=None, tamanho_lote=TAMANHO_LOTE, progresso=None, bind=None,
+                 cancelado=None):
+        """
+        Importa um arquivo de ponto
+
+        Jornadas já existentes para o mesmo funcionário/dia são substituídas.
+
+        Args:
+            caminho: caminho do arquivo
+            formato: 'csv', 'afd' ou None para detectar
+            tamanho_lote: registros por transação
+            progresso: callable(linhas_lidas, registros_gravados) chamado a cada lote
+            bind: engine (padrão: engine da aplicação)
+            cancelado: callable() -> bool verificado entre lotes; True interrompe
+                       a importação (lotes já gravados permanecem)
+
+        Returns:
+            dict: {lidos, gravados, ignorados, erros, mensagens, cancelado}
+        """
+        bind = bind or engine
+        formato = formato or ImportacaoService.detectar_formato(caminho)
+        if formato == 'afd':
+            return ImportacaoService.importar_afd(caminho, tamanho_lote, progresso, bind, cancelado)
+        if formato != 'csv':
+            raise ErroImportacao(f"Formato desconhecido: {formato}")
+        fonte = ImportacaoService.ler_csv(caminho)
+
+        with bind.connect() as conn:
+            cargas, identificadores = ImportacaoService._carregar_funcionarios(conn)
+
+        resultado = {'lidos': 0, 'gravados': 0, 'ignorados': 0, 'erros': 0, 'mensagens': [],
+                     'cancelado': False}
+        lote = {}
+        linha_atual = 0
+
+        def registrar_erro(mensagem):
+            resultado['erros'] += 1
+            if len(resultado['mensagens']) < MAX_ERROS_DETALHADOS:
+                resultado['mensagens'].append(mensagem)
+
+        def descarregar():
+            if not lote:
+                return
+            with bind.begin() as conn:
+                resultado['gravados'] += ImportacaoService.gravar_lote(conn, list(lote.values()), cargas)
+            lote.clear()
+            if progresso:
+                progresso(linha_atual, resultado['gravados'])
+
+        for linha_atual, item in fonte:
+            if isinstance(item, str):
+                registrar_erro(item)
+                continue
+
+            resultado['lidos'] += 1
+            func_id = item['funcionario_id']
+            for tipo in ('pis', 'cpf'):
+                if func_id is None and item[tipo]:
+                    func_id = identificadores.get((tipo, item[tipo].lstrip('0')))
+            if func_id not in cargas:
+                resultado['ignorados'] += 1
+                continue
+
+            item['funcionario_id'] = func_id
+            # Repetição do mesmo funcionário/dia no arquivo: vale a última
+            lote[(func_id, item['data'])] = item
+            if len(lote) >= tamanho_lote:
+                descarregar()
+                if cancelado and cancelado():
+                    resultado['cancelado'] = True
+                    return resultado
+
+        descarregar()
+        return resultado
+
+    @staticmethod
+    def importar_afd(caminho, tamanho_lote=TAMANHO_LOTE, progresso=None, bind=None, cancelado=None):
+        """
+        Grava as marcações do AFD e refaz as jornadas dos dias importados
+
+        Mesmos argumentos e retorno de importar; `lidos` conta marcações e
+        `gravados` jornadas.
+        """
+        from services.marcacao_service import MarcacaoService
+
+        bind = bind or engine
+        with bind.connect() as conn:
+            _, identificadores = ImportacaoService._carregar_funcionarios(conn)
+
+        resultado = {'lidos': 0, 'gravados': 0, 'ignorados': 0, 'erros': 0, 'mensagens': [],
+                     'cancelado': False}
+        lote = []
+        funcionarios = set()
+        primeiro = ultimo = None
+        linha_atual = 0
+
+        def registrar_erro(mensagem):
+            resultado['erros'] += 1
+            if len(resultado['mensagens']) < MAX_ERROS_DETALHADOS:
+                resultado['mensagens'].append(mensagem)
+
+        def descarregar():
+            if not lote:
+                return
+            with bind.begin() as conn:
+                MarcacaoService.gravar(conn, lote)
+            lote.clear()
+            if progresso:
+                progresso(linha_atual, resultado['gravados'])
+
+        for linha_atual, item in ImportacaoService.ler_marcacoes_afd(caminho):
+            if isinstance(item, str):
+                registrar_erro(item)
+                continue
+
+            resultado['lidos'] += 1
+            identificador, data, hora = item
+            func_id = identificadores.get(identificador)
+            if func_id is None:
+                resultado['ignorados'] += 1
+                continue
+
+            lote.append((func_id, data, hora))
+            funcionarios.add(func_id)
+            primeiro = data if primeiro is None or data < primeiro else primeiro
+            ultimo = data if ultimo is None or data > ultimo else ultimo
+            if len(lote) >= tamanho_lote:
+                descarregar()
+                if cancelado and cancelado():
+                    resultado['cancelado'] = True
+                    return resultado
+
+        descarregar()
+        if not funcionarios:
+            return resultado
+
+        def mostrar_jornadas(_, jornadas):
+            if progresso:
+                progresso(linha_atual, jornadas)
+
+        derivado = MarcacaoService.derivar(primeiro, ultimo, funcionarios, lote=tamanho_lote,
+                                           progresso=mostrar_jornadas, cancelado=cancelado, bind=bind)
+        resultado['gravados'] = derivado['jornadas']
+        resultado['cancelado'] = derivado['cancelado']
+        for mensagem in derivado['mensagens']:
+            registrar_erro(mensagem)
+        resultado['erros'] += derivado['incompletas'] - len(derivado['mensagens'])
+        return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="Importa arquivos de ponto (CSV/AFD)")
+    parser.add_argument('arquivo', help="arquivo CSV ou AFD")
+    parser.add_argument('--formato', choices=['csv', 'afd'], help="força o formato do arquivo")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="registros por transação")
+    args = parser.parse_args()
+
+    init_db()
+    print(f"📥 Importando {args.arquivo}...")
+    inicio = datetime.now()
+
+    def mostrar_progresso(linhas, gravados):
+        print(f"   ... linha {linhas}: {gravados} registro(s) gravado(s)")
+
+    try:
+        r = ImportacaoService.importar(args.arquivo, args.formato, args.lote, mostrar_progresso)
+    except ErroImportacao as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    duracao = (datetime.now() - inicio).total_seconds()
+    print(f"\n✅ Importação concluída em {duracao:.1f}s")
+    print(f"   📊 Jornadas lidas: {r['lidos']}")
+    print(f"   💾 Gravadas: {r['gravados']}")
+    print(f"   ⏭️ Funcionário não encontrado: {r['ignorados']}")
+    print(f"   ⚠️ Erros: {r['erros']}")
+    for mensagem in r['mensagens']:
+        print(f"      • {mensagem}")
@@ -0,0 +1,48 @@
+"""
+services/jornada_service.py
+Gravação de uma jornada (caminho usado pela tela de registro)
+"""
+from models.registro_jornada import RegistroJornada
+from services.calculo_service import CalculoService
+
+class JornadaService:
+
+    @staticmethod
+    def buscar_existente(db, funcionario_id, data):
+        """Id do registro do funcionário na data, ou None"""
+        return db.query(RegistroJornada.id).filter(
+            RegistroJornada.funcionario_id == funcionario_id,
+            RegistroJornada.data == data
+        ).scalar()
+
+    @staticmethod
+    def registrar(db, funcionario_id, carga_horaria_diaria, data, hora_entrada, hora_saida,
+                  intervalo, substituir_id=None):
+        """
+        Calcula as horas e grava a jornada (commit incluído)
+
+        Args:
+            substituir_id: registro existente na mesma data, removido na mesma transação
+
+        Returns:
+            dict: {horas_trabalhadas, horas_extras, horas_faltantes}
+        """
+        horas = CalculoService.calcular_jornada_completa(
+            hora_entrada, hora_saida, intervalo, carga_horaria_diaria
+        )
+
+        if substituir_id:
+            db.query(RegistroJornada).filter(
+                RegistroJornada.id == substituir_id
+            ).delete()
+
+        db.add(RegistroJornada(
+            funcionario_id=funcionario_id,
+            data=data,
+            hora_entrada=hora_entrada,
+            hora_saida=hora_saida,
+            intervalo=intervalo,
+            **horas
+        ))
+        db.commit()
+        return horas
@@ -0,0 +1,329 @@
+"""
+services/marcacao_service.py
+Pareamento das marcações de ponto em trechos trabalhados, intervalos e jornadas
+
+parear() lê as marcações em ordem de funcionário e horário e fecha cada
+jornada em uma única passada, guardando só as marcações da jornada corrente.
+Em uma jornada as marcações se alternam entre entrada e saída: os pares
+(1ª, 2ª), (3ª, 4ª)... são os trechos trabalhados e o que fica entre eles são os
+intervalos. Regras (REGRAS_PAREAMENTO, minutos):
+
+    tolerancia_duplicada    marcação a até N minutos da anterior é repetição
+    intervalo_maximo        pausa depois de uma saída maior que isso, já em
+                            outro dia, começa uma nova jornada
+    trecho_maximo           trecho depois de uma entrada maior que isso, já em
+                            outro dia, é saída esquecida: começa uma nova jornada
+
+Marcações do mesmo dia ficam sempre na mesma jornada, e a jornada noturna que
+passa da meia-noite fica no dia em que começou. Cada jornada vira uma linha de
+registros_jornada (primeira marcação, última marcação e soma dos intervalos),
+gravada em lotes pelo mesmo UPSERT da importação. Ao mudar as regras,
+derivar() refaz as jornadas a partir das marcações guardadas.
+
+    python -m services.marcacao_service --derivar [--de 01/11/2024] [--ate 30/11/2024] [--funcionario 5]
+    python -m services.marcacao_service --derivar --intervalo-maximo 300 --trecho-maximo 720
+    python -m services.marcacao_service --dia 5 15/11/2024
+"""
+import os
+from collections import namedtuple
+from datetime import date, datetime, time
+from sqlalchemy import Integer, select, text, type_coerce
+from sqlalchemy.dialects.sqlite import insert
+from models.database import engine
+from models.marcacao import Marcacao
+from services.calculo_service import MINUTOS_POR_DIA
+from services.importacao_service import TAMANHO_LOTE, MAX_ERROS_DETALHADOS, ImportacaoService
+
+REGRAS_PAREAMENTO = {
+    'tolerancia_duplicada': int(os.getenv('HORAS_EXTRAS_PAREAMENTO_TOLERANCIA', '1')),
+    'intervalo_maximo': int(os.getenv('HORAS_EXTRAS_PAREAMENTO_INTERVALO_MAXIMO', '240')),
+    'trecho_maximo': int(os.getenv('HORAS_EXTRAS_PAREAMENTO_TRECHO_MAXIMO', '960')),
+}
+
+# data em dias desde 1970; entrada e saida em minutos do dia; intervalo em
+# minutos; segmentos (início, fim) em minutos desde a meia-noite de `data`
+# (passam de 1440 na jornada noturna); ultimo_dia é o dia da última marcação
+Jornada = namedtuple('Jornada', 'funcionario_id data entrada saida intervalo marcacoes segmentos ultimo_dia')
+
+# A leitura de um período começa uma semana antes: o descanso semanal é maior
+# que intervalo_maximo e trecho_maximo, então a alternância entrada/saída já
+# está certa quando o período começa, mesmo que a leitura caia no meio de uma jornada
+MARGEM_DIAS = 7
+
+_EPOCA = date(1970, 1, 1)
+
+# time de cada minuto do dia (gravar_lote recebe horários como time)
+_HORARIOS = [time(m // 60, m % 60) for m in range(MINUTOS_POR_DIA)]
+
+
+def _dia(data):
+    return (data - _EPOCA).days
+
+
+def _fechar(funcionario_id, dia, instantes):
+    base = dia * MINUTOS_POR_DIA
+    n = len(instantes)
+    pausas = 0
+    for i in range(1, n - 1, 2):
+        pausas += instantes[i + 1] - instantes[i]
+    return Jornada(
+        funcionario_id, dia,
+        instantes[0] - base, instantes[-1] % MINUTOS_POR_DIA, pausas, n,
+        tuple((instantes[i] - base, instantes[i + 1] - base) for i in range(0, n - 1, 2)),
+        instantes[-1] // MINUTOS_POR_DIA
+    )
+
+
+def parear(marcacoes, regras=None, contagem=None):
+    """
+    Agrupa marcações em jornadas em uma única passada
+
+    Args:
+        marcacoes: iterável de (funcionario_id, dia desde 1970, minuto do dia)
+                   em ordem de funcionário, dia e minuto
+        regras: dict com chaves de REGRAS_PAREAMENTO a substituir
+        contagem: dict opcional atualizado com 'marcacoes' e 'duplicadas'
+
+    Yields:
+        Jornada (inclusive as de uma única marcação; quem chama decide o que fazer)
+    """
+    r = dict(REGRAS_PAREAMENTO)
+    r.update(regras or {})
+    tolerancia = r['tolerancia_duplicada']
+    intervalo_maximo = r['intervalo_maximo']
+    trecho_maximo = r['trecho_maximo']
+
+    lidas = duplicadas = 0
+    funcionario = dia_jornada = None
+    instantes = []
+    for func_id, dia, minuto in marcacoes:
+        lidas += 1
+        instante = dia * MINUTOS_POR_DIA + minuto
+        if func_id == funcionario:
+            distancia = instante - instantes[-1]
+            if distancia <= tolerancia:
+                duplicadas += 1
+                continue
+            # Número ímpar de marcações: a última foi uma entrada
+            limite = trecho_maximo if len(instantes) % 2 else intervalo_maximo
+            if dia == dia_jornada or distancia <= limite:
+                instantes.append(instante)
+                continue
+        if instantes:
+            if contagem is not None:
+                contagem['marcacoes'], contagem['duplicadas'] = lidas - 1, duplicadas
+            yield _fechar(funcionario, dia_jornada, instantes)
+        funcionario, dia_jornada, instantes = func_id, dia, [instante]
+
+    if contagem is not None:
+        contagem['marcacoes'], contagem['duplicadas'] = lidas, duplicadas
+    if instantes:
+        yield _fechar(funcionario, dia_jornada, instantes)
+
+
+class MarcacaoService:
+
+    @staticmethod
+    def gravar(conn, marcacoes, origem='afd'):
+        """
+        Grava marcações ignorando as que já existem (mesmo funcionário e minuto)
+
+        Args:
+            marcacoes: sequência de (funcionario_id, data, hora) com date/time
+                       ou dias desde 1970/minutos do dia
+
+        Returns:
+            int: marcações novas
+        """
+        if not marcacoes:
+            return 0
+        stmt = insert(Marcacao.__table__).on_conflict_do_nothing(
+            index_elements=['funcionario_id', 'data', 'hora']
+        )
+        result = conn.execute(stmt, [
+            {'funcionario_id': f, 'data': d, 'hora': h, 'origem': origem} for f, d, h in marcacoes
+        ])
+        return result.rowcount
+
+    @staticmethod
+    def _consulta(data_inicio=None, data_fim=None, funcionarios=None):
+        """Marcações em ordem de pareamento, de MARGEM_DIAS antes de data_inicio ao dia seguinte a data_fim"""
+        m = Marcacao
+        dia = type_coerce(m.data, Integer)
+        consulta = select(m.funcionario_id, dia, type_coerce(m.hora, Integer)).order_by(
+            m.funcionario_id, m.data, m.hora
+        )
+        # Jornada noturna de data_fim termina no dia seguinte
+        if data_inicio:
+            consulta = consulta.where(dia >= _dia(data_inicio) - MARGEM_DIAS)
+        if data_fim:
+            consulta = consulta.where(dia <= _dia(data_fim) + 1)
+        if funcionarios is not None:
+            consulta = consulta.where(m.funcionario_id.in_(sorted(funcionarios)))
+        return consulta
+
+    @staticmethod
+    def derivar(data_inicio=None, data_fim=None, funcionarios=None, regras=None, lote=TAMANHO_LOTE,
+                progresso=None, cancelado=None, bind=None):
+        """
+        Refaz as jornadas de registros_jornada a partir das marcações
+
+        As marcações são lidas em streaming (uma conexão de leitura) e as
+        jornadas gravadas a cada `lote` em transações separadas. Jornada que
+        passa a absorver o dia seguinte (regras mais largas) apaga a linha que
+        esse dia tinha.
+
+        Args:
+            data_inicio, data_fim: período das jornadas (None = todas)
+            funcionarios: ids a refazer (None = todos)
+            regras: dict com chaves de REGRAS_PAREAMENTO a substituir
+            progresso: callable(marcacoes_lidas, jornadas_gravadas) a cada lote
+            cancelado: callable() -> bool verificado entre lotes
+
+        Returns:
+            dict: {marcacoes, duplicadas, jornadas, impares, incompletas,
+                   removidas, mensagens, cancelado}
+        """
+        bind = bind or engine
+        inicio = _dia(data_inicio) if data_inicio else None
+        fim = _dia(data_fim) if data_fim else None
+
+        with bind.connect() as conn:
+            cargas, _ = ImportacaoService._carregar_funcionarios(conn)
+
+        resultado = {'marcacoes': 0, 'duplicadas': 0, 'jornadas': 0, 'impares': 0, 'incompletas': 0,
+                     'removidas': 0, 'mensagens': [], 'cancelado': False}
+        contagem = {'marcacoes': 0, 'duplicadas': 0}
+        jornadas = []
+        absorvidos = []
+
+        def descarregar(final=False):
+            iniciados = {(j['funcionario_id'], j['data']) for j in jornadas}
+            # O dia absorvido pela última jornada do lote pode começar a primeira do próximo
+            ultima = (jornadas[-1]['funcionario_id'], jornadas[-1]['data']) if jornadas and not final else None
+            adiados = [(f, d) for f, d in absorvidos if ultima and f == ultima[0] and d > ultima[1]]
+            remover = [{'f': f, 'd': d} for f, d in absorvidos
+                       if (f, d) not in iniciados and (f, d) not in adiados]
+            with bind.begin() as conn:
+                resultado['jornadas'] += ImportacaoService.gravar_lote(conn, jornadas, cargas)
+                if remover:
+                    resultado['removidas'] += conn.execute(text(
+                        "DELETE FROM registros_jornada WHERE funcionario_id = :f AND data = :d"
+                    ), remover).rowcount
+            jornadas.clear()
+            absorvidos[:] = adiados
+            resultado.update(contagem)
+            if progresso:
+                progresso(resultado['marcacoes'], resultado['jornadas'])
+
+        with bind.connect() as leitura:
+            linhas = leitura.execution_options(yield_per=lote).execute(
+                MarcacaoService._consulta(data_inicio, data_fim, funcionarios)
+            )
+            for j in parear(linhas, regras, contagem):
+                if (inicio is not None and j.data < inicio) or (fim is not None and j.data > fim):
+                    continue
+                if j.marcacoes < 2:
+                    resultado['incompletas'] += 1
+                    if len(resultado['mensagens']) < MAX_ERROS_DETALHADOS:
+                        dia = date.fromordinal(_EPOCA.toordinal() + j.data)
+                        resultado['mensagens'].append(
+                            f"{dia:%d/%m/%Y} funcionário {j.funcionario_id}: apenas uma marcação"
+                        )
+                    continue
+                if j.marcacoes % 2:
+                    resultado['impares'] += 1
+
+                jornadas.append({
+                    'funcionario_id': j.funcionario_id,
+                    'data': j.data,
+                    'hora_entrada': _HORARIOS[j.entrada],
+                    'hora_saida': _HORARIOS[j.saida],
+                    'intervalo': round(j.intervalo / 60, 2)
+                })
+                for dia in range(j.data + 1, j.ultimo_dia + 1):
+                    absorvidos.append((j.funcionario_id, dia))
+
+                if len(jornadas) >= lote:
+                    descarregar()
+                    if cancelado and cancelado():
+                        resultado['cancelado'] = True
+                        return resultado
+
+        descarregar(final=True)
+        return resultado
+
+    @staticmethod
+    def jornada(conn, funcionario_id, data, regras=None):
+        """Jornada que começa no dia (com trechos e intervalos) ou None"""
+        linhas = conn.execute(MarcacaoService._consulta(data, data, [funcionario_id]))
+        dia = _dia(data)
+        for j in parear(linhas, regras):
+            if j.data == dia:
+                return j
+        return None
+
+
+def _data(texto):
+    return datetime.strptime(texto, '%d/%m/%Y').date()
+
+
+def _hora(minutos):
+    dias, minuto = divmod(minutos, MINUTOS_POR_DIA)
+    return f"{minuto // 60:02d}:{minuto % 60:02d}" + (f" (+{dias}d)" if dias else "")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time as relogio
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="Pareamento de marcações de ponto em jornadas")
+    parser.add_argument('--derivar', action='store_true', help="refaz as jornadas a partir das marcações")
+    parser.add_argument('--de', type=_data, help="primeiro dia (DD/MM/AAAA)")
+    parser.add_argument('--ate', type=_data, help="último dia (DD/MM/AAAA)")
+    parser.add_argument('--funcionario', type=int)
+    parser.add_argument('--dia', nargs=2, metavar=('FUNCIONARIO', 'DATA'),
+                        help="mostra os trechos e intervalos da jornada do dia")
+    parser.add_argument('--tolerancia', type=int, help="minutos para marcação repetida")
+    parser.add_argument('--intervalo-maximo', type=int, help="minutos de pausa que separam jornadas")
+    parser.add_argument('--trecho-maximo', type=int, help="minutos de trecho que indicam saída esquecida")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="jornadas por transação")
+    args = parser.parse_args()
+
+    init_db()
+    regras = {chave: valor for chave, valor in (
+        ('tolerancia_duplicada', args.tolerancia),
+        ('intervalo_maximo', args.intervalo_maximo),
+        ('trecho_maximo', args.trecho_maximo),
+    ) if valor is not None}
+
+    if args.dia:
+        with engine.connect() as conn:
+            j = MarcacaoService.jornada(conn, int(args.dia[0]), _data(args.dia[1]), regras)
+        if j is None:
+            print("⚠️ Nenhuma jornada começa nesse dia")
+        else:
+            print(f"🕒 Funcionário {j.funcionario_id} em {args.dia[1]}: {j.marcacoes} marcação(ões)")
+            for n, (inicio, fim) in enumerate(j.segmentos):
+                if n:
+                    print(f"   intervalo  {_hora(j.segmentos[n - 1][1])} - {_hora(inicio)}")
+                print(f"   trabalho   {_hora(inicio)} - {_hora(fim)}")
+            if j.marcacoes % 2:
+                print(f"   ⚠️ marcação sem par às {_hora((j.ultimo_dia - j.data) * MINUTOS_POR_DIA + j.saida)}")
+            print(f"   entrada {_hora(j.entrada)}, saída {_hora(j.saida)}, intervalos {j.intervalo} min")
+
+    if args.derivar:
+        inicio = relogio.perf_counter()
+
+        def mostrar(marcacoes, jornadas):
+            print(f"   ... {marcacoes} marcação(ões) lida(s), {jornadas} jornada(s) gravada(s)")
+
+        r = MarcacaoService.derivar(args.de, args.ate, [args.funcionario] if args.funcionario else None,
+                                    regras, args.lote, mostrar)
+        print(f"✅ {r['jornadas']} jornada(s) de {r['marcacoes']} marcação(ões) em "
+              f"{relogio.perf_counter() - inicio:.1f}s")
+        print(f"   repetidas: {r['duplicadas']}  ímpares: {r['impares']}  "
+              f"incompletas: {r['incompletas']}  dias absorvidos removidos: {r['removidas']}")
+        for mensagem in r['mensagens'][:10]:
+            print(f"   ⚠️ {mensagem}")
@@ -39,6 +39,12 @@ def verificar_e_migrar():
     else:
         print("✅ Coluna 'empresa_id' já existe")
     
+    # Índices e restrições declarados nos modelos
+    print("➕ Verificando índices de 'registros_jornada'...")
+    from models.migracoes import aplicar_migracoes
+    aplicar_migracoes(engine)
+    print("✅ Índices atualizados")
+    
     print("\n🎉 Migração concluída com sucesso!")
     print("\n📋 Próximos passos:")
     print("1. Execute o sistema normalmente: python app.py")
@@ -0,0 +1,350 @@
+"""
+services/recalculo_service.py
+Recálculo em lote das horas de um funcionário depois de mudar a carga
+horária ou o valor da hora no cadastro
+
+registros_jornada guarda extras/faltas calculadas com a carga da época do
+lançamento. A tela de cadastro agenda um recálculo (tabela
+recalculos_jornada) na mesma transação da alteração, e ele roda em lotes:
+cada lote lê até TAMANHO_LOTE registros do funcionário em ordem de data
+(índice funcionario_id + data), recalcula com CalculoService.calcular_lote e
+grava só as linhas que mudaram com um único UPDATE (executemany), junto com
+o ponto de retomada, na mesma transação. Se o processo parar, a próxima
+execução continua do último lote gravado.
+
+resumo_mensal acompanha pelos gatilhos; no fim, os fechamentos mensais já
+gravados para os meses afetados são atualizados.
+
+    python -m services.recalculo_service                      # retoma os pendentes
+    python -m services.recalculo_service --funcionario 12 --desde 01/01/2024
+    python -m services.recalculo_service --listar
+"""
+import threading
+from datetime import datetime
+from sqlalchemy import Integer, bindparam, select, type_coerce, update
+from sqlalchemy.orm import Session
+from models.database import engine
+from models.fechamento_mensal import FechamentoMensal
+from models.funcionario import Funcionario
+from models.recalculo_jornada import RecalculoJornada
+from models.registro_jornada import RegistroJornada
+from models.resumo_mensal import ResumoMensal
+from models.tipos import centesimos_para_horas, horas_para_centesimos
+from services.calculo_service import CalculoService
+
+# Registros lidos e gravados por transação
+TAMANHO_LOTE = 5000
+
+# Um recálculo por vez no processo (tela e retomada no aquecimento)
+_lock = threading.Lock()
+
+_registros = RegistroJornada.__table__
+
+# Centésimos já convertidos: o tipo da coluna não converte de novo
+_ATUALIZAR_REGISTROS = update(_registros).where(
+    _registros.c.id == bindparam('b_id')
+).values(
+    horas_trabalhadas=bindparam('b_trabalhadas', type_=Integer),
+    horas_extras=bindparam('b_extras', type_=Integer),
+    horas_faltantes=bindparam('b_faltantes', type_=Integer)
+)
+
+
+def _bruto(coluna):
+    """Valor inteiro gravado (minutos nos horários, centésimos nas horas), sem a conversão do tipo"""
+    return type_coerce(coluna, Integer)
+
+
+class RecalculoService:
+
+    @staticmethod
+    def tipo_alteracao(carga_antiga, carga_nova, valor_antigo, valor_novo):
+        """'carga', 'valor' ou None conforme o que mudou no cadastro"""
+        if carga_antiga != carga_nova:
+            return 'carga'
+        if valor_antigo != valor_novo:
+            return 'valor'
+        return None
+
+    @staticmethod
+    def agendar(db, funcionario_id, tipo='carga', motivo=None, data_inicio=None):
+        """
+        Agenda o recálculo do funcionário na sessão (quem chama faz o commit)
+
+        Já havendo um pendente para o funcionário, ele é reaproveitado e
+        recomeça do início, cobrindo os dois períodos.
+
+        Args:
+            tipo: 'carga' (recalcula os registros) ou 'valor' (só os fechamentos)
+            data_inicio: primeiro dia afetado (None = todo o histórico)
+
+        Returns:
+            RecalculoJornada
+        """
+        pendente = db.execute(
+            select(RecalculoJornada).where(
+                RecalculoJornada.funcionario_id == funcionario_id,
+                RecalculoJornada.concluido_em.is_(None)
+            )
+        ).scalars().first()
+
+        if pendente is None:
+            pendente = RecalculoJornada(
+                funcionario_id=funcionario_id,
+                tipo=tipo,
+                data_inicio=data_inicio,
+                registros=0,
+                motivo=motivo,
+                criado_em=datetime.now()
+            )
+            db.add(pendente)
+            return pendente
+
+        if tipo == 'carga':
+            pendente.tipo = 'carga'
+        if pendente.data_inicio is not None:
+            pendente.data_inicio = None if data_inicio is None else min(pendente.data_inicio, data_inicio)
+        pendente.ultima_data = None
+        pendente.registros = 0
+        pendente.motivo = motivo or pendente.motivo
+        return pendente
+
+    @staticmethod
+    def pendentes(db):
+        return db.execute(
+            select(RecalculoJornada)
+            .where(RecalculoJornada.concluido_em.is_(None))
+            .order_by(RecalculoJornada.id)
+        ).scalars().all()
+
+    @staticmethod
+    def executar(recalculo_id=None, lote=TAMANHO_LOTE, progresso=None, cancelado=None, bind=None):
+        """
+        Executa os recálculos pendentes (ou só um), retomando de onde pararam
+
+        Args:
+            progresso: callable(funcionario_id, registros_recalculados)
+            cancelado: callable() -> True para parar entre lotes (retomável depois)
+
+        Returns:
+            list: dicts {id, funcionario_id, tipo, registros, alterados,
+                  fechamentos, concluido}
+        """
+        bind = bind or engine
+        with _lock:
+            consulta = select(RecalculoJornada.id).where(
+                RecalculoJornada.concluido_em.is_(None)
+            ).order_by(RecalculoJornada.id)
+            if recalculo_id is not None:
+                consulta = consulta.where(RecalculoJornada.id == recalculo_id)
+            with bind.connect() as conn:
+                ids = conn.execute(consulta).scalars().all()
+
+            resultados = []
+            for id_ in ids:
+                resultado = RecalculoService._executar_um(bind, id_, lote, progresso, cancelado)
+                resultados.append(resultado)
+                if not resultado['concluido']:
+                    break
+            return resultados
+
+    @staticmethod
+    def _executar_um(bind, recalculo_id, lote, progresso, cancelado):
+        r = RegistroJornada
+        tabela = RecalculoJornada.__table__
+        resultado = {'id': recalculo_id, 'funcionario_id': None, 'tipo': None,
+                     'registros': 0, 'alterados': 0, 'fechamentos': 0, 'concluido': False}
+
+        while True:
+            if cancelado and cancelado():
+                return resultado
+
+            with bind.begin() as conn:
+                # Relido a cada lote: um novo agendamento pode ter reiniciado o ponto de retomada
+                job = conn.execute(select(tabela).where(tabela.c.id == recalculo_id)).first()
+                if job is None or job.concluido_em is not None:
+                    resultado['concluido'] = True
+                    return resultado
+                resultado.update(funcionario_id=job.funcionario_id, tipo=job.tipo, registros=job.registros)
+                if job.tipo != 'carga':
+                    break
+
+                carga = conn.execute(
+                    select(Funcionario.carga_horaria_diaria).where(Funcionario.id == job.funcionario_id)
+                ).scalar()
+                if carga is None:
+                    # Funcionário excluído: nada a recalcular
+                    break
+
+                consulta = select(
+                    r.id, r.data,
+                    _bruto(r.hora_entrada).label('entrada'),
+                    _bruto(r.hora_saida).label('saida'),
+                    _bruto(r.intervalo).label('intervalo'),
+                    _bruto(r.horas_trabalhadas).label('trabalhadas'),
+                    _bruto(r.horas_extras).label('extras'),
+                    _bruto(r.horas_faltantes).label('faltantes')
+                ).where(r.funcionario_id == job.funcionario_id)
+                if job.data_inicio is not None:
+                    consulta = consulta.where(r.data >= job.data_inicio)
+                if job.ultima_data is not None:
+                    consulta = consulta.where(r.data > job.ultima_data)
+
+                linhas = conn.execute(consulta.order_by(r.data).limit(lote)).all()
+                if not linhas:
+                    break
+
+                calculado = CalculoService.calcular_lote(
+                    [l.entrada for l in linhas],
+                    [l.saida for l in linhas],
+                    [centesimos_para_horas(l.intervalo or 0) for l in linhas],
+                    carga
+                )
+                mudancas = []
+                for l, trabalhadas, extras, faltantes in zip(
+                    linhas,
+                    calculado['horas_trabalhadas'],
+                    calculado['horas_extras'],
+                    calculado['horas_faltantes']
+                ):
+                    # Mesma conversão do tipo HorasCentesimos
+                    novos = (horas_para_centesimos(trabalhadas), horas_para_centesimos(extras),
+                             horas_para_centesimos(faltantes))
+                    if novos != (l.trabalhadas, l.extras, l.faltantes):
+                        mudancas.append({'b_id': l.id, 'b_trabalhadas': novos[0],
+                                         'b_extras': novos[1], 'b_faltantes': novos[2]})
+                if mudancas:
+                    conn.execute(_ATUALIZAR_REGISTROS, mudancas)
+
+                conn.execute(update(tabela).where(tabela.c.id == recalculo_id).values(
+                    ultima_data=linhas[-1].data,
+                    registros=tabela.c.registros + len(linhas)
+                ))
+
+            resultado['registros'] = job.registros + len(linhas)
+            resultado['alterados'] += len(mudancas)
+            if progresso:
+                progresso(job.funcionario_id, resultado['registros'])
+
+        with bind.begin() as conn:
+            resultado['fechamentos'] = RecalculoService.atualizar_fechamentos(
+                conn, job.funcionario_id, job.data_inicio, zerar_divergencias=(job.tipo == 'carga')
+            )
+            conn.execute(update(tabela).where(tabela.c.id == recalculo_id).values(
+                concluido_em=datetime.now()
+            ))
+        resultado['concluido'] = True
+        return resultado
+
+    @staticmethod
+    def atualizar_fechamentos(conn, funcionario_id, data_inicio=None, zerar_divergencias=False):
+        """
+        Atualiza os fechamentos mensais já gravados do funcionário com o
+        resumo_mensal atual e o valor da hora do cadastro
+
+        Returns:
+            int: fechamentos atualizados
+        """
+        f = FechamentoMensal
+        rm = ResumoMensal
+        consulta = select(
+            f.ano, f.mes, Funcionario.valor_hora,
+            _bruto(rm.horas_trabalhadas).label('trabalhadas'),
+            _bruto(rm.horas_extras).label('extras'),
+            _bruto(rm.horas_faltantes).label('faltantes'),
+            rm.num_registros
+        ).join(
+            Funcionario, Funcionario.id == f.funcionario_id
+        ).outerjoin(
+            rm, (rm.funcionario_id == f.funcionario_id) & (rm.ano == f.ano) & (rm.mes == f.mes)
+        ).where(f.funcionario_id == funcionario_id)
+        if data_inicio is not None:
+            consulta = consulta.where(f.ano * 100 + f.mes >= data_inicio.year * 100 + data_inicio.month)
+
+        linhas = conn.execute(consulta).all()
+        if not linhas:
+            return 0
+
+        valores = {
+            'horas_trabalhadas': bindparam('b_trabalhadas', type_=Integer),
+            'horas_extras': bindparam('b_extras', type_=Integer),
+            'horas_faltantes': bindparam('b_faltantes', type_=Integer),
+            'valor_hora': bindparam('b_valor_hora'),
+            'valor_extras': bindparam('b_valor_extras'),
+            'num_registros': bindparam('b_num_registros'),
+            'fechado_em': bindparam('b_fechado_em'),
+        }
+        if zerar_divergencias:
+            valores['divergencias'] = 0
+
+        agora = datetime.now()
+        conn.execute(
+            update(f.__table__).where(
+                f.__table__.c.funcionario_id == funcionario_id,
+                f.__table__.c.ano == bindparam('b_ano'),
+                f.__table__.c.mes == bindparam('b_mes')
+            ).values(**valores),
+            [
+                {
+                    'b_ano': l.ano,
+                    'b_mes': l.mes,
+                    # Centésimos, como no resumo; valor igual ao do fechamento_service
+                    'b_trabalhadas': l.trabalhadas or 0,
+                    'b_extras': l.extras or 0,
+                    'b_faltantes': l.faltantes or 0,
+                    'b_valor_hora': l.valor_hora,
+                    'b_valor_extras': CalculoService.calcular_valor_horas_extras(
+                        centesimos_para_horas(l.extras or 0), l.valor_hora
+                    ),
+                    'b_num_registros': l.num_registros or 0,
+                    'b_fechado_em': agora,
+                }
+                for l in linhas
+            ]
+        )
+        return len(linhas)
+
+
+def _data(texto):
+    return datetime.strptime(texto, '%d/%m/%Y').date()
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="Recálculo das horas gravadas após mudança no cadastro")
+    parser.add_argument('--funcionario', type=int, help="agenda o recálculo deste funcionário antes de executar")
+    parser.add_argument('--desde', type=_data, help="primeiro dia a recalcular DD/MM/AAAA (padrão: tudo)")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE)
+    parser.add_argument('--listar', action='store_true', help="só lista os recálculos pendentes")
+    args = parser.parse_args()
+
+    init_db()
+
+    if args.funcionario:
+        with Session(engine) as db:
+            RecalculoService.agendar(db, args.funcionario, 'carga', motivo="linha de comando",
+                                     data_inicio=args.desde)
+            db.commit()
+
+    if args.listar:
+        with Session(engine) as db:
+            pendentes = RecalculoService.pendentes(db)
+            for p in pendentes:
+                ponto = f"parado em {p.ultima_data:%d/%m/%Y}" if p.ultima_data else "não iniciado"
+                print(f"⏳ #{p.id} funcionário {p.funcionario_id} ({p.tipo}) {ponto}: {p.motivo or ''}")
+            if not pendentes:
+                print("✅ Nenhum recálculo pendente")
+    else:
+        def mostrar(funcionario_id, registros):
+            print(f"\r   funcionário {funcionario_id}: {registros} registro(s)", end='', flush=True)
+
+        resultados = RecalculoService.executar(lote=args.lote, progresso=mostrar)
+        if resultados:
+            print()
+        for r in resultados:
+            print(f"✅ #{r['id']} funcionário {r['funcionario_id']}: {r['registros']} registro(s) lidos, "
+                  f"{r['alterados']} alterado(s), {r['fechamentos']} fechamento(s) atualizado(s)")
+        if not resultados:
+            print("✅ Nenhum recálculo pendente")
@@ -0,0 +1,391 @@
+"""
+services/regras_service.py
+Valor das horas extras pelas regras da CLT e das convenções coletivas
+
+CalculoService.calcular_valor_horas_extras aplica 50% a toda hora extra. Aqui
+cada empresa tem suas regras (tabela regras_empresa; sem linha = CLT):
+
+    extras em dia útil          percentual_extra (50%), e percentual_excedente
+                                acima de horas_faixa por dia, se houver
+    domingos e feriados         todas as horas trabalhadas a percentual_descanso (100%);
+                                feriados do calendário da localidade da empresa
+    adicional noturno           22h às 5h, 20%, hora noturna de 52m30s; extra
+                                noturna recebe os dois adicionais
+
+As regras são compiladas uma vez por empresa (TabelaRegras) em uma tabela de
+minutos noturnos acumulados para dois dias seguidos. Os minutos noturnos de
+qualquer trecho da jornada saem de duas consultas à tabela, então dividir uma
+jornada nas faixas de pagamento é uma conta fixa, feita para o mês inteiro de
+uma vez com numpy (valorar_lote).
+
+    python -m services.regras_service --mes 11/2024 [--empresa 3]
+    python -m services.regras_service --definir 3 --extra 0.6 --faixa 2 --excedente 0.8
+"""
+import itertools
+import threading
+from datetime import time
+from sqlalchemy import Integer, select, type_coerce
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.regra_empresa import RegraEmpresa
+from models.registro_jornada import RegistroJornada
+from models.tipos import centesimos_para_horas
+from services.calculo_service import MINUTOS_POR_DIA, CalculoService
+from services.calendario_service import DOMINGO, CalendarioService, dias_desde_epoca
+
+# numpy é opcional; sem ele, valorar_lote usa um laço em Python puro
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Regras padrão (CLT)
+REGRAS_CLT = {
+    'percentual_extra': 0.5,
+    'horas_faixa': None,
+    'percentual_excedente': None,
+    'percentual_descanso': 1.0,
+    'adicional_noturno': 0.2,
+    'inicio_noturno': time(22, 0),
+    'fim_noturno': time(5, 0),
+    'hora_noturna_reduzida': True,
+}
+
+# Hora noturna reduzida: 52m30s de relógio valem uma hora
+MINUTOS_HORA_NOTURNA = 52.5
+
+# Totais devolvidos por valorar_periodo
+_CAMPOS = ('horas_extras', 'horas_extras_descanso', 'horas_noturnas', 'valor_extras', 'valor_noturno')
+
+
+def _minutos(valor):
+    if isinstance(valor, time):
+        return valor.hour * 60 + valor.minute
+    return int(valor)
+
+
+class TabelaRegras:
+    """Regras de uma empresa compiladas para valorar jornadas em lote"""
+
+    def __init__(self, regras=None):
+        r = dict(REGRAS_CLT)
+        r.update({k: v for k, v in (regras or {}).items() if v is not None})
+        self.regras = r
+
+        self.percentual_extra = r['percentual_extra']
+        self.percentual_excedente = (r['percentual_excedente'] if r['percentual_excedente'] is not None
+                                     else r['percentual_extra'])
+        # Sem faixa: todas as extras do dia na primeira
+        self.minutos_faixa = (int(round(r['horas_faixa'] * 60)) if r['horas_faixa'] is not None
+                              else 2 * MINUTOS_POR_DIA)
+        self.percentual_descanso = r['percentual_descanso']
+        self.adicional_noturno = r['adicional_noturno']
+        self.fator_noturno = 60 / MINUTOS_HORA_NOTURNA if r['hora_noturna_reduzida'] else 1.0
+
+        # acumulado[m] = minutos noturnos entre 0h do primeiro dia e o minuto m
+        # (dois dias: jornada que passa da meia-noite termina no segundo)
+        inicio, fim = _minutos(r['inicio_noturno']), _minutos(r['fim_noturno'])
+        acumulado = [0]
+        for m in range(2 * MINUTOS_POR_DIA):
+            minuto = m % MINUTOS_POR_DIA
+            if inicio > fim:
+                noturno = minuto >= inicio or minuto < fim
+            else:
+                noturno = inicio <= minuto < fim
+            acumulado.append(acumulado[-1] + noturno)
+        self.acumulado = acumulado
+        self._acumulado = np.asarray(acumulado, dtype=np.int64) if np is not None else None
+
+    def segmentar(self, entrada, saida, intervalo, minutos_extras):
+        """
+        Minutos de relógio da jornada em cada faixa de pagamento
+
+        As extras são os últimos minutos da jornada e o intervalo é descontado
+        primeiro da parte diurna do horário normal.
+
+        Args:
+            entrada, saida: minutos desde a meia-noite (saída menor = dia seguinte)
+            intervalo: minutos de intervalo
+            minutos_extras: minutos pagos como extra
+
+        Returns:
+            tuple: (extras_diurnas_faixa1, extras_noturnas_faixa1,
+                    extras_diurnas_faixa2, extras_noturnas_faixa2, noturnas_normais)
+        """
+        a = self.acumulado
+        fim = saida + MINUTOS_POR_DIA if saida < entrada else saida
+        extras = min(max(minutos_extras, 0), fim - entrada)
+        inicio_extras = fim - extras
+        fim_faixa = min(inicio_extras + self.minutos_faixa, fim)
+
+        noturnas_1 = a[fim_faixa] - a[inicio_extras]
+        noturnas_2 = a[fim] - a[fim_faixa]
+        noturnas_normal = a[inicio_extras] - a[entrada]
+        diurnas_normal = (inicio_extras - entrada) - noturnas_normal
+        noturnas_normal = max(0, noturnas_normal - max(0, intervalo - diurnas_normal))
+
+        return (fim_faixa - inicio_extras - noturnas_1, noturnas_1,
+                fim - fim_faixa - noturnas_2, noturnas_2, noturnas_normal)
+
+    def _valores(self, segmentos, percentual_1, percentual_2, valor_hora):
+        """Horas e valores a partir dos minutos de cada faixa (escalares ou arrays)"""
+        d1, n1, d2, n2, nn = segmentos
+        f = self.fator_noturno
+        noturno = 1 + self.adicional_noturno
+        return {
+            'horas_extras': (d1 + n1 + d2 + n2) / 60,
+            'horas_noturnas': (n1 + n2 + nn) * f / 60,
+            'valor_extras': valor_hora / 60 * (
+                (d1 + n1 * f * noturno) * (1 + percentual_1)
+                + (d2 + n2 * f * noturno) * (1 + percentual_2)
+            ),
+            'valor_noturno': valor_hora / 60 * nn * f * self.adicional_noturno,
+        }
+
+    def valorar_lote(self, entradas_min, saidas_min, intervalos, cargas_horarias, descansos, valores_hora):
+        """
+        Horas e valores de várias jornadas de uma vez
+
+        Args:
+            entradas_min, saidas_min: minutos desde a meia-noite
+            intervalos: horas de intervalo
+            cargas_horarias: carga diária em horas
+            descansos: True para domingo/feriado (todas as horas são extras)
+            valores_hora: valor da hora normal de cada jornada
+
+        Returns:
+            dict: arrays (ou listas, sem numpy) horas_extras, horas_extras_descanso,
+                  horas_noturnas, valor_extras, valor_noturno
+        """
+        calculo = CalculoService.calcular_lote(entradas_min, saidas_min, intervalos, cargas_horarias)
+        if np is None:
+            return self._valorar_lote_python(entradas_min, saidas_min, intervalos, descansos,
+                                             valores_hora, calculo)
+
+        entradas = np.asarray(entradas_min, dtype=np.int64)
+        saidas = np.asarray(saidas_min, dtype=np.int64)
+        fim = np.where(saidas < entradas, saidas + MINUTOS_POR_DIA, saidas)
+        intervalo = np.rint(np.asarray(intervalos, dtype=np.float64) * 60)
+        descanso = np.asarray(descansos, dtype=bool)
+
+        extras_h = np.where(descanso, calculo['horas_trabalhadas'], calculo['horas_extras'])
+        extras = np.clip(np.rint(extras_h * 60).astype(np.int64), 0, fim - entradas)
+        inicio_extras = fim - extras
+        fim_faixa = np.minimum(inicio_extras + self.minutos_faixa, fim)
+
+        a = self._acumulado
+        noturnas_1 = a[fim_faixa] - a[inicio_extras]
+        noturnas_2 = a[fim] - a[fim_faixa]
+        noturnas_normal = a[inicio_extras] - a[entradas]
+        diurnas_normal = (inicio_extras - entradas) - noturnas_normal
+        noturnas_normal = np.maximum(0, noturnas_normal - np.maximum(0, intervalo - diurnas_normal))
+
+        segmentos = (fim_faixa - inicio_extras - noturnas_1, noturnas_1,
+                     fim - fim_faixa - noturnas_2, noturnas_2, noturnas_normal)
+        resultado = self._valores(
+            segmentos,
+            np.where(descanso, self.percentual_descanso, self.percentual_extra),
+            np.where(descanso, self.percentual_descanso, self.percentual_excedente),
+            np.asarray(valores_hora, dtype=np.float64)
+        )
+        resultado['horas_extras_descanso'] = np.where(descanso, resultado['horas_extras'], 0.0)
+        return resultado
+
+    def _valorar_lote_python(self, entradas_min, saidas_min, intervalos, descansos, valores_hora, calculo):
+        """Fallback de valorar_lote sem numpy"""
+        resultado = {'horas_extras': [], 'horas_extras_descanso': [], 'horas_noturnas': [],
+                     'valor_extras': [], 'valor_noturno': []}
+        for entrada, saida, intervalo, descanso, valor_hora, trabalhadas, extras in zip(
+            entradas_min, saidas_min, intervalos, descansos, valores_hora,
+            calculo['horas_trabalhadas'], calculo['horas_extras']
+        ):
+            minutos_extras = round((trabalhadas if descanso else extras) * 60)
+            segmentos = self.segmentar(int(entrada), int(saida), round(intervalo * 60), minutos_extras)
+            percentual_1 = self.percentual_descanso if descanso else self.percentual_extra
+            percentual_2 = self.percentual_descanso if descanso else self.percentual_excedente
+            valores = self._valores(segmentos, percentual_1, percentual_2, valor_hora)
+            valores['horas_extras_descanso'] = valores['horas_extras'] if descanso else 0.0
+            for chave, valor in valores.items():
+                resultado[chave].append(valor)
+        return resultado
+
+
+# Tabelas compiladas por empresa (None = CLT), montadas na primeira consulta
+_tabelas = None
+_lock = threading.Lock()
+
+
+class RegrasService:
+
+    @staticmethod
+    def tabelas(db):
+        """TabelaRegras de cada empresa com regra própria e a da CLT (chave None)"""
+        global _tabelas
+        with _lock:
+            if _tabelas is None:
+                tabelas = {None: TabelaRegras()}
+                for regra in db.execute(select(RegraEmpresa)).scalars():
+                    tabelas[regra.empresa_id] = TabelaRegras(regra.to_dict())
+                _tabelas = tabelas
+            return _tabelas
+
+    @staticmethod
+    def tabela(db, empresa_id):
+        tabelas = RegrasService.tabelas(db)
+        return tabelas.get(empresa_id, tabelas[None])
+
+    @staticmethod
+    def invalidar():
+        """Descarta as tabelas compiladas (chamar depois de alterar regras_empresa)"""
+        global _tabelas
+        with _lock:
+            _tabelas = None
+
+    @staticmethod
+    def definir(db, empresa_id, **regras):
+        """Grava as regras da empresa (campos omitidos ficam com o valor da CLT); quem chama faz o commit"""
+        valores = dict(REGRAS_CLT)
+        valores.update(regras)
+        regra = db.get(RegraEmpresa, empresa_id) or RegraEmpresa(empresa_id=empresa_id)
+        for campo, valor in valores.items():
+            setattr(regra, campo, valor)
+        db.add(regra)
+        RegrasService.invalidar()
+        return regra
+
+    @staticmethod
+    def valorar_periodo(db, data_inicio, data_fim, empresa_id=None, feriados=None):
+        """
+        Horas extras, adicional noturno e valores por funcionário no período
+
+        Args:
+            feriados: conjunto de datas no lugar dos feriados do calendário da empresa
+
+        Returns:
+            list: dicts funcionario_id, nome, empresa_id, horas_extras,
+                  horas_extras_descanso, horas_noturnas, valor_extras,
+                  valor_noturno, valor_total (ordenado por funcionário)
+        """
+        conn = db.connection()
+        if feriados is not None:
+            dias_feriado = {dias_desde_epoca(d) for d in feriados}
+        else:
+            localidades = dict(conn.execute(select(Empresa.id, Empresa.localidade)).all())
+
+        r = RegistroJornada
+        consulta = select(
+            Funcionario.empresa_id,
+            Funcionario.id,
+            Funcionario.nome,
+            Funcionario.valor_hora,
+            Funcionario.carga_horaria_diaria,
+            type_coerce(r.data, Integer),
+            type_coerce(r.hora_entrada, Integer),
+            type_coerce(r.hora_saida, Integer),
+            type_coerce(r.intervalo, Integer)
+        ).join(
+            r, r.funcionario_id == Funcionario.id
+        ).where(
+            r.data.between(data_inicio, data_fim)
+        ).order_by(Funcionario.empresa_id, Funcionario.id)
+        if empresa_id:
+            consulta = consulta.where(Funcionario.empresa_id == empresa_id)
+
+        resultado = []
+        linhas_por_empresa = itertools.groupby(conn.execute(consulta), key=lambda l: l[0])
+        for empresa, linhas in linhas_por_empresa:
+            colunas = list(zip(*linhas))
+            calendario = CalendarioService.calendario(
+                conn, localidades.get(empresa) if feriados is None else None,
+                data_inicio.year, data_fim.year
+            )
+            descansos = calendario.descanso_lote(colunas[5])
+            if feriados is not None:
+                # Feriados informados substituem os do calendário; domingos continuam
+                descansos = [
+                    bool(tipo & DOMINGO) or dia in dias_feriado
+                    for dia, tipo in zip(colunas[5], calendario.tipos_lote(colunas[5]))
+                ]
+            valores = RegrasService.tabela(db, empresa).valorar_lote(
+                colunas[6], colunas[7], [centesimos_para_horas(i or 0) for i in colunas[8]], colunas[4], descansos, colunas[3]
+            )
+
+            # Linhas ordenadas por funcionário: soma cada trecho contíguo
+            ids = colunas[1]
+            inicios = [0] + [i for i in range(1, len(ids)) if ids[i] != ids[i - 1]]
+            somas = {campo: _somar_trechos(valores[campo], inicios) for campo in _CAMPOS}
+            for n, i in enumerate(inicios):
+                t = {'funcionario_id': ids[i], 'nome': colunas[2][i], 'empresa_id': empresa}
+                t.update({campo: round(float(somas[campo][n]), 2) for campo in _CAMPOS})
+                t['valor_total'] = round(t['valor_extras'] + t['valor_noturno'], 2)
+                resultado.append(t)
+
+        resultado.sort(key=lambda t: t['funcionario_id'])
+        return resultado
+
+
+def _somar_trechos(valores, inicios):
+    """Soma de valores[inicios[n]:inicios[n + 1]] para cada n"""
+    if np is not None:
+        return np.add.reduceat(np.asarray(valores, dtype=np.float64), inicios)
+    fins = inicios[1:] + [len(valores)]
+    return [sum(valores[i:f]) for i, f in zip(inicios, fins)]
+
+
+def _competencia(texto):
+    mes, ano = texto.split('/')
+    return int(ano), int(mes)
+
+
+if __name__ == "__main__":
+    import argparse
+    from sqlalchemy.orm import Session
+    from models.database import engine, init_db
+    from services.relatorio_service import RelatorioService
+
+    parser = argparse.ArgumentParser(description="Valor das horas extras pelas regras de cada empresa")
+    parser.add_argument('--mes', type=_competencia, help="competência MM/AAAA (padrão: mês passado)")
+    parser.add_argument('--empresa', type=int, help="só esta empresa")
+    parser.add_argument('--definir', type=int, metavar='EMPRESA', help="grava as regras da empresa e sai")
+    parser.add_argument('--extra', type=float, help="percentual das extras em dia útil (0.5 = 50%%)")
+    parser.add_argument('--faixa', type=float, help="horas extras por dia pagas com --extra")
+    parser.add_argument('--excedente', type=float, help="percentual das extras acima de --faixa")
+    parser.add_argument('--descanso', type=float, help="percentual em domingos e feriados")
+    parser.add_argument('--noturno', type=float, help="adicional noturno (0.2 = 20%%)")
+    parser.add_argument('--sem-reducao', action='store_true', help="hora noturna de 60 minutos")
+    args = parser.parse_args()
+
+    init_db()
+    with Session(engine) as db:
+        if args.definir:
+            regras = {
+                'percentual_extra': args.extra,
+                'horas_faixa': args.faixa,
+                'percentual_excedente': args.excedente,
+                'percentual_descanso': args.descanso,
+                'adicional_noturno': args.noturno,
+                'hora_noturna_reduzida': not args.sem_reducao,
+            }
+            RegrasService.definir(db, args.definir, **{k: v for k, v in regras.items() if v is not None})
+            db.commit()
+            print(f"✅ Regras da empresa {args.definir} gravadas")
+        else:
+            if args.mes:
+                data_inicio, data_fim = RelatorioService.mes(*args.mes)
+            else:
+                data_inicio, data_fim = RelatorioService.periodo("Mês passado")
+
+            linhas = RegrasService.valorar_periodo(db, data_inicio, data_fim, empresa_id=args.empresa)
+            print(f"📅 {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}: {len(linhas)} funcionário(s)")
+            por_empresa = {}
+            for l in linhas:
+                e = por_empresa.setdefault(l['empresa_id'], [0.0, 0.0, 0.0, 0.0])
+                e[0] += l['horas_extras']
+                e[1] += l['horas_noturnas']
+                e[2] += l['valor_extras']
+                e[3] += l['valor_noturno']
+            for empresa_id, (extras, noturnas, valor_extras, valor_noturno) in sorted(
+                por_empresa.items(), key=lambda i: (i[0] is None, i[0] or 0)
+            ):
+                print(f"   empresa {empresa_id or '-'}: {extras:10.2f}h extras  {noturnas:9.2f}h noturnas  "
+                      f"R$ {valor_extras:12,.2f} extras  R$ {valor_noturno:10,.2f} adicional noturno")
@@ -0,0 +1,307 @@
+"""
+services/relatorio_service.py
+Relatórios de horas sem interface gráfica: períodos, totais, saldos e
+fechamento mensal em lote
+
+A tela de relatórios usa as mesmas funções; o fechamento roda por linha de
+comando (ex.: cron), gera um arquivo por empresa em streaming e termina com
+código de saída:
+
+    python -m services.relatorio_service --mes 11/2024 --formato csv --pasta fechamento
+    python -m services.relatorio_service --inicio 01/11/2024 --fim 15/11/2024 --empresa 3 --formato xlsx
+
+    0  todos os arquivos gerados
+    1  falha em alguma empresa (as demais são geradas mesmo assim)
+    2  argumentos inválidos ou nenhuma empresa para gerar
+"""
+import json
+import os
+import re
+import unicodedata
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.database import engine
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.resumo_mensal import ResumoMensal
+from services.calculo_service import CalculoService
+from services.diretorio_service import DiretorioService
+from services.exportacao_service import ExportacaoService
+from services.resumo_service import SEM_EMPRESA, ResumoService
+
+# Opções de período da tela de relatórios
+PERIODOS = ("Últimos 7 dias", "Últimos 30 dias", "Este mês", "Mês passado")
+
+SAIDA_OK = 0
+SAIDA_FALHA = 1
+SAIDA_USO = 2
+
+
+class RelatorioService:
+
+    # ------------------------------------------------------------- períodos
+
+    @staticmethod
+    def periodo(nome, hoje=None):
+        """(data_inicio, data_fim) de uma opção de PERIODOS (desconhecida = últimos 30 dias)"""
+        hoje = hoje or datetime.now().date()
+
+        if nome == "Últimos 7 dias":
+            return hoje - timedelta(days=7), hoje
+        if nome == "Este mês":
+            return hoje.replace(day=1), hoje
+        if nome == "Mês passado":
+            data_fim = hoje.replace(day=1) - timedelta(days=1)
+            return data_fim.replace(day=1), data_fim
+        return hoje - timedelta(days=30), hoje
+
+    @staticmethod
+    def mes(ano, mes):
+        """Primeiro e último dia da competência"""
+        inicio = date(ano, mes, 1)
+        proximo = (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return inicio, proximo - timedelta(days=1)
+
+    # --------------------------------------------------------------- totais
+
+    @staticmethod
+    def totalizar(resultados):
+        """
+        Valor das extras por funcionário e totais gerais
+
+        Args:
+            resultados: linhas de ResumoService.consultar_periodo
+
+        Returns:
+            dict: {'linhas': [(funcionario_id, nome, empresa, cargo, extras,
+                   faltantes, valor_extras)], 'total_extras', 'total_faltantes',
+                   'total_valor'}
+        """
+        linhas = []
+        total_extras = total_faltantes = total_valor = 0
+
+        for r in resultados:
+            h_extra = r.total_extras or 0
+            h_falta = r.total_faltantes or 0
+            valor = CalculoService.calcular_valor_horas_extras(h_extra, r.valor_hora)
+            linhas.append((r.funcionario_id, r.nome, r.empresa_nome or "Sem empresa",
+                           r.cargo, h_extra, h_falta, valor))
+            total_extras += h_extra
+            total_faltantes += h_falta
+            total_valor += valor
+
+        return {
+            'linhas': linhas,
+            'total_extras': total_extras,
+            'total_faltantes': total_faltantes,
+            'total_valor': total_valor,
+        }
+
+    @staticmethod
+    def gerar(db, data_inicio, data_fim, empresa_id=None, funcionario_id=None):
+        """Relatório do período já totalizado (ver totalizar)"""
+        return RelatorioService.totalizar(ResumoService.consultar_periodo(
+            db, data_inicio, data_fim, empresa_id=empresa_id, funcionario_id=funcionario_id
+        ))
+
+    # --------------------------------------------------------------- saldos
+
+    @staticmethod
+    def mensagem_saldo(total_extras, total_faltantes):
+        if total_extras > total_faltantes:
+            return f"✅ Sobra {total_extras - total_faltantes:.1f}h de horas extras"
+        if total_faltantes > total_extras:
+            return f"⚠️ Faltam {total_faltantes - total_extras:.1f}h para compensar"
+        return "⚖️ Saldo zero (extras = faltas)"
+
+    @staticmethod
+    def saldos(db):
+        """
+        Extras e faltas acumuladas de cada funcionário (todo o histórico)
+
+        Returns:
+            list: (funcionario_id, nome, empresa, total_extras, total_faltantes, mensagem)
+                  só de quem tem extras ou faltas, ordenado por nome
+        """
+        total_extras = func.coalesce(func.sum(ResumoMensal.horas_extras), 0)
+        total_faltantes = func.coalesce(func.sum(ResumoMensal.horas_faltantes), 0)
+
+        linhas = db.execute(
+            select(
+                Funcionario.id,
+                Funcionario.nome,
+                func.coalesce(Empresa.nome, 'Sem Empresa'),
+                total_extras,
+                total_faltantes
+            ).join(
+                ResumoMensal, ResumoMensal.funcionario_id == Funcionario.id
+            ).outerjoin(
+                Empresa, Funcionario.empresa_id == Empresa.id
+            ).group_by(
+                Funcionario.id, Funcionario.nome, Empresa.nome
+            ).having(
+                (total_extras > 0) | (total_faltantes > 0)
+            ).order_by(
+                Funcionario.nome, Funcionario.id
+            )
+        ).all()
+
+        return [
+            (func_id, nome, empresa, extras, faltas, RelatorioService.mensagem_saldo(extras, faltas))
+            for func_id, nome, empresa, extras, faltas in linhas
+        ]
+
+    # ------------------------------------------------------ fechamento em lote
+
+    @staticmethod
+    def nome_arquivo(data_inicio, data_fim, formato, empresa_id=None, empresa_nome=None):
+        """Ex.: horas_2024-11_0003_padaria-central.csv (mês inteiro) ou horas_20241101_20241115_..."""
+        inicio_mes, fim_mes = RelatorioService.mes(data_inicio.year, data_inicio.month)
+        if (data_inicio, data_fim) == (inicio_mes, fim_mes):
+            periodo = data_inicio.strftime('%Y-%m')
+        else:
+            periodo = f"{data_inicio:%Y%m%d}_{data_fim:%Y%m%d}"
+
+        if empresa_id is None:
+            return f"horas_{periodo}_todas.{formato}"
+
+        texto = unicodedata.normalize('NFKD', empresa_nome or '').encode('ascii', 'ignore').decode()
+        apelido = re.sub(r'[^a-z0-9]+', '-', texto.lower()).strip('-')[:40] or 'empresa'
+        return f"horas_{periodo}_{empresa_id:04d}_{apelido}.{formato}"
+
+    @staticmethod
+    def fechar_periodo(data_inicio, data_fim, pasta, formato='csv', empresas=None,
+                       consolidado=False, detalhe=False, progresso=None, bind=None):
+        """
+        Gera os arquivos do período, um por empresa (ou um só, se consolidado)
+
+        Funcionários sem empresa saem em um arquivo próprio ("Sem empresa",
+        empresa_id SEM_EMPRESA) para não ficarem de fora do fechamento.
+
+        Cada arquivo é escrito com um nome temporário e renomeado no fim, então
+        quem lê a pasta nunca vê um arquivo pela metade. Falha em uma empresa é
+        registrada e as demais continuam.
+
+        Args:
+            empresas: IDs das empresas (padrão: todas); SEM_EMPRESA inclui os sem empresa
+            consolidado: um arquivo com todos os funcionários em vez de um por empresa
+            progresso: callable(item) chamado ao terminar cada arquivo
+
+        Returns:
+            list: dicts {empresa_id, empresa, arquivo, linhas, erro}
+        """
+        bind = bind or engine
+        os.makedirs(pasta, exist_ok=True)
+
+        if consolidado:
+            alvos = [(None, None)]
+        else:
+            with Session(bind) as db:
+                alvos = [(e.id, e.nome) for e in DiretorioService.listar_empresas(db)
+                         if not empresas or e.id in empresas]
+                # Sem filtro, o arquivo "Sem empresa" só sai se houver alguém sem empresa
+                if (SEM_EMPRESA in (empresas or ())) or (not empresas and db.execute(
+                    select(Funcionario.id).where(Funcionario.empresa_id.is_(None)).limit(1)
+                ).first()):
+                    alvos.append((SEM_EMPRESA, "Sem empresa"))
+
+        resultados = []
+        for empresa_id, empresa_nome in alvos:
+            arquivo = os.path.join(pasta, RelatorioService.nome_arquivo(
+                data_inicio, data_fim, formato, empresa_id, empresa_nome
+            ))
+            temporario = arquivo + '.parcial'
+            item = {'empresa_id': empresa_id, 'empresa': empresa_nome or "Todas",
+                    'arquivo': arquivo, 'linhas': 0, 'erro': None}
+            try:
+                r = ExportacaoService.exportar(
+                    temporario, data_inicio, data_fim, empresa_id=empresa_id,
+                    detalhe=detalhe, formato=formato, bind=bind
+                )
+                os.replace(temporario, arquivo)
+                item['linhas'] = r['linhas']
+            except Exception as e:
+                item['erro'] = str(e)
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+            resultados.append(item)
+            if progresso:
+                progresso(item)
+
+        return resultados
+
+
+def _data(texto):
+    return datetime.strptime(texto, '%d/%m/%Y').date()
+
+def _competencia(texto):
+    mes, ano = texto.split('/')
+    return int(ano), int(mes)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from services.exportacao_service import FORMATOS
+    from models.database import init_db
+
+    parser = argparse.ArgumentParser(description="Fechamento de horas em lote (sem interface)")
+    periodo = parser.add_mutually_exclusive_group()
+    periodo.add_argument('--mes', type=_competencia,
+                         help="competência MM/AAAA (padrão: mês passado)")
+    periodo.add_argument('--inicio', type=_data, help="data inicial DD/MM/AAAA (exige --fim)")
+    parser.add_argument('--fim', type=_data, help="data final DD/MM/AAAA")
+    parser.add_argument('--empresa', type=int, action='append',
+                        help="ID da empresa (pode repetir; 0: sem empresa; padrão: todas)")
+    parser.add_argument('--consolidado', action='store_true',
+                        help="um único arquivo com todas as empresas")
+    parser.add_argument('--formato', choices=FORMATOS, default='csv')
+    parser.add_argument('--detalhe', action='store_true', help="inclui os registros diários")
+    parser.add_argument('--pasta', default='fechamento', help="pasta de destino")
+    args = parser.parse_args()
+
+    if args.inicio or args.fim:
+        if not (args.inicio and args.fim):
+            parser.error("--inicio e --fim devem ser usados juntos")
+        data_inicio, data_fim = args.inicio, args.fim
+    elif args.mes:
+        data_inicio, data_fim = RelatorioService.mes(*args.mes)
+    else:
+        data_inicio, data_fim = RelatorioService.periodo("Mês passado")
+
+    if data_inicio > data_fim:
+        parser.error("data inicial depois da final")
+
+    init_db()
+    print(f"📅 Fechamento de {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y} ({args.formato})")
+
+    def mostrar(item):
+        if item['erro']:
+            print(f"❌ {item['empresa']}: {item['erro']}")
+        else:
+            print(f"✅ {item['empresa']}: {item['linhas']} linhas em {item['arquivo']}")
+
+    resultados = RelatorioService.fechar_periodo(
+        data_inicio, data_fim, args.pasta, formato=args.formato, empresas=args.empresa,
+        consolidado=args.consolidado, detalhe=args.detalhe, progresso=mostrar
+    )
+
+    if not resultados:
+        print("⚠️ Nenhuma empresa encontrada para os filtros informados")
+        sys.exit(SAIDA_USO)
+
+    # Resumo da execução ao lado dos arquivos (útil para conferir o cron)
+    manifesto = os.path.join(args.pasta, f"fechamento_{data_inicio:%Y%m%d}_{data_fim:%Y%m%d}.json")
+    with open(manifesto, 'w', encoding='utf-8') as f:
+        json.dump({
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'inicio': data_inicio.isoformat(),
+            'fim': data_fim.isoformat(),
+            'formato': args.formato,
+            'arquivos': resultados,
+        }, f, ensure_ascii=False, indent=2)
+
+    falhas = sum(1 for r in resultados if r['erro'])
+    print(f"{'❌' if falhas else '✅'} {len(resultados) - falhas}/{len(resultados)} arquivo(s) gerado(s)")
+    sys.exit(SAIDA_FALHA if falhas else SAIDA_OK)
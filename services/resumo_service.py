@@ -0,0 +1,212 @@
+"""
+services/resumo_service.py
+Consultas de totais por período usando o resumo mensal materializado
+"""
+from datetime import timedelta
+from sqlalchemy import func, literal, select, tuple_, union_all
+from models.database import engine
+from models.empresa import Empresa
+from models.funcionario import Funcionario
+from models.registro_jornada import RegistroJornada
+from models.resumo_mensal import ResumoMensal, reconstruir_resumo
+
+# empresa_id que seleciona os funcionários sem empresa (empresa_id IS NULL);
+# nenhuma empresa real tem ID 0
+SEM_EMPRESA = 0
+
+class ResumoService:
+
+    @staticmethod
+    def dividir_periodo(data_inicio, data_fim):
+        """
+        Separa o período em meses completos e sobras nas pontas
+
+        Returns:
+            tuple: ((competencia_inicio, competencia_fim) ou None,
+                    lista de (inicio, fim) com os dias fora dos meses completos)
+                   competência = (ano, mês)
+        """
+        if data_inicio > data_fim:
+            return None, []
+
+        # Primeiro dia do primeiro mês completo
+        if data_inicio.day == 1:
+            primeiro = data_inicio
+        else:
+            primeiro = (data_inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+        # Último dia do último mês completo
+        dia_seguinte = data_fim + timedelta(days=1)
+        if dia_seguinte.day == 1:
+            ultimo = data_fim
+        else:
+            ultimo = data_fim.replace(day=1) - timedelta(days=1)
+
+        if primeiro > ultimo:
+            return None, [(data_inicio, data_fim)]
+
+        faixas = []
+        if data_inicio < primeiro:
+            faixas.append((data_inicio, primeiro - timedelta(days=1)))
+        if ultimo < data_fim:
+            faixas.append((ultimo + timedelta(days=1), data_fim))
+
+        competencias = ((primeiro.year, primeiro.month), (ultimo.year, ultimo.month))
+        return competencias, faixas
+
+    @staticmethod
+    def _fonte_periodo(data_inicio, data_fim, funcionario_id=None):
+        """Subquery com as linhas do resumo (meses completos) e dos registros (pontas)"""
+        competencias, faixas = ResumoService.dividir_periodo(data_inicio, data_fim)
+        partes = []
+
+        if competencias:
+            consulta = select(
+                ResumoMensal.funcionario_id,
+                ResumoMensal.horas_trabalhadas,
+                ResumoMensal.horas_extras,
+                ResumoMensal.horas_faltantes,
+                ResumoMensal.num_registros
+            ).where(
+                # Comparação de linha: usa o índice (ano, mes), ao contrário de ano * 100 + mes
+                tuple_(ResumoMensal.ano, ResumoMensal.mes) >= competencias[0],
+                tuple_(ResumoMensal.ano, ResumoMensal.mes) <= competencias[1]
+            )
+            if funcionario_id:
+                consulta = consulta.where(ResumoMensal.funcionario_id == funcionario_id)
+            partes.append(consulta)
+
+        # Período vazio (início depois do fim) cai em uma faixa sem linhas
+        if not competencias and not faixas:
+            faixas = [(data_inicio, data_fim)]
+
+        for inicio, fim in faixas:
+            consulta = select(
+                RegistroJornada.funcionario_id,
+                RegistroJornada.horas_trabalhadas,
+                RegistroJornada.horas_extras,
+                RegistroJornada.horas_faltantes,
+                literal(1).label('num_registros')
+            ).where(
+                RegistroJornada.data.between(inicio, fim)
+            )
+            if funcionario_id:
+                consulta = consulta.where(RegistroJornada.funcionario_id == funcionario_id)
+            partes.append(consulta)
+
+        if len(partes) == 1:
+            return partes[0].subquery()
+        return union_all(*partes).subquery()
+
+    @staticmethod
+    def consulta_periodo(data_inicio, data_fim, empresa_id=None, funcionario_id=None,
+                         ordenar_por=None, limite=None):
+        """
+        Monta o SELECT dos totais por funcionário no período (sem executar)
+
+        Usado por consultar_periodo e pela exportação, que percorre o
+        resultado em streaming.
+
+        Args:
+            empresa_id: ID da empresa; SEM_EMPRESA filtra quem não tem empresa
+            ordenar_por: rótulo de uma coluna do resultado (ex.: 'total_extras'),
+                         em ordem decrescente; 'funcionario_id' fica crescente
+            limite: número máximo de linhas (ORDER BY ... LIMIT no próprio SQL)
+        """
+        fonte = ResumoService._fonte_periodo(data_inicio, data_fim, funcionario_id)
+
+        consulta = select(
+            Funcionario.id.label('funcionario_id'),
+            Funcionario.nome,
+            Funcionario.cargo,
+            Funcionario.valor_hora,
+            Empresa.nome.label('empresa_nome'),
+            func.coalesce(func.sum(fonte.c.horas_extras), 0).label('total_extras'),
+            func.coalesce(func.sum(fonte.c.horas_faltantes), 0).label('total_faltantes'),
+            func.coalesce(func.sum(fonte.c.horas_trabalhadas), 0).label('total_trabalhadas'),
+            func.coalesce(func.sum(fonte.c.num_registros), 0).label('num_registros')
+        ).select_from(fonte).join(
+            Funcionario, fonte.c.funcionario_id == Funcionario.id
+        ).outerjoin(
+            Empresa, Funcionario.empresa_id == Empresa.id
+        )
+
+        if empresa_id == SEM_EMPRESA:
+            consulta = consulta.where(Funcionario.empresa_id.is_(None))
+        elif empresa_id:
+            consulta = consulta.where(Funcionario.empresa_id == empresa_id)
+
+        consulta = consulta.group_by(
+            Funcionario.id,
+            Funcionario.nome,
+            Funcionario.cargo,
+            Funcionario.valor_hora,
+            Empresa.nome
+        )
+
+        if ordenar_por == 'funcionario_id':
+            consulta = consulta.order_by(Funcionario.id)
+        elif ordenar_por:
+            consulta = consulta.order_by(
+                consulta.selected_columns[ordenar_por].desc(), Funcionario.id
+            )
+        if limite:
+            consulta = consulta.limit(limite)
+        return consulta
+
+    @staticmethod
+    def consultar_periodo(db, data_inicio, data_fim, empresa_id=None, funcionario_id=None,
+                          ordenar_por=None, limite=None):
+        """
+        Totais por funcionário no período (mesmo resultado de somar registros_jornada)
+
+        ordenar_por/limite: ver consulta_periodo (ex.: os 10 com mais horas extras)
+
+        Returns:
+            list: linhas com funcionario_id, nome, cargo, valor_hora, empresa_nome,
+                  total_extras, total_faltantes, total_trabalhadas, num_registros
+        """
+        consulta = ResumoService.consulta_periodo(
+            data_inicio, data_fim, empresa_id, funcionario_id, ordenar_por, limite
+        )
+        return db.execute(consulta).all()
+
+    @staticmethod
+    def totais_por_empresa(db, data_inicio, data_fim):
+        """
+        Totais consolidados por empresa no período
+
+        Returns:
+            list: linhas com empresa_id, empresa_nome, total_extras,
+                  total_faltantes, total_trabalhadas, num_funcionarios
+        """
+        fonte = ResumoService._fonte_periodo(data_inicio, data_fim)
+
+        return db.query(
+            Funcionario.empresa_id,
+            Empresa.nome.label('empresa_nome'),
+            func.coalesce(func.sum(fonte.c.horas_extras), 0).label('total_extras'),
+            func.coalesce(func.sum(fonte.c.horas_faltantes), 0).label('total_faltantes'),
+            func.coalesce(func.sum(fonte.c.horas_trabalhadas), 0).label('total_trabalhadas'),
+            func.count(func.distinct(Funcionario.id)).label('num_funcionarios')
+        ).select_from(fonte).join(
+            Funcionario, fonte.c.funcionario_id == Funcionario.id
+        ).outerjoin(
+            Empresa, Funcionario.empresa_id == Empresa.id
+        ).group_by(
+            Funcionario.empresa_id, Empresa.nome
+        ).all()
+
+    @staticmethod
+    def reconstruir(bind=None):
+        """Recalcula todo o resumo mensal a partir de registros_jornada"""
+        with (bind or engine).begin() as conn:
+            reconstruir_resumo(conn)
+
+
+if __name__ == "__main__":
+    from models.database import init_db
+    init_db()
+    print("🔄 Reconstruindo resumo mensal...")
+    ResumoService.reconstruir()
+    print("✅ Resumo mensal reconstruído!")
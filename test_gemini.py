@@ -2,6 +2,7 @@ from services.ia_service import IAService
 
 # Testa conexão
 ia = IAService()
+ia.aguardar_verificacao()
 
 if ia.habilitado:
     print("✅ Gemini conectado com sucesso!")
@@ -0,0 +1,138 @@
+"""
+tests/test_banco_horas_service.py
+O saldo do banco de horas deve ser o de uma fila FIFO de créditos com validade,
+inclusive depois de correções retroativas refeitas incrementalmente
+"""
+import calendar
+import random
+from collections import deque
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.dialects.sqlite import insert as upsert
+
+from models.database import configurar_engine, importar_modelos
+from models.funcionario import Funcionario
+from models.migracoes import aplicar_migracoes
+from models.registro_jornada import RegistroJornada
+from services import banco_horas_service
+from services.banco_horas_service import BancoHorasService
+
+MESES = 6
+INICIO = date(2024, 1, 1)
+DIAS = 540
+
+
+def _menos_meses(dia, meses):
+    ano, mes = divmod(dia.year * 12 + dia.month - 1 - meses, 12)
+    mes += 1
+    return date(ano, mes, min(dia.day, calendar.monthrange(ano, mes)[1]))
+
+
+def _fifo(movimentos, ate, meses=MESES):
+    """
+    Referência dia a dia: débitos consomem os créditos mais antigos (o que
+    faltar vira dívida, paga pelos próximos créditos) e o crédito que completa
+    `meses` meses sem compensação vence no fim desse dia. Valores em centésimos.
+    """
+    fila, divida, expirado = deque(), 0, 0
+    dia = INICIO
+    while dia <= ate:
+        credito, debito = movimentos.get(dia, (0, 0))
+        if credito:
+            pago = min(credito, divida)
+            divida -= pago
+            if credito > pago:
+                fila.append([dia, credito - pago])
+        while debito and fila:
+            usado = min(debito, fila[0][1])
+            fila[0][1] -= usado
+            debito -= usado
+            if not fila[0][1]:
+                fila.popleft()
+        divida += debito
+        limite = _menos_meses(dia, meses)
+        while fila and fila[0][0] <= limite:
+            expirado += fila.popleft()[1]
+        dia += timedelta(days=1)
+
+    creditos = sum(c for d, (c, _) in movimentos.items() if d <= ate)
+    debitos = sum(b for d, (_, b) in movimentos.items() if d <= ate)
+    return {
+        'credito': creditos / 100, 'debito': debitos / 100, 'expirado': expirado / 100,
+        'saldo': round((sum(r for _, r in fila) - divida) / 100, 2),
+    }
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(banco_horas_service, 'MESES_VALIDADE', MESES)
+    importar_modelos()
+    engine = configurar_engine(create_engine(f"sqlite:///{tmp_path / 'banco.db'}"))
+    aplicar_migracoes(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Funcionario), [{
+            'id': 1, 'nome': 'Teste', 'cargo': 'Analista',
+            'carga_horaria_diaria': 8.0, 'valor_hora': 20.0
+        }])
+    yield engine
+    engine.dispose()
+
+
+def _gravar(conn, dia, credito, debito):
+    stmt = upsert(RegistroJornada.__table__).values(
+        funcionario_id=1, data=dia, hora_entrada=time(8), hora_saida=time(17), intervalo=1.0,
+        horas_trabalhadas=8.0, horas_extras=credito / 100, horas_faltantes=debito / 100
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=['funcionario_id', 'data'],
+        set_={c: stmt.excluded[c] for c in ('horas_extras', 'horas_faltantes')}
+    ))
+
+
+def _conferir(conn, movimentos, sorteio):
+    fim = INICIO + timedelta(days=DIAS + 200)
+    datas = [INICIO + timedelta(days=sorteio.randrange(DIAS + 200)) for _ in range(5)] + [fim]
+    for data in datas:
+        assert BancoHorasService.saldo(conn, 1, data) == _fifo(movimentos, data), data
+    [linha] = BancoHorasService.saldos(conn, fim)
+    esperado = _fifo(movimentos, fim)
+    assert {c: linha[c] for c in esperado} == esperado
+
+
+def test_saldo_confere_com_fifo_apos_correcoes_retroativas(engine):
+    sorteio = random.Random(24)
+    movimentos = {}
+
+    for rodada in range(15):
+        with engine.begin() as conn:
+            for _ in range(20):
+                dia = INICIO + timedelta(days=sorteio.randrange(DIAS))
+                if dia in movimentos and sorteio.random() < 0.15:
+                    conn.execute(delete(RegistroJornada).where(
+                        RegistroJornada.funcionario_id == 1, RegistroJornada.data == dia
+                    ))
+                    del movimentos[dia]
+                    continue
+                valor = sorteio.randrange(1, 400)
+                credito, debito = (valor, 0) if sorteio.random() < 0.55 else (0, valor)
+                _gravar(conn, dia, credito, debito)
+                movimentos[dia] = (credito, debito)
+            # Consulta no meio: a rodada seguinte corrige dias anteriores já montados
+            _conferir(conn, movimentos, sorteio)
+
+
+def test_credito_vence_no_dia_em_que_completa_o_prazo(engine):
+    with engine.begin() as conn:
+        _gravar(conn, date(2024, 1, 31), 300, 0)
+        _gravar(conn, date(2024, 3, 10), 0, 100)
+
+        antes = BancoHorasService.saldo(conn, 1, date(2024, 7, 30))
+        depois = BancoHorasService.saldo(conn, 1, date(2024, 7, 31))
+        assert (antes['saldo'], antes['expirado']) == (2.0, 0.0)
+        assert (depois['saldo'], depois['expirado']) == (0.0, 2.0)
+
+        # Débito retroativo antes do vencimento reduz o que vence
+        _gravar(conn, date(2024, 2, 15), 0, 50)
+        assert BancoHorasService.saldo(conn, 1, date(2024, 7, 31))['expirado'] == 1.5
@@ -0,0 +1,68 @@
+"""
+tests/test_calculo_service.py
+O cálculo em lote deve dar exatamente o mesmo resultado do cálculo individual
+"""
+import random
+from datetime import time
+
+import pytest
+
+from services import calculo_service
+from services.calculo_service import CalculoService
+
+CAMPOS = ('horas_trabalhadas', 'horas_extras', 'horas_faltantes')
+
+
+def _jornadas_aleatorias(total, semente=42):
+    """Jornadas com segundos, viradas de meia-noite e intervalos/cargas de 2 casas"""
+    sorteio = random.Random(semente)
+    jornadas = []
+    for _ in range(total):
+        entrada = time(sorteio.randrange(24), sorteio.randrange(60), sorteio.randrange(60))
+        saida = time(sorteio.randrange(24), sorteio.randrange(60), sorteio.randrange(60))
+        intervalo = round(sorteio.uniform(0, 2), 2)
+        carga = sorteio.choice([4.0, 6.0, 7.33, 8.0, 8.8, round(sorteio.uniform(1, 12), 2)])
+        jornadas.append((entrada, saida, intervalo, carga))
+    # Sem segundos e com entrada igual à saída
+    jornadas.append((time(8, 0), time(17, 0), 1.0, 8.0))
+    jornadas.append((time(22, 0, 30), time(6, 0, 15), 1.0, 8.0))
+    jornadas.append((time(9, 0), time(9, 0), 0.0, 8.0))
+    return jornadas
+
+
+def _comparar(lote, jornadas):
+    for i, (entrada, saida, intervalo, carga) in enumerate(jornadas):
+        esperado = CalculoService.calcular_jornada_completa(entrada, saida, intervalo, carga)
+        for campo in CAMPOS:
+            assert float(lote[campo][i]) == esperado[campo], (campo, entrada, saida, intervalo, carga)
+
+
+def _lote(jornadas):
+    return CalculoService.calcular_lote(
+        [CalculoService.minutos_do_dia(j[0]) for j in jornadas],
+        [CalculoService.minutos_do_dia(j[1]) for j in jornadas],
+        [j[2] for j in jornadas],
+        [j[3] for j in jornadas],
+    )
+
+
+def test_lote_numpy_igual_ao_escalar():
+    pytest.importorskip("numpy")
+    jornadas = _jornadas_aleatorias(20000)
+    _comparar(_lote(jornadas), jornadas)
+
+
+def test_lote_python_igual_ao_escalar(monkeypatch):
+    monkeypatch.setattr(calculo_service, "np", None)
+    jornadas = _jornadas_aleatorias(20000, semente=7)
+    _comparar(_lote(jornadas), jornadas)
+
+
+def test_lote_com_minutos_inteiros_do_banco():
+    """Minutos inteiros (como gravados em registros_jornada) e escalares broadcast"""
+    entradas = [480, 1320, 0]
+    saidas = [1020, 360, 1439]
+    lote = CalculoService.calcular_lote(entradas, saidas, 1.0, 8.0)
+    assert [float(v) for v in lote['horas_trabalhadas']] == [8.0, 7.0, 22.98]
+    assert [float(v) for v in lote['horas_faltantes']] == [0.0, 1.0, 0.0]
+    assert [float(v) for v in lote['horas_extras']] == [0.0, 0.0, 14.98]
@@ -0,0 +1,48 @@
+"""
+tests/test_gerador_carga.py
+O banco sintético deve guardar as horas que CalculoService calcula para as marcações gravadas
+"""
+import pytest
+
+pytest.importorskip('numpy')
+
+from sqlalchemy import select, text
+
+from models.database import importar_modelos
+from models.funcionario import Funcionario
+from models.migracoes import VERSAO_ESQUEMA
+from models.registro_jornada import RegistroJornada
+from services.calculo_service import CalculoService
+from services.gerador_carga import GeradorCarga, criar_engine_carga
+
+CAMPOS = ('horas_trabalhadas', 'horas_extras', 'horas_faltantes')
+
+
+def test_horas_gravadas_conferem_com_calculo(tmp_path):
+    importar_modelos()
+    engine = criar_engine_carga(tmp_path / 'carga.db')
+    GeradorCarga(engine, empresas=2, funcionarios=8, duplicados=0.05, semente=7).gerar()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == VERSAO_ESQUEMA
+        linhas = conn.execute(
+            select(
+                RegistroJornada.hora_entrada,
+                RegistroJornada.hora_saida,
+                RegistroJornada.intervalo,
+                Funcionario.carga_horaria_diaria,
+                *(getattr(RegistroJornada, campo) for campo in CAMPOS)
+            ).join(Funcionario, RegistroJornada.funcionario_id == Funcionario.id)
+        ).all()
+    engine.dispose()
+
+    assert linhas
+    esperado = CalculoService.calcular_lote(
+        [CalculoService.minutos_do_dia(l.hora_entrada) for l in linhas],
+        [CalculoService.minutos_do_dia(l.hora_saida) for l in linhas],
+        [l.intervalo for l in linhas],
+        [l.carga_horaria_diaria for l in linhas]
+    )
+    for i, linha in enumerate(linhas):
+        for campo in CAMPOS:
+            assert getattr(linha, campo) == float(esperado[campo][i]), (campo, linha)
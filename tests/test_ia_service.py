@@ -0,0 +1,88 @@
+"""
+tests/test_ia_service.py
+Escolha do modelo e cache do IAService com um módulo genai falso (sem rede)
+"""
+import json
+
+import pytest
+
+from services import ia_service
+from services.ia_service import ERRO, PRONTO, IAService
+
+
+class GenaiFalso:
+    """Imita google.generativeai: só os modelos em `disponiveis` respondem"""
+
+    def __init__(self, disponiveis):
+        self.disponiveis = set(disponiveis)
+        self.consultados = []
+
+    def configure(self, api_key):
+        self.api_key = api_key
+
+    def GenerativeModel(self, nome):
+        return {'nome': nome}
+
+    def get_model(self, nome):
+        self.consultados.append(nome)
+        if nome.split('/', 1)[1] not in self.disponiveis:
+            raise RuntimeError(f"404 {nome} não encontrado")
+        return {'name': nome}
+
+
+@pytest.fixture
+def modelos(monkeypatch):
+    monkeypatch.setattr(ia_service, 'MODELOS_PARA_TENTAR', ['modelo-a', 'modelo-b', 'modelo-c'])
+
+
+def _servico(genai, cache, **kwargs):
+    return IAService(genai_modulo=genai, api_key='chave-teste', cache_path=str(cache),
+                     verificar=False, **kwargs)
+
+
+def test_escolhe_primeiro_modelo_disponivel_e_grava_cache(modelos, tmp_path):
+    cache = tmp_path / 'cache.json'
+    genai = GenaiFalso(['modelo-b', 'modelo-c'])
+    servico = _servico(genai, cache)
+
+    assert servico.verificar_modelo() is True
+    assert servico.estado == PRONTO
+    assert servico.nome_modelo == 'modelo-b'
+    assert genai.consultados == ['models/modelo-a', 'models/modelo-b']
+
+    gravado = json.loads(cache.read_text(encoding='utf-8'))
+    assert gravado['modelo'] == 'modelo-b'
+    assert 'chave-teste' not in cache.read_text(encoding='utf-8')
+
+
+def test_cache_valido_dispensa_verificacao(modelos, tmp_path):
+    cache = tmp_path / 'cache.json'
+    _servico(GenaiFalso(['modelo-c']), cache).verificar_modelo()
+
+    genai = GenaiFalso(['modelo-c'])
+    servico = _servico(genai, cache)
+    assert servico.estado == PRONTO
+    assert servico.nome_modelo == 'modelo-c'
+    assert genai.consultados == []
+
+
+def test_cache_de_outra_chave_ou_vencido_e_ignorado(modelos, tmp_path):
+    cache = tmp_path / 'cache.json'
+    _servico(GenaiFalso(['modelo-a']), cache).verificar_modelo()
+
+    outra = IAService(genai_modulo=GenaiFalso(['modelo-a']), api_key='outra-chave',
+                      cache_path=str(cache), verificar=False)
+    assert outra.estado != PRONTO
+
+    vencido = _servico(GenaiFalso(['modelo-a']), cache, cache_ttl=0)
+    assert vencido.estado != PRONTO
+
+
+def test_nenhum_modelo_disponivel(modelos, tmp_path):
+    cache = tmp_path / 'cache.json'
+    servico = _servico(GenaiFalso([]), cache)
+
+    assert servico.verificar_modelo() is False
+    assert servico.estado == ERRO
+    assert not servico.habilitado
+    assert not cache.exists()
@@ -0,0 +1,29 @@
+"""
+tests/test_tipos.py
+Horas gravadas em centésimos devem voltar exatamente com as mesmas 2 casas
+"""
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select, type_coerce
+
+from models.tipos import HorasCentesimos, centesimos_para_horas, horas_para_centesimos
+
+
+def test_ida_e_volta_sem_perda():
+    for centesimos in range(0, 48 * 100):
+        horas = round(centesimos / 100, 2)
+        assert centesimos_para_horas(horas_para_centesimos(horas)) == horas
+
+
+def test_coluna_grava_inteiro_e_le_horas():
+    metadata = MetaData()
+    tabela = Table('horas', metadata, Column('id', Integer, primary_key=True),
+                   Column('valor', HorasCentesimos))
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(tabela), [{'valor': 1.36}, {'valor': 7.33}, {'valor': 0.01}])
+        lidos = conn.execute(select(tabela.c.valor).order_by(tabela.c.id)).scalars().all()
+        brutos = conn.execute(
+            select(type_coerce(tabela.c.valor, Integer)).order_by(tabela.c.id)
+        ).scalars().all()
+    assert lidos == [1.36, 7.33, 0.01]
+    assert brutos == [136, 733, 1]
@@ -0,0 +1,133 @@
+"""
+ui/aquecimento.py
+Inicialização em segundo plano: a janela aparece primeiro e o banco, as telas
+e a biblioteca da IA são carregados em uma thread logo depois
+
+Depois de init_db o aquecimento só lê: recálculos interrompidos são retomados
+pela tela de funcionários (ou python -m services.recalculo_service) e a tabela
+calendario é gerada ao salvar uma empresa (ou python -m services.calendario_service --gerar).
+
+Os tempos de cada etapa (ms desde o início do processo) são impressos ao fim e
+gravados como uma linha JSON em HORAS_EXTRAS_LOG_INICIO (padrão:
+inicializacao.log), para acompanhar o tempo até a primeira pintura.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+LOG_INICIALIZACAO = os.getenv('HORAS_EXTRAS_LOG_INICIO', 'inicializacao.log')
+
+# Telas importadas no aquecimento (a primeira abertura não paga o import)
+TELAS = [
+    'ui.cadastro_empresa_modern',
+    'ui.cadastro_funcionario_modern',
+    'ui.registro_jornada_modern',
+    'ui.relatorios_modern',
+    'ui.chat_ia_modern',
+]
+
+class TemposInicializacao:
+    """Marcas de tempo da inicialização, relativas a `inicio`"""
+
+    def __init__(self, inicio=None):
+        self.inicio = inicio if inicio is not None else time.perf_counter()
+        self.marcas = {}
+        self._lock = threading.Lock()
+
+    def marcar(self, nome):
+        with self._lock:
+            self.marcas[nome] = round((time.perf_counter() - self.inicio) * 1000, 1)
+
+    def relatorio(self):
+        with self._lock:
+            marcas = sorted(self.marcas.items(), key=lambda m: m[1])
+        return '\n'.join(f"   {ms:8.1f} ms  {nome}" for nome, ms in marcas)
+
+    def gravar(self, caminho=LOG_INICIALIZACAO, **extras):
+        if not caminho:
+            return
+        with self._lock:
+            entrada = {'quando': datetime.now().isoformat(timespec='seconds'), **extras, **self.marcas}
+        try:
+            with open(caminho, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar os tempos de inicialização: {e}")
+
+
+class Aquecimento:
+    """Prepara banco, telas e IA em uma thread; a janela consulta banco_pronto"""
+
+    def __init__(self, tempos):
+        self.tempos = tempos
+        self.erro = None
+        self.esquema_migrado = None
+        self.recalculos_pendentes = 0
+        self._banco = threading.Event()
+        self._concluido = threading.Event()
+
+    def iniciar(self):
+        threading.Thread(target=self._executar, name='aquecimento', daemon=True).start()
+        return self
+
+    @property
+    def banco_pronto(self):
+        """True quando init_db terminou (com ou sem erro; ver `erro`)"""
+        return self._banco.is_set()
+
+    @property
+    def concluido(self):
+        return self._concluido.is_set()
+
+    def _executar(self):
+        try:
+            from models.database import init_db
+            self.tempos.marcar('sqlalchemy_importado')
+
+            self.esquema_migrado = init_db()
+            self.tempos.marcar('banco_pronto')
+        except Exception as e:
+            print(f"❌ Erro ao inicializar o banco: {e}")
+            self.erro = e
+        finally:
+            self._banco.set()
+
+        try:
+            import importlib
+            for modulo in TELAS:
+                importlib.import_module(modulo)
+            self.tempos.marcar('telas_importadas')
+
+            from services.ia_service import importar_genai
+            importar_genai()
+            self.tempos.marcar('ia_importada')
+        except Exception as e:
+            # Falha aqui não impede o uso: a tela importa de novo ao abrir
+            print(f"⚠️ Aquecimento incompleto: {e}")
+        finally:
+            self._concluido.set()
+
+        if self.erro is None:
+            # Recálculo interrompido (app fechado no meio): só avisa; a retomada
+            # é pedida na tela de funcionários
+            try:
+                from models.database import sessao
+                from services.recalculo_service import RecalculoService
+                with sessao() as db:
+                    self.recalculos_pendentes = len(RecalculoService.pendentes(db))
+                if self.recalculos_pendentes:
+                    print(f"⚠️ {self.recalculos_pendentes} recálculo(s) interrompido(s); "
+                          "retome pela tela de funcionários")
+            except Exception as e:
+                print(f"⚠️ Recálculos pendentes não consultados: {e}")
+
+    def relatar_quando_concluir(self, root, intervalo=100):
+        """Imprime e grava os tempos assim que o aquecimento terminar"""
+        if not self.concluido:
+            root.after(intervalo, self.relatar_quando_concluir, root, intervalo)
+            return
+        print("⏱️ Inicialização:")
+        print(self.tempos.relatorio())
+        self.tempos.gravar(esquema_migrado=self.esquema_migrado)
@@ -3,9 +3,11 @@ ui/cadastro_empresa_modern.py
 Interface MODERNA para cadastro de empresas
 """
 import tkinter as tk
+from datetime import datetime
 from tkinter import ttk, messagebox
-from models.database import get_db
+from models.database import sessao
 from models.empresa import Empresa
+from services.calendario_service import CalendarioService, normalizar_localidade
 
 class ModernEntry(tk.Frame):
     """Campo de entrada moderno com label flutuante"""
@@ -106,7 +108,6 @@ class CadastroEmpresaModern:
     def __init__(self, parent):
         self.parent = parent
         self.parent.configure(bg='#0f172a')
-        self.db = get_db()
         self.empresa_editando_id = None
         self.setup_ui()
         self.carregar_empresas()
@@ -160,6 +161,10 @@ class CadastroEmpresaModern:
         self.entry_email = ModernEntry(fields_frame, "Email")
         self.entry_email.grid(row=2, column=1, sticky='ew', pady=3, padx=2)
 
+        # Calendário de feriados (ex.: BR/SP/Campinas)
+        self.entry_localidade = ModernEntry(fields_frame, "Localidade (BR/UF/Município)")
+        self.entry_localidade.grid(row=3, column=0, sticky='ew', pady=3, padx=2)
+
         # Botões
         btn_frame = tk.Frame(form_inner, bg='#1e293b')
         btn_frame.pack(fill=tk.X, pady=(10, 0))
@@ -301,47 +306,55 @@ class CadastroEmpresaModern:
             endereco = self.entry_endereco.get().strip()
             telefone = self.entry_telefone.get().strip()
             email = self.entry_email.get().strip()
+            localidade = self.entry_localidade.get().strip()
+            localidade = normalizar_localidade(localidade) if localidade else None
             
             if not nome or not cnpj:
                 messagebox.showwarning("Atenção", "Preencha Nome e CNPJ!")
                 return
             
-            if self.empresa_editando_id:
-                # Modo edição
-                empresa = self.db.query(Empresa).filter(
-                    Empresa.id == self.empresa_editando_id
-                ).first()
-                
-                if empresa:
-                    empresa.nome = nome
-                    empresa.cnpj = cnpj
-                    empresa.endereco = endereco
-                    empresa.telefone = telefone
-                    empresa.email = email
-                    mensagem = "✅ Empresa atualizada com sucesso!"
+            with sessao() as db:
+                if self.empresa_editando_id:
+                    # Modo edição
+                    empresa = db.query(Empresa).filter(
+                        Empresa.id == self.empresa_editando_id
+                    ).first()
+                    
+                    if empresa:
+                        empresa.nome = nome
+                        empresa.cnpj = cnpj
+                        empresa.endereco = endereco
+                        empresa.telefone = telefone
+                        empresa.email = email
+                        empresa.localidade = localidade
+                        mensagem = "✅ Empresa atualizada com sucesso!"
+                    else:
+                        messagebox.showerror("Erro", "Empresa não encontrada!")
+                        return
                 else:
-                    messagebox.showerror("Erro", "Empresa não encontrada!")
-                    return
-            else:
-                # Modo criação
-                empresa = Empresa(
-                    nome=nome,
-                    cnpj=cnpj,
-                    endereco=endereco,
-                    telefone=telefone,
-                    email=email
-                )
-                self.db.add(empresa)
-                mensagem = "✅ Empresa cadastrada com sucesso!"
+                    # Modo criação
+                    empresa = Empresa(
+                        nome=nome,
+                        cnpj=cnpj,
+                        endereco=endereco,
+                        telefone=telefone,
+                        email=email,
+                        localidade=localidade
+                    )
+                    db.add(empresa)
+                    mensagem = "✅ Empresa cadastrada com sucesso!"
+                
+                if localidade:
+                    ano = datetime.now().year
+                    CalendarioService.garantir(db.connection(), ano - 1, ano + 1, [localidade])
+                db.commit()
             
-            self.db.commit()
             messagebox.showinfo("Sucesso", mensagem)
             self.limpar_campos()
             self.carregar_empresas()
             
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar: {str(e)}")
-            self.db.rollback()
     
     def limpar_campos(self):
         """Limpa os campos do formulário"""
@@ -352,6 +365,7 @@ class CadastroEmpresaModern:
         self.entry_endereco.delete(0, tk.END)
         self.entry_telefone.delete(0, tk.END)
         self.entry_email.delete(0, tk.END)
+        self.entry_localidade.delete(0, tk.END)
     
     def carregar_empresas(self):
         """Carrega empresas no Treeview"""
@@ -360,7 +374,8 @@ class CadastroEmpresaModern:
             self.tree.delete(item)
         
         # Carrega do banco
-        empresas = self.db.query(Empresa).all()
+        with sessao() as db:
+            empresas = db.query(Empresa).all()
         
         for emp in empresas:
             self.tree.insert("", tk.END, values=(
@@ -397,6 +412,14 @@ class CadastroEmpresaModern:
         self.entry_telefone.insert(0, values[3] if values[3] != "-" else "")
         self.entry_email.delete(0, tk.END)
         self.entry_email.insert(0, values[4] if values[4] != "-" else "")
+
+        # Campos que não aparecem na lista
+        with sessao() as db:
+            empresa = db.get(Empresa, self.empresa_editando_id)
+        self.entry_endereco.delete(0, tk.END)
+        self.entry_endereco.insert(0, (empresa.endereco if empresa else None) or "")
+        self.entry_localidade.delete(0, tk.END)
+        self.entry_localidade.insert(0, (empresa.localidade if empresa else None) or "")
     
     def excluir_empresa(self):
         """Exclui empresa selecionada"""
@@ -413,11 +436,11 @@ class CadastroEmpresaModern:
             return
         
         try:
-            empresa = self.db.query(Empresa).filter(Empresa.id == emp_id).first()
-            self.db.delete(empresa)
-            self.db.commit()
+            with sessao() as db:
+                empresa = db.query(Empresa).filter(Empresa.id == emp_id).first()
+                db.delete(empresa)
+                db.commit()
             messagebox.showinfo("Sucesso", "✅ Empresa excluída!")
             self.carregar_empresas()
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao excluir: {str(e)}")
-            self.db.rollback()
\ No newline at end of file
+            messagebox.showerror("Erro", f"Erro ao excluir: {str(e)}")
\ No newline at end of file
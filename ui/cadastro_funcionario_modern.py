@@ -4,10 +4,16 @@ Interface MODERNA para cadastro de funcionários
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from models.database import get_db
+from sqlalchemy import select, func
+from models.database import sessao
 from models.funcionario import Funcionario
 from models.empresa import Empresa
 from models.registro_jornada import RegistroJornada
+from services.diretorio_service import DiretorioService
+from services.importacao_service import somente_digitos
+from services.recalculo_service import RecalculoService
+from ui.executor_tarefas import obter_executor
+from ui.tabela_paginada import TabelaPaginada
 
 class ModernEntry(tk.Frame):
     """Campo de entrada moderno com label flutuante"""
@@ -155,12 +161,12 @@ class CadastroFuncionarioModern:
     def __init__(self, parent):
         self.parent = parent
         self.parent.configure(bg='#0f172a')
-        self.db = get_db()
         self.funcionario_editando_id = None
         self.empresas_dict = {}
         self.setup_ui()
         self.carregar_empresas()
         self.carregar_funcionarios()
+        self.parent.after_idle(self.oferecer_retomada)
     
     def setup_ui(self):
         """Configura interface moderna"""
@@ -213,6 +219,13 @@ class CadastroFuncionarioModern:
         self.entry_valor = ModernEntry(fields_frame, "Valor da Hora (R$) *")
         self.entry_valor.grid(row=2, column=1, sticky='ew', pady=2, padx=2)
         
+        # PIS e CPF (lado a lado): identificam o funcionário nos arquivos do relógio
+        self.entry_pis = ModernEntry(fields_frame, "PIS/PASEP (AFD Portaria 1510)")
+        self.entry_pis.grid(row=3, column=0, sticky='ew', pady=2, padx=2)
+        
+        self.entry_cpf = ModernEntry(fields_frame, "CPF (AFD Portaria 671)")
+        self.entry_cpf.grid(row=3, column=1, sticky='ew', pady=2, padx=2)
+        
         # Botões
         btn_frame = tk.Frame(form_inner, bg='#1e293b')
         btn_frame.pack(fill=tk.X, pady=(10, 0))
@@ -295,37 +308,20 @@ class CadastroFuncionarioModern:
             font=('Segoe UI', 10, 'bold')
         )
         
-        # Treeview
+        # Treeview paginado (carrega os funcionários por páginas ao rolar)
         columns = ("ID", "Nome", "Cargo", "Empresa", "Carga H.", "Valor/H")
-        self.tree = ttk.Treeview(
+        self.tabela = TabelaPaginada(
             table_container,
-            columns=columns,
-            show="headings",
+            columns,
+            [50, 180, 120, 150, 80, 100],
+            self.buscar_pagina_funcionarios,
+            contar=self.contar_funcionarios,
+            ao_contar=self.atualizar_contador,
             height=8,
-            style='Modern.Treeview'
-        )
-        
-        # Configurar colunas
-        self.tree.column("ID", width=50, anchor='center')
-        self.tree.column("Nome", width=180)
-        self.tree.column("Cargo", width=120)
-        self.tree.column("Empresa", width=150)
-        self.tree.column("Carga H.", width=80, anchor='center')
-        self.tree.column("Valor/H", width=100, anchor='center')
-        
-        for col in columns:
-            self.tree.heading(col, text=col)
-        
-        # Scrollbar moderna
-        scrollbar = ttk.Scrollbar(
-            table_container,
-            orient=tk.VERTICAL,
-            command=self.tree.yview
+            ancoras={'ID': 'center', 'Carga H.': 'center', 'Valor/H': 'center'}
         )
-        self.tree.configure(yscroll=scrollbar.set)
-        
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tabela.pack(fill=tk.BOTH, expand=True)
+        self.tree = self.tabela.tree
         
         # Botões de ação
         action_frame = tk.Frame(list_inner, bg='#1e293b')
@@ -372,7 +368,8 @@ class CadastroFuncionarioModern:
     
     def carregar_empresas(self):
         """Carrega lista de empresas"""
-        empresas = self.db.query(Empresa).all()
+        with sessao() as db:
+            empresas = DiretorioService.listar_empresas(db)
         self.empresas_dict = {"Nenhuma": None}
         
         for emp in empresas:
@@ -388,6 +385,8 @@ class CadastroFuncionarioModern:
             cargo = self.entry_cargo.get().strip()
             carga = float(self.entry_carga.get().strip())
             valor = float(self.entry_valor.get().strip())
+            pis = somente_digitos(self.entry_pis.get())
+            cpf = somente_digitos(self.entry_cpf.get())
             
             empresa_key = self.combo_empresa.get()
             empresa = self.empresas_dict.get(empresa_key)
@@ -397,35 +396,62 @@ class CadastroFuncionarioModern:
                 messagebox.showwarning("Atenção", "Preencha Nome e Cargo!")
                 return
             
-            if self.funcionario_editando_id:
-                # Modo edição
-                funcionario = self.db.query(Funcionario).filter(
-                    Funcionario.id == self.funcionario_editando_id
-                ).first()
-                
-                if funcionario:
-                    funcionario.nome = nome
-                    funcionario.cargo = cargo
-                    funcionario.carga_horaria_diaria = carga
-                    funcionario.valor_hora = valor
-                    funcionario.empresa_id = empresa_id
-                    mensagem = "✅ Funcionário atualizado com sucesso!"
+            if (pis and len(pis) != 11) or (cpf and len(cpf) != 11):
+                messagebox.showwarning("Atenção", "PIS e CPF devem ter 11 dígitos!")
+                return
+            
+            recalculo_id = tipo = None
+            with sessao() as db:
+                if self.funcionario_editando_id:
+                    # Modo edição
+                    funcionario = db.query(Funcionario).filter(
+                        Funcionario.id == self.funcionario_editando_id
+                    ).first()
+                    
+                    if funcionario:
+                        # Registros já lançados guardam horas calculadas com a carga antiga
+                        tipo = RecalculoService.tipo_alteracao(
+                            funcionario.carga_horaria_diaria, carga, funcionario.valor_hora, valor
+                        )
+                        if tipo:
+                            recalculo = RecalculoService.agendar(
+                                db, funcionario.id, tipo,
+                                motivo=f"carga {funcionario.carga_horaria_diaria:g}h → {carga:g}h, "
+                                       f"valor {funcionario.valor_hora:g} → {valor:g}"
+                            )
+                        funcionario.nome = nome
+                        funcionario.cargo = cargo
+                        funcionario.carga_horaria_diaria = carga
+                        funcionario.valor_hora = valor
+                        funcionario.pis = pis
+                        funcionario.cpf = cpf
+                        funcionario.empresa_id = empresa_id
+                        mensagem = "✅ Funcionário atualizado com sucesso!"
+                    else:
+                        messagebox.showerror("Erro", "Funcionário não encontrado!")
+                        return
                 else:
-                    messagebox.showerror("Erro", "Funcionário não encontrado!")
-                    return
-            else:
-                # Modo criação
-                funcionario = Funcionario(
-                    nome=nome,
-                    cargo=cargo,
-                    carga_horaria_diaria=carga,
-                    valor_hora=valor,
-                    empresa_id=empresa_id
-                )
-                self.db.add(funcionario)
-                mensagem = "✅ Funcionário cadastrado com sucesso!"
+                    # Modo criação
+                    funcionario = Funcionario(
+                        nome=nome,
+                        cargo=cargo,
+                        carga_horaria_diaria=carga,
+                        valor_hora=valor,
+                        pis=pis,
+                        cpf=cpf,
+                        empresa_id=empresa_id
+                    )
+                    db.add(funcionario)
+                    mensagem = "✅ Funcionário cadastrado com sucesso!"
+                
+                db.commit()
+                if tipo:
+                    recalculo_id = recalculo.id
             
-            self.db.commit()
+            if recalculo_id:
+                if tipo == 'carga':
+                    mensagem += "\n\nAs horas extras/faltantes já lançadas serão recalculadas em segundo plano."
+                self.recalcular(recalculo_id)
             messagebox.showinfo("Sucesso", mensagem)
             self.limpar_campos()
             self.carregar_funcionarios()
@@ -434,7 +460,30 @@ class CadastroFuncionarioModern:
             messagebox.showerror("Erro", "Valores numéricos inválidos!")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar: {str(e)}")
-            self.db.rollback()
+    
+    def oferecer_retomada(self):
+        """Pergunta se os recálculos interrompidos (app fechado no meio) devem continuar"""
+        with sessao() as db:
+            pendentes = [r.id for r in RecalculoService.pendentes(db)]
+        if pendentes and messagebox.askyesno(
+            "Recálculo pendente",
+            f"{len(pendentes)} recálculo(s) de horas foi(ram) interrompido(s).\n\n"
+            "Retomar agora em segundo plano?"
+        ):
+            for recalculo_id in pendentes:
+                self.recalcular(recalculo_id)
+    
+    def recalcular(self, recalculo_id):
+        """Executa o recálculo agendado no executor de tarefas (retomável se o app fechar)"""
+        def executar(tarefa):
+            return RecalculoService.executar(recalculo_id, cancelado=lambda: tarefa.cancelada)
+        
+        def concluir(resultados):
+            for r in resultados:
+                print(f"✅ Recálculo do funcionário {r['funcionario_id']}: {r['alterados']} registro(s) "
+                      f"alterado(s), {r['fechamentos']} fechamento(s) atualizado(s)")
+        
+        obter_executor(self.parent).submeter(executar, ao_concluir=concluir, grupo='recalculo')
     
     def limpar_campos(self):
         """Limpa os campos do formulário"""
@@ -445,35 +494,54 @@ class CadastroFuncionarioModern:
         self.entry_carga.delete(0, tk.END)
         self.entry_carga.insert(0, "8.0")
         self.entry_valor.delete(0, tk.END)
+        self.entry_pis.delete(0, tk.END)
+        self.entry_cpf.delete(0, tk.END)
         self.combo_empresa.set("Nenhuma")
     
     def carregar_funcionarios(self):
-        """Carrega funcionários no Treeview"""
-        # Limpa treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Carrega do banco
-        funcionarios = self.db.query(Funcionario).all()
-        
-        for func in funcionarios:
-            try:
-                empresa_nome = func.empresa.nome if func.empresa else "-"
-            except:
-                empresa_nome = "-"
-            
-            self.tree.insert("", tk.END, values=(
-                func.id,
-                func.nome,
-                func.cargo,
-                empresa_nome,
-                f"{func.carga_horaria_diaria}h",
-                f"R$ {func.valor_hora:.2f}"
+        """Carrega funcionários no Treeview (primeira página)"""
+        self.tabela.recarregar()
+    
+    @staticmethod
+    def buscar_pagina_funcionarios(db, apos, limite):
+        """Busca uma página de funcionários por id (roda fora da thread do Tk)"""
+        query = select(
+            Funcionario.id,
+            Funcionario.nome,
+            Funcionario.cargo,
+            Empresa.nome,
+            Funcionario.carga_horaria_diaria,
+            Funcionario.valor_hora
+        ).outerjoin(
+            Empresa, Funcionario.empresa_id == Empresa.id
+        ).order_by(Funcionario.id).limit(limite)
+        
+        if apos is not None:
+            query = query.where(Funcionario.id > apos)
+        
+        linhas = db.execute(query).all()
+        
+        return [
+            (func_id, (
+                func_id,
+                nome,
+                cargo,
+                empresa_nome or "-",
+                f"{carga}h",
+                f"R$ {valor:.2f}"
             ))
-        
-        # Atualiza contador
+            for func_id, nome, cargo, empresa_nome, carga, valor in linhas
+        ]
+    
+    @staticmethod
+    def contar_funcionarios(db):
+        """Total de funcionários (roda fora da thread do Tk)"""
+        return db.execute(select(func.count(Funcionario.id))).scalar()
+    
+    def atualizar_contador(self, total):
+        """Atualiza o contador de funcionários"""
         self.label_count.config(
-            text=f"{len(funcionarios)} funcionário{'s' if len(funcionarios) != 1 else ''}"
+            text=f"{total} funcionário{'s' if total != 1 else ''}"
         )
     
     def editar_funcionario(self):
@@ -508,6 +576,14 @@ class CadastroFuncionarioModern:
         self.entry_carga.insert(0, values[4].replace('h', ''))
         self.entry_valor.delete(0, tk.END)
         self.entry_valor.insert(0, values[5].replace('R$ ', ''))
+        
+        # Campos que não aparecem na lista
+        with sessao() as db:
+            funcionario = db.get(Funcionario, self.funcionario_editando_id)
+        self.entry_pis.delete(0, tk.END)
+        self.entry_pis.insert(0, (funcionario.pis if funcionario else None) or "")
+        self.entry_cpf.delete(0, tk.END)
+        self.entry_cpf.insert(0, (funcionario.cpf if funcionario else None) or "")
     
     def excluir_funcionario(self):
         """Exclui funcionário selecionado"""
@@ -521,9 +597,10 @@ class CadastroFuncionarioModern:
         func_nome = item['values'][1]
         
         # Verifica se há registros vinculados
-        num_registros = self.db.query(RegistroJornada).filter(
-            RegistroJornada.funcionario_id == func_id
-        ).count()
+        with sessao() as db:
+            num_registros = db.query(RegistroJornada).filter(
+                RegistroJornada.funcionario_id == func_id
+            ).count()
         
         if num_registros > 0:
             resposta = messagebox.askyesnocancel(
@@ -540,16 +617,17 @@ class CadastroFuncionarioModern:
                 return
         
         try:
-            # Exclui registros primeiro (se houver)
-            if num_registros > 0:
-                self.db.query(RegistroJornada).filter(
-                    RegistroJornada.funcionario_id == func_id
-                ).delete()
-            
-            # Exclui funcionário
-            func = self.db.query(Funcionario).filter(Funcionario.id == func_id).first()
-            self.db.delete(func)
-            self.db.commit()
+            with sessao() as db:
+                # Exclui registros primeiro (se houver)
+                if num_registros > 0:
+                    db.query(RegistroJornada).filter(
+                        RegistroJornada.funcionario_id == func_id
+                    ).delete()
+                
+                # Exclui funcionário
+                func = db.query(Funcionario).filter(Funcionario.id == func_id).first()
+                db.delete(func)
+                db.commit()
             
             mensagem = "✅ Funcionário excluído!"
             if num_registros > 0:
@@ -559,5 +637,4 @@ class CadastroFuncionarioModern:
             self.carregar_funcionarios()
             
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao excluir: {str(e)}")
-            self.db.rollback()
\ No newline at end of file
+            messagebox.showerror("Erro", f"Erro ao excluir: {str(e)}")
\ No newline at end of file
@@ -5,14 +5,24 @@ Interface MODERNA para chat com IA
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime, timedelta
-from models.database import get_db
+from models.database import sessao
 from models.funcionario import Funcionario
 from models.empresa import Empresa
 from models.registro_jornada import RegistroJornada
-from sqlalchemy import func
-import json
+from services.resumo_service import ResumoService
+from services.contexto_ia_service import ContextoIA, contexto_ia
+from services.diretorio_service import DiretorioService
+from ui.executor_tarefas import obter_executor
+import threading
 import os
 
+# Perguntas por conversa antes de reiniciá-la reenviando os dados completos
+MAX_TURNOS_CONVERSA = 20
+
+INSTRUCOES_IA = """Você é um assistente especializado em análise de dados de RH e gestão de horas.
+Responda de forma clara, objetiva e útil.
+"""
+
 class ModernButton(tk.Button):
     """Botão moderno"""
     def __init__(self, parent, text, command, style='primary', **kwargs):
@@ -54,20 +64,51 @@ class ChatIAModern:
     def __init__(self, parent):
         self.parent = parent
         self.parent.configure(bg='#0f172a')
-        self.db = get_db()
         
-        # Tenta importar IA
+        # Tenta importar IA (a verificação do modelo roda em segundo plano)
         try:
-            from services.ia_service import IAService
-            self.ia_service = IAService()
-            self.ia_disponivel = self.ia_service.habilitado
+            from services.ia_service import obter_ia_service
+            self.ia_service = obter_ia_service()
         except Exception as e:
             print(f"⚠️ IA Service não disponível: {e}")
             self.ia_service = None
-            self.ia_disponivel = False
         
         self.historico_conversa = []
+        
+        # Conversa com histórico no modelo: os dados vão uma vez e depois só as alterações
+        self.conversa = None
+        self._contexto_enviado = None
+        self._turnos = 0
+        self._lock_conversa = threading.Lock()
+        
         self.setup_ui()
+        self.atualizar_status_ia()
+    
+    @property
+    def ia_disponivel(self):
+        """IA pronta ou ainda em verificação (a pergunta aguarda a verificação)"""
+        from services.ia_service import PRONTO, VERIFICANDO
+        return self.ia_service is not None and self.ia_service.estado in (PRONTO, VERIFICANDO)
+    
+    def atualizar_status_ia(self):
+        """Atualiza o selo de status enquanto a verificação do modelo não termina"""
+        from services.ia_service import PRONTO, VERIFICANDO
+        if not self.status_label.winfo_exists():
+            return
+        
+        estado = self.ia_service.estado if self.ia_service else None
+        if estado == PRONTO:
+            self.status_label.config(text="✓ IA Ativa", bg='#10b981')
+            self.label_aviso_ia.config(text="")
+        elif estado == VERIFICANDO:
+            self.status_label.config(text="… Verificando IA", bg='#f59e0b')
+            self.label_aviso_ia.config(text="")
+            self.parent.after(500, self.atualizar_status_ia)
+        else:
+            self.status_label.config(text="⚠ IA Desativada", bg='#ef4444')
+            self.label_aviso_ia.config(
+                text="Configure GEMINI_API_KEY no arquivo .env para habilitar IA"
+            )
     
     def setup_ui(self):
         """Configura interface"""
@@ -95,31 +136,26 @@ class ChatIAModern:
         status_frame = tk.Frame(title_frame, bg='#1e293b')
         status_frame.pack(side=tk.RIGHT)
         
-        if self.ia_disponivel:
-            status_color = '#10b981'
-            status_text = "✓ IA Ativa"
-        else:
-            status_color = '#ef4444'
-            status_text = "⚠ IA Desativada"
-        
-        tk.Label(
+        # Texto e cor definidos em atualizar_status_ia
+        self.status_label = tk.Label(
             status_frame,
-            text=status_text,
+            text="",
             font=('Segoe UI', 9, 'bold'),
-            bg=status_color,
+            bg='#1e293b',
             fg='white',
             padx=12,
             pady=6
-        ).pack()
+        )
+        self.status_label.pack()
         
-        if not self.ia_disponivel:
-            tk.Label(
-                header_inner,
-                text="Configure GEMINI_API_KEY no arquivo .env para habilitar IA",
-                font=('Segoe UI', 9),
-                bg='#1e293b',
-                fg='#94a3b8'
-            ).pack(anchor='w', pady=(10, 0))
+        self.label_aviso_ia = tk.Label(
+            header_inner,
+            text="",
+            font=('Segoe UI', 9),
+            bg='#1e293b',
+            fg='#94a3b8'
+        )
+        self.label_aviso_ia.pack(anchor='w', pady=(10, 0))
         
         # Card do chat
         chat_card = tk.Frame(self.parent, bg='#1e293b')
@@ -338,6 +374,7 @@ class ChatIAModern:
         lbl_msg.pack(anchor='w', padx=(8, 0))
 
         self.canvas.yview_moveto(1.0)
+        return frame
     
     def enviar_mensagem(self):
         """Envia mensagem"""
@@ -348,39 +385,50 @@ class ChatIAModern:
         self.entry_mensagem.delete(0, tk.END)
         self.adicionar_mensagem_usuario(mensagem)
         
-        if not self.ia_disponivel:
-            resposta = self.processar_sem_ia(mensagem)
-        else:
-            resposta = self.processar_com_ia(mensagem)
+        # Consultas e chamada à IA rodam no executor; a janela continua respondendo
+        aguardando = self.adicionar_mensagem_assistente("⏳ Pensando...")
+        processar = self.processar_com_ia if self.ia_disponivel else self.processar_sem_ia
+        
+        def responder(resposta):
+            aguardando.destroy()
+            self.adicionar_mensagem_assistente(resposta)
         
-        self.adicionar_mensagem_assistente(resposta)
+        def falhar(e):
+            responder(f"Erro ao processar: {str(e)}")
+        
+        obter_executor(self.parent).submeter(
+            lambda tarefa: processar(mensagem, tarefa.db),
+            ao_concluir=responder,
+            ao_falhar=falhar
+        )
     
-    def processar_sem_ia(self, mensagem):
+    def processar_sem_ia(self, mensagem, db=None):
         """Processa sem IA (regras)"""
+        if db is None:
+            with sessao() as db:
+                return self.processar_sem_ia(mensagem, db)
+        
         msg_lower = mensagem.lower()
         
         try:
             if "empresa" in msg_lower and ("quais" in msg_lower or "mostre" in msg_lower):
-                empresas = self.db.query(Empresa).all()
+                empresas = DiretorioService.listar_empresas(db, contar_funcionarios=True)
                 if empresas:
                     resp = "📊 Empresas cadastradas:\n\n"
                     for emp in empresas:
-                        num_func = self.db.query(Funcionario).filter(
-                            Funcionario.empresa_id == emp.id
-                        ).count()
                         resp += f"• {emp.nome}\n"
                         resp += f"  CNPJ: {emp.cnpj}\n"
-                        resp += f"  Funcionários: {num_func}\n\n"
+                        resp += f"  Funcionários: {emp.num_funcionarios}\n\n"
                     return resp
                 else:
                     return "Nenhuma empresa cadastrada ainda."
             
             elif "funcionário" in msg_lower or "funcionario" in msg_lower:
-                funcionarios = self.db.query(Funcionario).all()
+                funcionarios = DiretorioService.listar_funcionarios(db)
                 if funcionarios:
                     resp = "👥 Funcionários cadastrados:\n\n"
                     for func in funcionarios[:10000]:  # Limita a 10000 para evitar excesso
-                        empresa = func.empresa.nome if func.empresa else "Sem empresa"
+                        empresa = func.empresa_nome or "Sem empresa"
                         resp += f"• {func.nome}\n"
                         resp += f"  Cargo: {func.cargo}\n"
                         resp += f"  Empresa: {empresa}\n"
@@ -397,30 +445,17 @@ class ChatIAModern:
                 data_inicio = datetime.now().date() - timedelta(days=30)
                 data_fim = datetime.now().date()
                 
-                resultados = self.db.query(
-                    Funcionario.id,
-                    Funcionario.nome,
-                    Empresa.nome.label('empresa_nome'),
-                    func.sum(RegistroJornada.horas_extras).label('total_extras')
-                ).select_from(Funcionario).join(
-                    RegistroJornada, RegistroJornada.funcionario_id == Funcionario.id
-                ).outerjoin(
-                    Empresa, Funcionario.empresa_id == Empresa.id
-                ).filter(
-                    RegistroJornada.data.between(data_inicio, data_fim)
-                ).group_by(
-                    Funcionario.id, Funcionario.nome, Empresa.nome
-                ).order_by(
-                    func.sum(RegistroJornada.horas_extras).desc()
-                ).limit(10).all()
+                resultados = ResumoService.consultar_periodo(
+                    db, data_inicio, data_fim, ordenar_por='total_extras', limite=10
+                )
                 
                 if resultados:
                     resp = f"⏰ Horas extras (últimos 30 dias):\n\n"
-                    for func_id, nome, empresa, total in resultados:
-                        empresa_txt = empresa or "Sem empresa"
-                        resp += f"• {nome}\n"
+                    for r in resultados:
+                        empresa_txt = r.empresa_nome or "Sem empresa"
+                        resp += f"• {r.nome}\n"
                         resp += f"  Empresa: {empresa_txt}\n"
-                        resp += f"  Horas extras: {total:.2f}h\n\n"
+                        resp += f"  Horas extras: {r.total_extras:.2f}h\n\n"
                     return resp
                 else:
                     return "Nenhum registro de horas extras nos últimos 30 dias."
@@ -440,100 +475,90 @@ class ChatIAModern:
             traceback.print_exc()
             return f"Erro ao processar: {str(e)}"
     
-    def processar_com_ia(self, mensagem):
+    def processar_com_ia(self, mensagem, db=None):
         """Processa com IA"""
-        try:
-            contexto = self.coletar_contexto()
-            
-            self.historico_conversa.append({
-                'role': 'user',
-                'content': mensagem
-            })
-            
-            prompt_completo = f"""
-Você é um assistente especializado em análise de dados de RH e gestão de horas.
-
-DADOS DISPONÍVEIS:
-{json.dumps(contexto, indent=2, ensure_ascii=False)}
+        # Mensagens enviadas em sequência rápida chegam ao modelo na ordem
+        with self._lock_conversa:
+            try:
+                contexto = self.coletar_contexto(db)
+                
+                if not self.ia_service.aguardar_verificacao(timeout=30):
+                    # Verificação terminou sem modelo: responde pelas regras locais
+                    return self.processar_sem_ia(mensagem, db)
+                
+                if self.conversa is None and self._turnos == 0:
+                    self.conversa = self.ia_service.iniciar_conversa()
+                
+                if self._turnos >= MAX_TURNOS_CONVERSA:
+                    # Conversa longa demais: recomeça e reenvia os dados completos
+                    self.conversa = self.ia_service.iniciar_conversa()
+                    self._contexto_enviado = None
+                    self._turnos = 0
+                
+                if self.conversa is None:
+                    return self._responder_sem_conversa(mensagem, contexto)
+                
+                if self._contexto_enviado is None:
+                    prompt = f"""{INSTRUCOES_IA}
+Os dados vêm em JSON compacto: cada tabela tem "colunas" e "linhas";
+funcionários referenciam a empresa por empresa_id. Use esses dados nas
+próximas perguntas; quando mudarem, envio só as alterações.
 
-HISTÓRICO:
-{json.dumps(self.historico_conversa[-5:], indent=2, ensure_ascii=False)}
+DADOS:
+{ContextoIA.serializar(contexto)}
 
-PERGUNTA: {mensagem}
+PERGUNTA: {mensagem}"""
+                elif contexto is not self._contexto_enviado:
+                    delta = ContextoIA.diferenca(self._contexto_enviado, contexto)
+                    prompt = mensagem
+                    if delta:
+                        prompt = f"""ATUALIZAÇÃO DOS DADOS (linhas alteradas/incluídas e ids removidos):
+{ContextoIA.serializar(delta)}
 
-Responda de forma clara, objetiva e útil.
-"""
-            
-            resposta = self.ia_service.responder_consulta(prompt_completo)
-            
-            self.historico_conversa.append({
-                'role': 'assistant',
-                'content': resposta
-            })
-            
-            return resposta
-            
-        except Exception as e:
-            print(f"❌ Erro IA: {e}")
-            import traceback
-            traceback.print_exc()
-            return f"Erro ao processar com IA: {str(e)}"
+PERGUNTA: {mensagem}"""
+                else:
+                    prompt = mensagem
+                
+                resposta = self.ia_service.responder_conversa(self.conversa, prompt)
+                # Só conta como enviado depois que o modelo recebeu a mensagem
+                self._contexto_enviado = contexto
+                self._turnos += 1
+                return resposta
+                
+            except Exception as e:
+                print(f"❌ Erro IA: {e}")
+                import traceback
+                traceback.print_exc()
+                return f"Erro ao processar com IA: {str(e)}"
     
-    def coletar_contexto(self):
-        """Coleta contexto do sistema"""
-        try:
-            empresas = self.db.query(Empresa).all()
-            empresas_data = [
-                {'id': e.id, 'nome': e.nome, 'cnpj': e.cnpj} 
-                for e in empresas
-            ]
-            
-            funcionarios = self.db.query(Funcionario).all()
-            funcionarios_data = [
-                {
-                    'id': f.id,
-                    'nome': f.nome,
-                    'cargo': f.cargo,
-                    'empresa_id': f.empresa_id,
-                    'empresa_nome': f.empresa.nome if f.empresa else None,
-                    'carga_horaria': f.carga_horaria_diaria
-                } for f in funcionarios
-            ]
-            
-            data_inicio = datetime.now().date() - timedelta(days=30)
-            data_fim = datetime.now().date()
-            
-            registros_resumo = self.db.query(
-                Funcionario.id,
-                Funcionario.nome,
-                func.sum(RegistroJornada.horas_extras).label('total_extras'),
-                func.sum(RegistroJornada.horas_faltantes).label('total_faltantes'),
-                func.count(RegistroJornada.id).label('num_registros')
-            ).select_from(Funcionario).join(
-                RegistroJornada, RegistroJornada.funcionario_id == Funcionario.id
-            ).filter(
-                RegistroJornada.data.between(data_inicio, data_fim)
-            ).group_by(
-                Funcionario.id, Funcionario.nome
-            ).all()
-            
-            registros_data = [
-                {
-                    'funcionario_id': r[0],
-                    'funcionario_nome': r[1],
-                    'horas_extras_total': float(r[2] or 0),
-                    'horas_faltantes_total': float(r[3] or 0),
-                    'num_registros': r[4]
-                } for r in registros_resumo
-            ]
-            
-            return {
-                'empresas': empresas_data,
-                'funcionarios': funcionarios_data,
-                'resumo_ultimos_30_dias': registros_data,
-                'data_hoje': datetime.now().strftime('%d/%m/%Y')
-            }
+    def _responder_sem_conversa(self, mensagem, contexto):
+        """Modelo sem chat: cada chamada leva dados e histórico recente"""
+        self.historico_conversa.append({
+            'role': 'user',
+            'content': mensagem
+        })
+        
+        prompt_completo = f"""{INSTRUCOES_IA}
+DADOS DISPONÍVEIS (cada tabela tem "colunas" e "linhas"):
+{ContextoIA.serializar(contexto)}
+
+HISTÓRICO:
+{ContextoIA.serializar(self.historico_conversa[-5:])}
+
+PERGUNTA: {mensagem}"""
         
-        except Exception as e:
-            print(f"Erro ao coletar contexto: {e}")
-            return {}
+        resposta = self.ia_service.responder_consulta(prompt_completo)
+        
+        self.historico_conversa.append({
+            'role': 'assistant',
+            'content': resposta
+        })
+        
+        return resposta
+    
+    def coletar_contexto(self, db=None):
+        """Contexto do sistema (em cache até os dados mudarem)"""
+        if db is None:
+            with sessao() as db:
+                return contexto_ia.obter(db)
+        return contexto_ia.obter(db)
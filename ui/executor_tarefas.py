@@ -0,0 +1,198 @@
+"""
+ui/executor_tarefas.py
+Execução de consultas e chamadas lentas fora da thread do Tkinter
+
+As telas submetem funções que rodam em um pool de threads, cada thread com a
+sua própria sessão do SessionLocal. Os resultados voltam para a thread do Tk
+por uma fila verificada com root.after, pois widgets Tk só podem ser
+alterados na thread principal.
+"""
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Intervalo (ms) entre verificações da fila de resultados
+INTERVALO_VERIFICACAO = 30
+
+# Grupo padrão: consultas da tela aberta, canceladas quando o usuário troca de
+# tela. Trabalhos longos (importação, exportação, recálculo) usam grupo próprio
+# e continuam rodando
+GRUPO_TELA = 'tela'
+
+def widget_existe(widget):
+    """Callbacks de trabalhos longos podem chegar depois que a tela foi fechada"""
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
+
+class Tarefa:
+    """Contexto entregue à função executada em segundo plano"""
+
+    def __init__(self, executor, grupo, ao_concluir, ao_falhar, ao_progresso):
+        self._executor = executor
+        self.grupo = grupo
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.ao_progresso = ao_progresso
+        self._cancelada = threading.Event()
+        self.future = None
+
+    @property
+    def db(self):
+        """Sessão exclusiva da thread que está executando a tarefa"""
+        return self._executor._sessao_da_thread()
+
+    @property
+    def cancelada(self):
+        """Tarefas longas devem consultar este sinal e parar quando True"""
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        self._cancelada.set()
+        if self.future is not None:
+            self.future.cancel()
+        # Tarefa cancelada antes de rodar nunca entrega o resultado final
+        self._executor._descartar(self)
+
+    def progresso(self, *valores):
+        """Envia um aviso de progresso para a thread do Tk"""
+        if self.ao_progresso and not self.cancelada:
+            self._executor._entregar(self, self.ao_progresso, valores)
+
+
+class ExecutorTarefas:
+    """Pool de threads com entrega de resultados na thread do Tk"""
+
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tarefa')
+        self._local = threading.local()
+        self._fila = queue.Queue()
+        self._tarefas = set()
+        self._lock = threading.Lock()
+        self._verificando = False
+
+    def submeter(self, funcao, *args, ao_concluir=None, ao_falhar=None, ao_progresso=None,
+                 grupo=GRUPO_TELA):
+        """
+        Executa funcao(tarefa, *args) em segundo plano
+
+        Args:
+            funcao: recebe a Tarefa (use tarefa.db para consultas) e os args
+            ao_concluir: callable(resultado) chamado na thread do Tk
+            ao_falhar: callable(exceção) chamado na thread do Tk (padrão: imprime o erro)
+            ao_progresso: callable(*valores) para os avisos de tarefa.progresso()
+            grupo: conjunto de tarefas canceladas juntas (padrão: GRUPO_TELA)
+
+        Returns:
+            Tarefa: permite cancelar a tarefa
+        """
+        tarefa = Tarefa(self, grupo, ao_concluir, ao_falhar, ao_progresso)
+        with self._lock:
+            self._tarefas.add(tarefa)
+        tarefa.future = self._pool.submit(self._executar, tarefa, funcao, args)
+        self._agendar_verificacao()
+        return tarefa
+
+    def cancelar(self, grupo=None):
+        """Cancela as tarefas do grupo (ou todas); seus callbacks não serão chamados"""
+        with self._lock:
+            alvo = [t for t in self._tarefas if grupo is None or t.grupo == grupo]
+            self._tarefas.difference_update(alvo)
+        for tarefa in alvo:
+            tarefa.cancelar()
+
+    @property
+    def pendentes(self):
+        with self._lock:
+            return len(self._tarefas)
+
+    def encerrar(self):
+        """Cancela tudo e libera as threads (chamar ao fechar a janela)"""
+        self.cancelar()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------ internos
+
+    def _descartar(self, tarefa):
+        with self._lock:
+            self._tarefas.discard(tarefa)
+
+    def _sessao_da_thread(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # Importado aqui: o executor nasce com a janela, antes do SQLAlchemy
+            from models.database import SessionLocal
+            db = self._local.db = SessionLocal()
+        return db
+
+    def _executar(self, tarefa, funcao, args):
+        if tarefa.cancelada:
+            return
+        try:
+            resultado = funcao(tarefa, *args)
+            callback, valor = tarefa.ao_concluir, (resultado,)
+        except Exception as e:
+            traceback.print_exc()
+            callback, valor = (tarefa.ao_falhar or self._falha_padrao), (e,)
+        finally:
+            # close() desfaz transação pendente e esvazia o identity map,
+            # deixando a sessão da thread limpa para a próxima tarefa
+            db = getattr(self._local, 'db', None)
+            if db is not None:
+                db.close()
+
+        self._entregar(tarefa, callback, valor, final=True)
+
+    def _entregar(self, tarefa, callback, valores, final=False):
+        self._fila.put((tarefa, callback, valores, final))
+
+    def _falha_padrao(self, erro):
+        print(f"❌ Erro em tarefa de segundo plano: {erro}")
+
+    def _agendar_verificacao(self):
+        # Chamado só na thread do Tk (submeter / própria verificação)
+        if not self._verificando:
+            self._verificando = True
+            self.root.after(INTERVALO_VERIFICACAO, self._verificar_fila)
+
+    def _verificar_fila(self):
+        self._verificando = False
+        try:
+            while True:
+                tarefa, callback, valores, final = self._fila.get_nowait()
+                if final:
+                    with self._lock:
+                        self._tarefas.discard(tarefa)
+                if tarefa.cancelada or callback is None:
+                    continue
+                try:
+                    callback(*valores)
+                except Exception:
+                    # Widget destruído ou erro no callback não derruba o loop
+                    traceback.print_exc()
+        except queue.Empty:
+            pass
+
+        if self.pendentes:
+            self._agendar_verificacao()
+
+
+_executor = None
+
+def iniciar_executor(root, max_workers=4):
+    """Cria o executor da aplicação (chamado pela MainWindow)"""
+    global _executor
+    if _executor is None:
+        _executor = ExecutorTarefas(root, max_workers)
+    return _executor
+
+def obter_executor(widget=None):
+    """Retorna o executor da aplicação, criando-o a partir do widget se necessário"""
+    if _executor is None:
+        if widget is None:
+            raise RuntimeError("Executor de tarefas não iniciado")
+        return iniciar_executor(widget.winfo_toplevel())
+    return _executor
@@ -4,10 +4,13 @@ Janela principal - ATUALIZADA para usar interfaces modernas
 """
 import tkinter as tk
 from tkinter import ttk
+from ui.executor_tarefas import GRUPO_TELA, iniciar_executor
 
 class MainWindow:
-    def __init__(self, root):
+    def __init__(self, root, aquecimento=None):
         self.root = root
+        # Inicialização em segundo plano (ui/aquecimento.py); None = banco já pronto
+        self.aquecimento = aquecimento
         self.root.title("Sistema de Controle de Horas")
         self.root.geometry("1400x800")
         self.root.resizable(True, True)
@@ -19,6 +22,10 @@ class MainWindow:
         self.current_view = None
         self.menu_buttons = []
         
+        # Consultas e chamadas de IA rodam fora da thread do Tk
+        self.executor = iniciar_executor(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         self.setup_styles()
         self.setup_ui()
     
@@ -184,9 +191,91 @@ class MainWindow:
             bg='#0f172a',
             fg='#94a3b8'
         ).pack(side=tk.RIGHT, padx=20)
+        
+        # Sessões do banco abertas e objetos carregados (deve ficar estável)
+        self.label_sessoes = tk.Label(
+            footer_main,
+            text="",
+            font=('Segoe UI', 8),
+            bg='#0f172a',
+            fg='#475569'
+        )
+        self.label_sessoes.pack(side=tk.LEFT, padx=20)
+        self.atualizar_estatisticas_sessoes()
+
+        # Consultas SQL mais caras (monitor do engine)
+        tk.Button(
+            footer_main,
+            text="🐢 SQL",
+            command=self.show_painel_sql,
+            font=('Segoe UI', 8),
+            bg='#0f172a',
+            fg='#475569',
+            activebackground='#1e293b',
+            activeforeground='white',
+            relief=tk.FLAT,
+            cursor='hand2',
+            borderwidth=0
+        ).pack(side=tk.LEFT)
+    
+    def atualizar_estatisticas_sessoes(self):
+        """Mostra no rodapé o uso de sessões do banco (atualiza a cada 5s)"""
+        if not self.banco_pronto():
+            self.root.after(500, self.atualizar_estatisticas_sessoes)
+            return
+        from models.database import estatisticas_sessoes
+        stats = estatisticas_sessoes()
+        self.label_sessoes.config(
+            text=f"🗄 Sessões: {stats['sessoes_abertas']} · Objetos: {stats['objetos_identity_map']}"
+        )
+        self.root.after(5000, self.atualizar_estatisticas_sessoes)
+    
+    def show_painel_sql(self):
+        """Abre (ou traz para frente) o painel de consultas SQL"""
+        if not self.aguardar_banco(self.show_painel_sql):
+            return
+        painel = getattr(self, 'painel_sql', None)
+        if painel is not None and painel.winfo_exists():
+            painel.lift()
+            return
+        from ui.painel_sql import PainelSQL
+        self.painel_sql = PainelSQL(self.root)
+    
+    def banco_pronto(self):
+        return self.aquecimento is None or self.aquecimento.banco_pronto
+    
+    def aguardar_banco(self, acao):
+        """
+        True se o banco já está pronto; senão agenda `acao` para quando estiver
+
+        Telas chamam no início: `if not self.aguardar_banco(self.show_x): return`
+        """
+        if self.banco_pronto():
+            if self.aquecimento is not None and self.aquecimento.erro is not None:
+                from tkinter import messagebox
+                messagebox.showerror("Banco de dados", f"Erro ao inicializar o banco:\n{self.aquecimento.erro}")
+                return False
+            return True
+        self.page_title.config(text="Carregando banco de dados...")
+        self.root.after(50, self.aguardar_banco_e_executar, acao)
+        return False
+    
+    def aguardar_banco_e_executar(self, acao):
+        if self.banco_pronto():
+            acao()
+        else:
+            self.root.after(50, self.aguardar_banco_e_executar, acao)
+    
+    def on_close(self):
+        """Encerra tarefas em segundo plano e fecha a janela"""
+        self.executor.encerrar()
+        self.root.destroy()
     
     def clear_content(self):
         """Limpa o conteúdo"""
+        # Consultas da tela anterior não devem mais atualizar widgets;
+        # importação, exportação e recálculo continuam
+        self.executor.cancelar(GRUPO_TELA)
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
@@ -324,6 +413,8 @@ class MainWindow:
     
     def show_cadastro_empresa(self):
         """Mostra cadastro de empresas MODERNO"""
+        if not self.aguardar_banco(self.show_cadastro_empresa):
+            return
         try:
             from ui.cadastro_empresa_modern import CadastroEmpresaModern
             self.clear_content()
@@ -336,6 +427,8 @@ class MainWindow:
     
     def show_cadastro_funcionario(self):
         """Mostra cadastro de funcionários MODERNO"""
+        if not self.aguardar_banco(self.show_cadastro_funcionario):
+            return
         try:
             from ui.cadastro_funcionario_modern import CadastroFuncionarioModern
             self.clear_content()
@@ -348,6 +441,8 @@ class MainWindow:
     
     def show_registro_jornada(self):
         """Mostra registro de jornada MODERNO"""
+        if not self.aguardar_banco(self.show_registro_jornada):
+            return
         try:
             from ui.registro_jornada_modern import RegistroJornadaModern
             self.clear_content()
@@ -360,6 +455,8 @@ class MainWindow:
     
     def show_relatorios(self):
         """Mostra relatórios MODERNO"""
+        if not self.aguardar_banco(self.show_relatorios):
+            return
         try:
             from ui.relatorios_modern import RelatoriosModern
             self.clear_content()
@@ -372,6 +469,8 @@ class MainWindow:
     
     def show_chat_ia(self):
         """Mostra chat IA MODERNO"""
+        if not self.aguardar_banco(self.show_chat_ia):
+            return
         try:
             from ui.chat_ia_modern import ChatIAModern
             self.clear_content()
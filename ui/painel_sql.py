@@ -0,0 +1,114 @@
+"""
+ui/painel_sql.py
+Painel com as consultas SQL mais caras da sessão (ver models/monitor_sql.py)
+"""
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from models.monitor_sql import monitor_sql
+
+class PainelSQL(tk.Toplevel):
+    """Top statements por tempo total e tempo por tela, atualizado a cada 2s"""
+
+    COLUNAS = [
+        ('total_ms', 'Total (ms)', 90),
+        ('execucoes', 'Execuções', 80),
+        ('media_ms', 'Média (ms)', 90),
+        ('max_ms', 'Máx (ms)', 80),
+        ('linhas', 'Linhas afetadas', 100),
+        ('origens', 'Origem', 260),
+        ('sql', 'SQL', 600),
+    ]
+
+    def __init__(self, parent, monitor=monitor_sql):
+        super().__init__(parent, bg='#0f172a')
+        self.monitor = monitor
+        self.title("Monitor de consultas SQL")
+        self.geometry("1200x600")
+        self.setup_ui()
+        self.atualizar()
+
+    def setup_ui(self):
+        topo = tk.Frame(self, bg='#0f172a')
+        topo.pack(fill=tk.X, padx=15, pady=10)
+
+        tk.Label(
+            topo,
+            text=f"🐢 Consultas por tempo total · lentas (>= {self.monitor.limite_lenta_ms:g} ms) "
+                 f"em {self.monitor.log_lentas or '—'}",
+            font=('Segoe UI', 10),
+            bg='#0f172a',
+            fg='#94a3b8'
+        ).pack(side=tk.LEFT)
+
+        for texto, comando in (("💾 Salvar", self.salvar), ("🧹 Zerar", self.zerar)):
+            tk.Button(
+                topo,
+                text=texto,
+                command=comando,
+                font=('Segoe UI', 9),
+                bg='#334155',
+                fg='white',
+                relief=tk.FLAT,
+                cursor='hand2',
+                padx=12
+            ).pack(side=tk.RIGHT, padx=(8, 0))
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=[c for c, _, _ in self.COLUNAS],
+            show='headings',
+            style='Modern.Treeview'
+        )
+        for coluna, titulo, largura in self.COLUNAS:
+            self.tree.heading(coluna, text=titulo)
+            self.tree.column(coluna, width=largura, stretch=(coluna == 'sql'))
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=15)
+
+        self.tree_origens = ttk.Treeview(
+            self,
+            columns=('total_ms', 'execucoes', 'origem'),
+            show='headings',
+            style='Modern.Treeview',
+            height=6
+        )
+        for coluna, titulo, largura in (('total_ms', 'Total (ms)', 90),
+                                         ('execucoes', 'Execuções', 80),
+                                         ('origem', 'Tela / serviço', 500)):
+            self.tree_origens.heading(coluna, text=titulo)
+            self.tree_origens.column(coluna, width=largura, stretch=(coluna == 'origem'))
+        self.tree_origens.pack(fill=tk.X, padx=15, pady=10)
+
+    def atualizar(self):
+        if not self.winfo_exists():
+            return
+
+        self.tree.delete(*self.tree.get_children())
+        for item in self.monitor.top(50):
+            self.tree.insert('', tk.END, values=[
+                item['total_ms'], item['execucoes'], item['media_ms'], item['max_ms'],
+                '—' if item['linhas'] is None else item['linhas'], ', '.join(item['origens']), item['sql'][:500]
+            ])
+
+        self.tree_origens.delete(*self.tree_origens.get_children())
+        for t in self.monitor.por_origem():
+            self.tree_origens.insert('', tk.END, values=[t['total_ms'], t['execucoes'], t['origem']])
+
+        self.after(2000, self.atualizar)
+
+    def zerar(self):
+        self.monitor.zerar()
+        self.tree.delete(*self.tree.get_children())
+        self.tree_origens.delete(*self.tree_origens.get_children())
+
+    def salvar(self):
+        caminho = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension='.txt',
+            initialfile='consultas_sql.txt',
+            filetypes=[("Texto", "*.txt")]
+        )
+        if not caminho:
+            return
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(self.monitor.relatorio(50))
+        messagebox.showinfo("Monitor SQL", f"Relatório salvo em {caminho}", parent=self)
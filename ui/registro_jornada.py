@@ -5,8 +5,9 @@ Interface para registro de jornadas de trabalho - VERSÃO INTEGRADA
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-from sqlalchemy import text
+from sqlalchemy import Integer, String, literal_column, text
 from models.database import get_db
+from models.tipos import SQL_CENTESIMOS_PARA_HORAS
 
 class RegistroJornadaUI:
     def __init__(self, parent):
@@ -338,6 +339,9 @@ class RegistroJornadaUI:
             self.tree.delete(item)
         
         try:
+            from models.registro_jornada import RegistroJornada
+            registros = RegistroJornada.__table__.c
+            
             # Query que pega apenas o registro mais recente de cada funcionário por dia
             query = text("""
                 SELECT r.id, f.nome, 
@@ -354,7 +358,18 @@ class RegistroJornadaUI:
                 )
                 ORDER BY r.data DESC, r.hora_entrada DESC
                 LIMIT 50
-            """)
+            """).columns(
+                # Colunas tipadas: data, horários e horas voltam decodificados (models/tipos.py)
+                literal_column('id', Integer),
+                literal_column('nome', String),
+                literal_column('empresa_nome', String),
+                registros.data,
+                registros.hora_entrada,
+                registros.hora_saida,
+                registros.horas_trabalhadas,
+                registros.horas_extras,
+                registros.horas_faltantes
+            )
             
             result = self.db.execute(query)
             
@@ -504,13 +519,13 @@ class RelatorioSaldoPopup:
                 return
             
             # Query consolidada
-            query = text("""
+            query = text(f"""
                 SELECT 
                     f.id,
                     f.nome,
                     COALESCE(e.nome, f.empresa, 'Sem Empresa') as empresa,
-                    COALESCE(SUM(r.horas_extras), 0) as total_extras,
-                    COALESCE(SUM(r.horas_faltantes), 0) as total_faltas
+                    {SQL_CENTESIMOS_PARA_HORAS.format('COALESCE(SUM(r.horas_extras), 0)')} as total_extras,
+                    {SQL_CENTESIMOS_PARA_HORAS.format('COALESCE(SUM(r.horas_faltantes), 0)')} as total_faltas
                 FROM funcionarios f
                 LEFT JOIN registros_jornada r ON f.id = r.funcionario_id
                 LEFT JOIN empresas e ON f.empresa_id = e.id
@@ -5,8 +5,11 @@ Interface MODERNA para registro de jornadas
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-from sqlalchemy import text
-from models.database import get_db
+from sqlalchemy import inspect, literal_column, text, select, func, tuple_
+from ui.tabela_paginada import TabelaPaginada
+from ui.executor_tarefas import obter_executor, widget_existe
+from services.diretorio_service import DiretorioService
+from services.jornada_service import JornadaService
 
 class ModernEntry(tk.Frame):
     """Campo de entrada moderno"""
@@ -141,7 +144,6 @@ class RegistroJornadaModern:
     def __init__(self, parent):
         self.parent = parent
         self.parent.configure(bg='#0f172a')
-        self.db = get_db()
         self.funcionarios_dict = {}
         
         self.setup_ui()
@@ -248,6 +250,13 @@ class RegistroJornadaModern:
             style='secondary'
         ).pack(side=tk.LEFT, padx=5)
         
+        ModernButton(
+            btn_frame,
+            "📥 Importar Arquivo",
+            self.importar_arquivo,
+            style='primary'
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Card da lista
         list_card = tk.Frame(self.parent, bg='#1e293b')
         list_card.pack(fill=tk.BOTH, expand=True)
@@ -310,25 +319,23 @@ class RegistroJornadaModern:
             # Increase visible rows so the table uses more vertical space and
             # shows more records. With smaller rowheight this yields a better
             # balance of visible rows.
-        self.tree = ttk.Treeview(
-            table_container,
-            columns=columns,
-            show="headings",
-            height=22,
-            style='Modern.Treeview'
-        )
-        
         # Widen columns so values have space and table looks more prominent
         col_widths = [60, 220, 200, 120, 110, 110, 110, 110, 110]
-        for col, width in zip(columns, col_widths):
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=width, anchor='center' if col == 'ID' else tk.W)
-        
-        scrollbar = ttk.Scrollbar(table_container, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
         
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Tabela paginada: busca só as páginas visíveis (todo o histórico
+        # pode ser percorrido sem travar a interface)
+        self.tabela = TabelaPaginada(
+            table_container,
+            columns,
+            col_widths,
+            self.buscar_pagina_registros,
+            contar=self.contar_registros,
+            ao_contar=self.atualizar_contador,
+            height=22,
+            ancoras={'ID': 'center'}
+        )
+        self.tabela.pack(fill=tk.BOTH, expand=True)
+        self.tree = self.tabela.tree
         
         # Botão de ação
         action_frame = tk.Frame(list_inner, bg='#1e293b')
@@ -342,27 +349,25 @@ class RegistroJornadaModern:
         ).pack(side=tk.LEFT, padx=5)
     
     def carregar_funcionarios(self):
-        """Carrega funcionários"""
-        try:
-            from models.funcionario import Funcionario
-            funcionarios = self.db.query(Funcionario).all()
-            
-            self.funcionarios_dict = {}
-            lista_display = []
-            
-            for func in funcionarios:
-                try:
-                    empresa_nome = func.empresa.nome if func.empresa else "Sem Empresa"
-                except:
-                    empresa_nome = "Sem Empresa"
-                
-                display = f"{func.nome} - {empresa_nome}"
-                lista_display.append(display)
-                self.funcionarios_dict[display] = func
-            
-            self.combo_funcionario['values'] = lista_display
-        except Exception as e:
-            print(f"⚠️ Erro ao carregar funcionários: {e}")
+        """Carrega funcionários (consulta em segundo plano)"""
+        obter_executor(self.parent).submeter(
+            self._buscar_funcionarios,
+            ao_concluir=self._exibir_funcionarios,
+            ao_falhar=lambda e: print(f"⚠️ Erro ao carregar funcionários: {e}")
+        )
+    
+    @staticmethod
+    def _buscar_funcionarios(tarefa):
+        """Monta as opções do combobox (roda no executor de tarefas)"""
+        return [
+            (f"{f.nome} - {f.empresa_nome or 'Sem Empresa'}", f)
+            for f in DiretorioService.listar_funcionarios(tarefa.db)
+        ]
+    
+    def _exibir_funcionarios(self, opcoes):
+        """Preenche o combobox de funcionários"""
+        self.funcionarios_dict = dict(opcoes)
+        self.combo_funcionario['values'] = [display for display, _ in opcoes]
     
     def calcular_horas_trabalhadas(self, hora_entrada, hora_saida, intervalo):
         """Calcula horas trabalhadas"""
@@ -388,10 +393,8 @@ class RegistroJornadaModern:
             return 0.0, round(abs(diferenca), 2)
     
     def salvar_registro(self):
-        """Salva registro"""
+        """Salva registro (consulta e gravação em segundo plano)"""
         try:
-            from models.registro_jornada import RegistroJornada
-            
             if not self.combo_funcionario.get():
                 messagebox.showwarning("Atenção", "Selecione um funcionário!")
                 return
@@ -401,26 +404,6 @@ class RegistroJornadaModern:
             data_str = self.entry_data.get().strip()
             data = datetime.strptime(data_str, "%d/%m/%Y").date()
             
-            # Verifica duplicata
-            from models.registro_jornada import RegistroJornada
-            registro_existente = self.db.query(RegistroJornada).filter(
-                RegistroJornada.funcionario_id == funcionario.id,
-                RegistroJornada.data == data
-            ).first()
-            
-            if registro_existente:
-                resposta = messagebox.askyesno(
-                    "Registro Duplicado",
-                    f"⚠️ Já existe um registro para {funcionario.nome} em {data_str}!\n\n"
-                    f"Deseja SUBSTITUIR o registro anterior?"
-                )
-                
-                if not resposta:
-                    return
-                
-                self.db.delete(registro_existente)
-                self.db.commit()
-            
             entrada_str = self.entry_entrada.get().strip()
             saida_str = self.entry_saida.get().strip()
             hora_entrada = datetime.strptime(entrada_str, "%H:%M").time()
@@ -428,44 +411,129 @@ class RegistroJornadaModern:
             
             intervalo = float(self.entry_intervalo.get().strip())
             
-            horas_trabalhadas = self.calcular_horas_trabalhadas(hora_entrada, hora_saida, intervalo)
-            horas_extras, horas_faltantes = self.calcular_extras_faltas(
-                horas_trabalhadas, 
-                funcionario.carga_horaria_diaria
-            )
-            
-            registro = RegistroJornada(
-                funcionario_id=funcionario.id,
-                data=data,
-                hora_entrada=hora_entrada,
-                hora_saida=hora_saida,
-                intervalo=intervalo,
-                horas_trabalhadas=horas_trabalhadas,
-                horas_extras=horas_extras,
-                horas_faltantes=horas_faltantes
+        except ValueError:
+            messagebox.showerror("Erro", "Formato de data/hora inválido!\n\nUse:\nData: DD/MM/AAAA\nHora: HH:MM")
+            return
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
+            return
+        
+        def falhar(e):
+            messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
+        
+        def gravar(tarefa, substituir_id):
+            # Substituição e inclusão na mesma transação
+            return JornadaService.registrar(
+                tarefa.db,
+                funcionario.id,
+                funcionario.carga_horaria_diaria,
+                data,
+                hora_entrada,
+                hora_saida,
+                intervalo,
+                substituir_id=substituir_id
             )
-            
-            self.db.add(registro)
-            self.db.commit()
-            
+        
+        def gravado(horas):
+            messagebox.showinfo("Sucesso", f"✅ Jornada registrada!\n\nFuncionário: {funcionario.nome}")
+            if not widget_existe(self.label_result):
+                return
             resultado = f"""✅ Jornada Registrada!
 
-📊 H. Trabalhadas: {horas_trabalhadas:.2f}h
-⏰ H. Extras: {horas_extras:.2f}h
-⚠️ H. Faltantes: {horas_faltantes:.2f}h"""
+📊 H. Trabalhadas: {horas['horas_trabalhadas']:.2f}h
+⏰ H. Extras: {horas['horas_extras']:.2f}h
+⚠️ H. Faltantes: {horas['horas_faltantes']:.2f}h"""
             
             self.label_result.config(text=resultado, fg='#10b981')
-            
-            messagebox.showinfo("Sucesso", f"✅ Jornada registrada!\n\nFuncionário: {funcionario.nome}")
-            
             self.limpar_campos()
             self.carregar_registros()
+        
+        def verificado(registro_existente):
+            if registro_existente:
+                resposta = messagebox.askyesno(
+                    "Registro Duplicado",
+                    f"⚠️ Já existe um registro para {funcionario.nome} em {data_str}!\n\n"
+                    f"Deseja SUBSTITUIR o registro anterior?"
+                )
+                
+                if not resposta:
+                    return
             
-        except ValueError:
-            messagebox.showerror("Erro", "Formato de data/hora inválido!\n\nUse:\nData: DD/MM/AAAA\nHora: HH:MM")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
-            self.db.rollback()
+            # Gravação não é cancelada ao trocar de tela
+            obter_executor(self.parent).submeter(
+                gravar,
+                registro_existente,
+                ao_concluir=gravado,
+                ao_falhar=falhar,
+                grupo='gravacao'
+            )
+        
+        # Verifica duplicata
+        obter_executor(self.parent).submeter(
+            lambda tarefa: JornadaService.buscar_existente(tarefa.db, funcionario.id, data),
+            ao_concluir=verificado,
+            ao_falhar=falhar
+        )
+    
+    def importar_arquivo(self):
+        """Importa jornadas de um arquivo do relógio de ponto (CSV/AFD)"""
+        from tkinter import filedialog
+        from services.importacao_service import ImportacaoService, ErroImportacao
+        
+        caminho = filedialog.askopenfilename(
+            title="Importar arquivo de ponto",
+            filetypes=[("Arquivos de ponto", "*.csv *.txt *.afd"), ("Todos os arquivos", "*.*")]
+        )
+        if not caminho:
+            return
+        
+        # A importação continua se o usuário trocar de tela; o rótulo pode não existir mais
+        def mostrar_progresso(linhas, gravados):
+            if not widget_existe(self.label_result):
+                return
+            self.label_result.config(
+                text=f"📥 Importando...\n\nLinhas lidas: {linhas}\nJornadas gravadas: {gravados}",
+                fg='#cbd5e1'
+            )
+        
+        def importar(tarefa):
+            return ImportacaoService.importar(
+                caminho,
+                progresso=tarefa.progresso,
+                cancelado=lambda: tarefa.cancelada
+            )
+        
+        def falhar(e):
+            if isinstance(e, ErroImportacao):
+                messagebox.showerror("Erro", f"Arquivo inválido:\n{str(e)}")
+            else:
+                messagebox.showerror("Erro", f"Erro ao importar:\n{str(e)}")
+        
+        mostrar_progresso(0, 0)
+        obter_executor(self.parent).submeter(
+            importar,
+            ao_concluir=self._importacao_concluida,
+            ao_falhar=falhar,
+            ao_progresso=mostrar_progresso,
+            grupo='importacao'
+        )
+    
+    def _importacao_concluida(self, r):
+        """Mostra o resumo da importação"""
+        resultado = f"""✅ Importação concluída!
+
+💾 Jornadas gravadas: {r['gravados']}
+⏭️ Sem funcionário: {r['ignorados']}
+⚠️ Erros: {r['erros']}"""
+        detalhes = "\n".join(r['mensagens'][:10])
+        if not widget_existe(self.label_result):
+            # Tela fechada durante a importação: só o aviso
+            messagebox.showinfo("Importação", resultado + (f"\n\n{detalhes}" if detalhes else ""))
+            return
+        self.label_result.config(text=resultado, fg='#10b981')
+        messagebox.showinfo("Importação", resultado + (f"\n\n{detalhes}" if detalhes else ""))
+        
+        self.carregar_registros()
     
     def limpar_campos(self):
         """Limpa campos"""
@@ -479,53 +547,84 @@ class RegistroJornadaModern:
         self.label_result.config(text="Preencha os dados acima", fg='#cbd5e1')
     
     def carregar_registros(self):
-        """Carrega registros"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        try:
-            query = text("""
-                SELECT r.id, f.nome, 
-                       COALESCE(e.nome, f.empresa, 'Sem Empresa') as empresa_nome,
-                       r.data, r.hora_entrada, r.hora_saida, 
-                       r.horas_trabalhadas, r.horas_extras, r.horas_faltantes
-                FROM registros_jornada r
-                JOIN funcionarios f ON r.funcionario_id = f.id
-                LEFT JOIN empresas e ON f.empresa_id = e.id
-                WHERE r.id IN (
-                    SELECT MAX(id) 
-                    FROM registros_jornada 
-                    GROUP BY funcionario_id, data
-                )
-                ORDER BY r.data DESC, r.hora_entrada DESC
-                LIMIT 50
-            """)
-            
-            result = self.db.execute(query)
-            count = 0
-            
-            for row in result:
-                data_fmt = row[3].strftime('%d/%m/%Y') if hasattr(row[3], 'strftime') else str(row[3])
-                entrada_fmt = row[4].strftime('%H:%M') if hasattr(row[4], 'strftime') else str(row[4])
-                saida_fmt = row[5].strftime('%H:%M') if hasattr(row[5], 'strftime') else str(row[5])
-                
-                self.tree.insert("", tk.END, values=(
-                    row[0],
-                    row[1],
-                    row[2],
-                    data_fmt,
-                    entrada_fmt,
-                    saida_fmt,
-                    f"{row[6]:.1f}h",
-                    f"{row[7]:.1f}h",
-                    f"{row[8]:.1f}h"
-                ))
-                count += 1
-            
-            self.label_count.config(text=f"{count} registro{'s' if count != 1 else ''}")
+        """Carrega registros (primeira página; as demais vêm com a rolagem)"""
+        self.tabela.recarregar()
+    
+    # Bancos antigos guardavam o nome da empresa em texto (funcionarios.empresa)
+    _tem_empresa_texto = None
+    
+    @staticmethod
+    def _nome_empresa(db, Empresa):
+        """Nome da empresa vinculada, ou o texto legado de funcionarios.empresa, ou 'Sem Empresa'"""
+        if RegistroJornadaModern._tem_empresa_texto is None:
+            colunas = inspect(db.get_bind()).get_columns('funcionarios')
+            RegistroJornadaModern._tem_empresa_texto = any(c['name'] == 'empresa' for c in colunas)
+        if RegistroJornadaModern._tem_empresa_texto:
+            return func.coalesce(Empresa.nome, literal_column('funcionarios.empresa'), 'Sem Empresa')
+        return func.coalesce(Empresa.nome, 'Sem Empresa')
+    
+    @staticmethod
+    def buscar_pagina_registros(db, apos, limite):
+        """Busca uma página de registros, do mais recente para o mais antigo
+        
+        Paginação por chave (data, id): cada página continua de onde a anterior
+        parou usando o índice, sem OFFSET. Roda no executor de tarefas.
+        """
+        from models.registro_jornada import RegistroJornada
+        from models.funcionario import Funcionario
+        from models.empresa import Empresa
+        
+        query = select(
+            RegistroJornada.id,
+            Funcionario.nome,
+            RegistroJornadaModern._nome_empresa(db, Empresa),
+            RegistroJornada.data,
+            RegistroJornada.hora_entrada,
+            RegistroJornada.hora_saida,
+            RegistroJornada.horas_trabalhadas,
+            RegistroJornada.horas_extras,
+            RegistroJornada.horas_faltantes
+        ).join(
+            Funcionario, RegistroJornada.funcionario_id == Funcionario.id
+        ).outerjoin(
+            Empresa, Funcionario.empresa_id == Empresa.id
+        ).order_by(
+            RegistroJornada.data.desc(), RegistroJornada.id.desc()
+        ).limit(limite)
+        
+        if apos is not None:
+            query = query.where(tuple_(RegistroJornada.data, RegistroJornada.id) < apos)
+        
+        linhas = db.execute(query).all()
+        
+        pagina = []
+        for row in linhas:
+            data_fmt = row[3].strftime('%d/%m/%Y') if hasattr(row[3], 'strftime') else str(row[3])
+            entrada_fmt = row[4].strftime('%H:%M') if hasattr(row[4], 'strftime') else str(row[4])
+            saida_fmt = row[5].strftime('%H:%M') if hasattr(row[5], 'strftime') else str(row[5])
             
-        except Exception as e:
-            print(f"⚠️ Erro ao carregar registros: {e}")
+            pagina.append(((row[3], row[0]), (
+                row[0],
+                row[1],
+                row[2],
+                data_fmt,
+                entrada_fmt,
+                saida_fmt,
+                f"{row[6]:.1f}h",
+                f"{row[7]:.1f}h",
+                f"{row[8]:.1f}h"
+            )))
+        
+        return pagina
+    
+    @staticmethod
+    def contar_registros(db):
+        """Total de registros (roda fora da thread do Tk)"""
+        return db.execute(text("SELECT COUNT(*) FROM registros_jornada")).scalar()
+    
+    def atualizar_contador(self, total):
+        """Atualiza o contador de registros"""
+        self.label_count.config(text=f"{total} registro{'s' if total != 1 else ''}")
     
     def excluir_registro(self):
         """Exclui registro"""
@@ -538,22 +637,28 @@ class RegistroJornadaModern:
             item = self.tree.item(selection[0])
             reg_id = item['values'][0]
             
-            try:
+            def excluir(tarefa):
                 from models.registro_jornada import RegistroJornada
                 
-                reg = self.db.query(RegistroJornada).filter(
+                db = tarefa.db
+                reg = db.query(RegistroJornada).filter(
                     RegistroJornada.id == reg_id
                 ).first()
                 
-                self.db.delete(reg)
-                self.db.commit()
-                
+                db.delete(reg)
+                db.commit()
+            
+            def excluido(_):
                 messagebox.showinfo("Sucesso", "✅ Registro excluído!")
-                self.carregar_registros()
-                
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao excluir:\n{str(e)}")
-                self.db.rollback()
+                if widget_existe(self.tree):
+                    self.carregar_registros()
+            
+            obter_executor(self.parent).submeter(
+                excluir,
+                ao_concluir=excluido,
+                ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao excluir:\n{str(e)}"),
+                grupo='gravacao'
+            )
     
     def abrir_relatorio(self):
         """Abre relatório"""
@@ -11,6 +11,7 @@ from models.empresa import Empresa
 from models.registro_jornada import RegistroJornada
 from services.calculo_service import CalculoService
 from sqlalchemy import func, text
+from models.tipos import SQL_CENTESIMOS_PARA_HORAS
 
 class ModernCombobox(tk.Frame):
     """Combobox moderno"""
@@ -651,13 +652,13 @@ class RelatorioSaldoPopup:
             self.tree.delete(item)
         
         try:
-            query = text("""
+            query = text(f"""
                 SELECT 
                     f.id,
                     f.nome,
                     COALESCE(e.nome, f.empresa, 'Sem Empresa') as empresa,
-                    COALESCE(SUM(r.horas_extras), 0) as total_extras,
-                    COALESCE(SUM(r.horas_faltantes), 0) as total_faltas
+                    {SQL_CENTESIMOS_PARA_HORAS.format('COALESCE(SUM(r.horas_extras), 0)')} as total_extras,
+                    {SQL_CENTESIMOS_PARA_HORAS.format('COALESCE(SUM(r.horas_faltantes), 0)')} as total_faltas
                 FROM funcionarios f
                 LEFT JOIN registros_jornada r ON f.id = r.funcionario_id
                 LEFT JOIN empresas e ON f.empresa_id = e.id
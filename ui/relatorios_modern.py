@@ -4,13 +4,13 @@ Interface MODERNA para relatórios - VERSÃO CORRIGIDA
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta
-from models.database import get_db
-from models.funcionario import Funcionario
-from models.empresa import Empresa
-from models.registro_jornada import RegistroJornada
+from models.database import sessao
+from services.banco_horas_service import BancoHorasService
 from services.calculo_service import CalculoService
-from sqlalchemy import func, text
+from services.resumo_service import ResumoService
+from services.diretorio_service import DiretorioService
+from services.relatorio_service import PERIODOS, RelatorioService
+from ui.executor_tarefas import obter_executor, widget_existe
 
 class ModernCombobox(tk.Frame):
     """Combobox moderno"""
@@ -103,8 +103,9 @@ class RelatoriosModern:
     def __init__(self, parent):
         self.parent = parent
         self.parent.configure(bg='#0f172a')
-        self.db = get_db()
         self.calculo_service = CalculoService()
+        # Última consulta do relatório (clique repetido cancela a anterior)
+        self._consulta = None
         
         # 🔧 FIX: Variáveis para gerenciar scroll
         self.canvas = None
@@ -231,12 +232,7 @@ class RelatoriosModern:
         
         self.combo_periodo = ModernCombobox(filters_grid, "Período")
         self.combo_periodo.grid(row=0, column=2, sticky='ew', pady=3, padx=2)
-        self.combo_periodo['values'] = [
-            "Últimos 7 dias",
-            "Últimos 30 dias",
-            "Este mês",
-            "Mês passado"
-        ]
+        self.combo_periodo['values'] = list(PERIODOS)
         self.combo_periodo.set("Últimos 30 dias")
         
         btn_frame = tk.Frame(filter_inner, bg='#1e293b')
@@ -249,6 +245,35 @@ class RelatoriosModern:
             style='success'
         ).pack(side=tk.LEFT)
         
+        ModernButton(
+            btn_frame,
+            "📤 Exportar",
+            self.exportar_relatorio,
+            style='primary'
+        ).pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.var_detalhe = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            btn_frame,
+            text="Incluir registros diários",
+            variable=self.var_detalhe,
+            font=('Segoe UI', 10),
+            bg='#1e293b',
+            fg='#cbd5e1',
+            selectcolor='#0f172a',
+            activebackground='#1e293b',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=(15, 0))
+        
+        self.label_exportacao = tk.Label(
+            btn_frame,
+            text="",
+            font=('Segoe UI', 10),
+            bg='#1e293b',
+            fg='#94a3b8'
+        )
+        self.label_exportacao.pack(side=tk.LEFT, padx=(15, 0))
+        
         # Card de resumo
         summary_card = tk.Frame(scrollable_inner, bg='#1e293b')
         summary_card.pack(fill=tk.X, pady=(0, 15))
@@ -396,7 +421,8 @@ class RelatoriosModern:
     def carregar_empresas(self):
         """Carrega empresas"""
         try:
-            empresas = self.db.query(Empresa).all()
+            with sessao() as db:
+                empresas = DiretorioService.listar_empresas(db)
             self.empresas_dict = {"Todas": None}
             
             for e in empresas:
@@ -413,12 +439,11 @@ class RelatoriosModern:
             empresa_key = self.combo_empresa.get()
             empresa_selecionada = self.empresas_dict.get(empresa_key)
             
-            if empresa_selecionada:
-                funcionarios = self.db.query(Funcionario).filter(
-                    Funcionario.empresa_id == empresa_selecionada.id
-                ).all()
-            else:
-                funcionarios = self.db.query(Funcionario).all()
+            with sessao() as db:
+                funcionarios = DiretorioService.listar_funcionarios(
+                    db,
+                    empresa_id=empresa_selecionada.id if empresa_selecionada else None
+                )
             
             self.funcionarios_dict = {"Todos": None}
             
@@ -433,7 +458,8 @@ class RelatoriosModern:
     def carregar_funcionarios(self):
         """Carrega funcionários"""
         try:
-            funcionarios = self.db.query(Funcionario).all()
+            with sessao() as db:
+                funcionarios = DiretorioService.listar_funcionarios(db)
             self.funcionarios_dict = {"Todos": None}
             
             for f in funcionarios:
@@ -446,27 +472,21 @@ class RelatoriosModern:
     
     def calcular_periodo(self):
         """Calcula período"""
-        periodo = self.combo_periodo.get()
-        hoje = datetime.now().date()
-        
-        if periodo == "Últimos 7 dias":
-            data_inicio = hoje - timedelta(days=7)
-            data_fim = hoje
-        elif periodo == "Últimos 30 dias":
-            data_inicio = hoje - timedelta(days=30)
-            data_fim = hoje
-        elif periodo == "Este mês":
-            data_inicio = hoje.replace(day=1)
-            data_fim = hoje
-        elif periodo == "Mês passado":
-            primeiro_dia_mes_atual = hoje.replace(day=1)
-            data_fim = primeiro_dia_mes_atual - timedelta(days=1)
-            data_inicio = data_fim.replace(day=1)
-        else:
-            data_inicio = hoje - timedelta(days=30)
-            data_fim = hoje
-        
-        return data_inicio, data_fim
+        return RelatorioService.periodo(self.combo_periodo.get())
+    
+    def obter_filtros(self):
+        """Período e IDs de empresa/funcionário selecionados (None = todos)"""
+        data_inicio, data_fim = self.calcular_periodo()
+        
+        empresa_selecionada = self.empresas_dict.get(self.combo_empresa.get())
+        func_selecionado = self.funcionarios_dict.get(self.combo_funcionario.get())
+        
+        return (
+            data_inicio,
+            data_fim,
+            empresa_selecionada.id if empresa_selecionada else None,
+            func_selecionado.id if func_selecionado else None
+        )
     
     def gerar_relatorio(self):
         """Gera relatório"""
@@ -475,60 +495,47 @@ class RelatoriosModern:
                 messagebox.showerror("Erro", "Tabela não está disponível.")
                 return
 
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            data_inicio, data_fim = self.calcular_periodo()
-            
-            empresa_key = self.combo_empresa.get()
-            empresa_selecionada = self.empresas_dict.get(empresa_key)
-            
-            func_key = self.combo_funcionario.get()
-            func_selecionado = self.funcionarios_dict.get(func_key)
+            data_inicio, data_fim, empresa_id, funcionario_id = self.obter_filtros()
             
-            query = self.db.query(
-                Funcionario.id,
-                Funcionario.nome,
-                Funcionario.cargo,
-                Funcionario.valor_hora,
-                Empresa.nome.label('empresa_nome'),
-                func.coalesce(func.sum(RegistroJornada.horas_extras), 0).label('total_extras'),
-                func.coalesce(func.sum(RegistroJornada.horas_faltantes), 0).label('total_faltantes')
-            ).select_from(RegistroJornada).join(
-                Funcionario, RegistroJornada.funcionario_id == Funcionario.id
-            ).outerjoin(
-                Empresa, Funcionario.empresa_id == Empresa.id
-            ).filter(
-                RegistroJornada.data.between(data_inicio, data_fim)
+            # Consulta roda em segundo plano; a tabela é preenchida em exibir_relatorio
+            self.card_extras.config(text="...")
+            self.card_faltas.config(text="...")
+            self.card_valor.config(text="...")
+            if self._consulta is not None:
+                self._consulta.cancelar()  # clique repetido: vale a última consulta
+            self._consulta = obter_executor(self.parent).submeter(
+                lambda tarefa: ResumoService.consultar_periodo(
+                    tarefa.db,
+                    data_inicio,
+                    data_fim,
+                    empresa_id=empresa_id,
+                    funcionario_id=funcionario_id
+                ),
+                ao_concluir=self.exibir_relatorio,
+                ao_falhar=self._erro_relatorio
             )
             
-            if empresa_selecionada:
-                query = query.filter(Funcionario.empresa_id == empresa_selecionada.id)
-            
-            if func_selecionado:
-                query = query.filter(Funcionario.id == func_selecionado.id)
+        except Exception as e:
+            self._erro_relatorio(e)
+    
+    def _erro_relatorio(self, e):
+        """Mostra erro ao gerar relatório"""
+        print(f"❌ Erro: {e}")
+        import traceback
+        traceback.print_exc()
+        messagebox.showerror("Erro", f"Erro ao gerar relatório:\n\n{str(e)}")
+    
+    def exibir_relatorio(self, resultados):
+        """Preenche tabela e cards com o resultado da consulta"""
+        try:
+            for item in self.tree.get_children():
+                self.tree.delete(item)
             
-            query = query.group_by(
-                Funcionario.id,
-                Funcionario.nome,
-                Funcionario.cargo,
-                Funcionario.valor_hora,
-                Empresa.nome
-            )
-            resultados = query.all()
             print(f"[relatorios] query returned {len(resultados)} result(s)")
             
-            total_horas_extras = 0
-            total_horas_faltantes = 0
-            total_valor_extras = 0
+            relatorio = RelatorioService.totalizar(resultados)
             
-            for idx, (func_id, nome, cargo, valor_hora, empresa_nome, h_extra, h_falta) in enumerate(resultados):
-                print(f"[relatorios] row: id={func_id}, nome={nome}, extras={h_extra}, faltas={h_falta}")
-                h_extra = h_extra or 0
-                h_falta = h_falta or 0
-                valor_extra = self.calculo_service.calcular_valor_horas_extras(h_extra, valor_hora)
-                empresa_txt = empresa_nome or "Sem empresa"
-                
+            for idx, (func_id, nome, empresa_txt, cargo, h_extra, h_falta, valor_extra) in enumerate(relatorio['linhas']):
                 tag = 'even' if idx % 2 == 0 else 'odd'
                 self.tree.insert("", tk.END, values=(
                     func_id,
@@ -539,23 +546,71 @@ class RelatoriosModern:
                     f"{h_falta:.2f}h",
                     f"R$ {valor_extra:.2f}"
                 ), tags=(tag,))
-                
-                total_horas_extras += h_extra
-                total_horas_faltantes += h_falta
-                total_valor_extras += valor_extra
             
-            self.card_extras.config(text=f"{total_horas_extras:.2f}h")
-            self.card_faltas.config(text=f"{total_horas_faltantes:.2f}h")
-            self.card_valor.config(text=f"R$ {total_valor_extras:.2f}")
+            self.card_extras.config(text=f"{relatorio['total_extras']:.2f}h")
+            self.card_faltas.config(text=f"{relatorio['total_faltantes']:.2f}h")
+            self.card_valor.config(text=f"R$ {relatorio['total_valor']:.2f}")
             
             if not resultados:
                 messagebox.showinfo("Aviso", "Nenhum registro encontrado para o período.")
             
         except Exception as e:
-            print(f"❌ Erro: {e}")
-            import traceback
-            traceback.print_exc()
-            messagebox.showerror("Erro", f"Erro ao gerar relatório:\n\n{str(e)}")
+            self._erro_relatorio(e)
+
+
+    def exportar_relatorio(self):
+        """Exporta o relatório para CSV/XLSX/PDF em segundo plano"""
+        from tkinter import filedialog
+        from services.exportacao_service import ExportacaoService
+        
+        caminho = filedialog.asksaveasfilename(
+            title="Exportar relatório",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx"), ("PDF", "*.pdf")]
+        )
+        if not caminho:
+            return
+        
+        data_inicio, data_fim, empresa_id, funcionario_id = self.obter_filtros()
+        detalhe = self.var_detalhe.get()
+        
+        # A exportação continua se o usuário trocar de tela; o rótulo pode não existir mais
+        def mostrar_progresso(linhas):
+            if widget_existe(self.label_exportacao):
+                self.label_exportacao.config(text=f"📤 {linhas} linhas exportadas...")
+        
+        def exportar(tarefa):
+            return ExportacaoService.exportar(
+                caminho,
+                data_inicio,
+                data_fim,
+                empresa_id=empresa_id,
+                funcionario_id=funcionario_id,
+                detalhe=detalhe,
+                progresso=tarefa.progresso,
+                cancelado=lambda: tarefa.cancelada
+            )
+        
+        def concluir(r):
+            if widget_existe(self.label_exportacao):
+                self.label_exportacao.config(text="")
+            messagebox.showinfo("Exportação", f"✅ {r['linhas']} linhas exportadas para:\n{caminho}")
+        
+        def falhar(e):
+            if widget_existe(self.label_exportacao):
+                self.label_exportacao.config(text="")
+            messagebox.showerror("Erro", f"Erro ao exportar:\n\n{str(e)}")
+        
+        mostrar_progresso(0)
+        executor = obter_executor(self.parent)
+        executor.cancelar('exportacao')
+        executor.submeter(
+            exportar,
+            ao_concluir=concluir,
+            ao_falhar=falhar,
+            ao_progresso=mostrar_progresso,
+            grupo='exportacao'
+        )
 
 
 class RelatorioSaldoPopup:
@@ -565,7 +620,6 @@ class RelatorioSaldoPopup:
         self.janela.title("Relatório de Saldos")
         self.janela.geometry("1000x600")
         self.janela.configure(bg='#0f172a')
-        self.db = get_db()
         
         # 🔧 FIX: Cleanup ao fechar
         self.janela.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -575,10 +629,6 @@ class RelatorioSaldoPopup:
     
     def _on_close(self):
         """🔧 FIX: Limpa recursos ao fechar"""
-        try:
-            self.db.close()
-        except:
-            pass
         self.janela.destroy()
     
     def setup_ui(self):
@@ -618,7 +668,7 @@ class RelatorioSaldoPopup:
             font=('Segoe UI', 10, 'bold')
         )
         
-        columns = ("ID", "Funcionário", "Empresa", "H.Extra", "H.Falta", "Saldo")
+        columns = ("ID", "Funcionário", "Empresa", "H.Extra", "H.Falta", "Banco", "Saldo")
         self.tree = ttk.Treeview(
             table_inner,
             columns=columns,
@@ -627,7 +677,7 @@ class RelatorioSaldoPopup:
             style='Popup.Treeview'
         )
         
-        col_widths = [60, 200, 150, 100, 100, 320]
+        col_widths = [60, 200, 150, 100, 100, 100, 280]
         for col, width in zip(columns, col_widths):
             self.tree.heading(col, text=col)
             self.tree.column(col, width=width)
@@ -667,47 +717,24 @@ class RelatorioSaldoPopup:
             self.tree.delete(item)
         
         try:
-            query = text("""
-                SELECT 
-                    f.id,
-                    f.nome,
-                    COALESCE(e.nome, f.empresa, 'Sem Empresa') as empresa,
-                    COALESCE(SUM(r.horas_extras), 0) as total_extras,
-                    COALESCE(SUM(r.horas_faltantes), 0) as total_faltas
-                FROM funcionarios f
-                LEFT JOIN registros_jornada r ON f.id = r.funcionario_id
-                LEFT JOIN empresas e ON f.empresa_id = e.id
-                GROUP BY f.id, f.nome, empresa
-                HAVING total_extras > 0 OR total_faltas > 0
-                ORDER BY f.nome
-            """)
-            
-            result = self.db.execute(query)
-            registros = result.fetchall()
+            with sessao() as db:
+                registros = RelatorioService.saldos(db)
+                # Saldo hoje já descontadas as horas vencidas do banco de horas
+                banco = {b['funcionario_id']: b['saldo'] for b in BancoHorasService.saldos(db.connection())}
+                db.commit()
             
             if not registros:
                 messagebox.showinfo("Aviso", "Nenhum funcionário com horas extras ou faltantes.")
                 return
             
-            for id_func, nome, empresa, total_extras, total_faltas in registros:
-                total_extras = float(total_extras or 0)
-                total_faltas = float(total_faltas or 0)
-                
-                if total_extras > total_faltas:
-                    sobra = total_extras - total_faltas
-                    mensagem = f"✅ Sobra {sobra:.1f}h de horas extras"
-                elif total_faltas > total_extras:
-                    falta = total_faltas - total_extras
-                    mensagem = f"⚠️ Faltam {falta:.1f}h para compensar"
-                else:
-                    mensagem = "⚖️ Saldo zero (extras = faltas)"
-                
+            for id_func, nome, empresa, total_extras, total_faltas, mensagem in registros:
                 self.tree.insert("", tk.END, values=(
                     id_func,
                     nome,
                     empresa,
                     f"{total_extras:.1f}h",
                     f"{total_faltas:.1f}h",
+                    f"{banco.get(id_func, 0.0):+.1f}h",
                     mensagem
                 ))
         
@@ -0,0 +1,227 @@
+"""
+ui/tabela_paginada.py
+Tabela (Treeview) virtualizada com paginação por chave (keyset)
+
+Só algumas páginas ficam inseridas no Treeview (e em memória) por vez. Ao
+rolar perto do fim, a próxima página (já buscada em segundo plano) é inserida
+e a mais antiga sai do topo; ao voltar para o topo, as páginas que saíram são
+buscadas de novo pela chave em que começavam. Por página fora da tela só fica
+guardada essa chave, então a memória não cresce com a rolagem.
+"""
+import tkinter as tk
+from tkinter import ttk
+from ui.executor_tarefas import obter_executor
+
+class TabelaPaginada(tk.Frame):
+    """Treeview com carregamento sob demanda"""
+
+    def __init__(self, parent, colunas, larguras, buscar_pagina, contar=None, ao_contar=None,
+                 tamanho_pagina=100, max_paginas=5, style='Modern.Treeview', height=22,
+                 ancoras=None, bg='#0f172a'):
+        """
+        Args:
+            colunas: nomes das colunas
+            larguras: larguras das colunas
+            buscar_pagina: callable(db, apos_chave, limite) -> lista de (chave, valores).
+                           Roda no executor de tarefas com a sessão da thread (db).
+                           apos_chave é None na primeira página.
+            contar: callable(db) -> total de linhas (opcional, também em segundo plano)
+            ao_contar: callable(total) chamado na thread do Tk com o resultado de contar
+            tamanho_pagina: linhas por consulta
+            max_paginas: páginas mantidas dentro do Treeview (e em memória) ao mesmo tempo
+            ancoras: dict coluna -> anchor (padrão tk.W)
+        """
+        super().__init__(parent, bg=bg)
+
+        self.buscar_pagina = buscar_pagina
+        self.contar = contar
+        self.ao_contar = ao_contar
+        self.tamanho_pagina = tamanho_pagina
+        self.max_paginas = max(2, max_paginas)
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=colunas,
+            show="headings",
+            height=height,
+            style=style
+        )
+
+        ancoras = ancoras or {}
+        for col, largura in zip(colunas, larguras):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=largura, anchor=ancoras.get(col, tk.W))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._ao_rolar)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self._geracao = 0
+        self._resetar()
+
+    # ------------------------------------------------------------------ estado
+
+    def _resetar(self):
+        """Limpa páginas e itens (não cancela buscas em andamento; elas são descartadas)"""
+        self._geracao += 1
+        self._paginas = {}          # índice -> [(chave, valores), ...], só as páginas no Treeview
+        self._limites = []          # por página lida: (chave anterior ao início, última chave)
+        self._itens = []            # ids do Treeview por página visível
+        self._primeira = 0          # índice da primeira página inserida no Treeview
+        self._fim = False           # não há mais páginas no banco
+        self._buscando = False
+        self._rebuscando = None     # índice da página que saiu e está sendo buscada de novo
+        self._pendente = None       # próxima página já buscada, aguardando a rolagem
+        self._lidas = 0
+        self.tree.delete(*self.tree.get_children())
+
+    def recarregar(self):
+        """Recarrega a tabela a partir da primeira página"""
+        self._resetar()
+        self._buscar_proxima()
+        if self.contar:
+            self._em_segundo_plano(self.contar, self._receber_total)
+
+    @property
+    def total_carregado(self):
+        """Linhas já lidas do banco (sem contar as páginas buscadas de novo)"""
+        return self._lidas
+
+    def selection(self):
+        return self.tree.selection()
+
+    def item(self, item_id):
+        return self.tree.item(item_id)
+
+    def bind_tree(self, evento, handler):
+        """Vincula eventos diretamente ao Treeview"""
+        return self.tree.bind(evento, handler)
+
+    # ------------------------------------------------------- segundo plano
+
+    def _em_segundo_plano(self, funcao, callback, *args):
+        """Executa funcao(db, *args) no executor e entrega o resultado na thread do Tk"""
+        geracao = self._geracao
+
+        def entregar(resultado):
+            # Descarta resultados de antes de um recarregar() ou de tabela já destruída
+            if geracao == self._geracao and self.winfo_exists():
+                callback(resultado)
+
+        def falhar(erro):
+            if geracao == self._geracao:
+                self._buscando = False
+                self._rebuscando = None
+            print(f"⚠️ Erro ao carregar página: {erro}")
+
+        obter_executor(self).submeter(
+            lambda tarefa, *a: funcao(tarefa.db, *a),
+            *args,
+            ao_concluir=entregar,
+            ao_falhar=falhar
+        )
+
+    def _buscar_proxima(self):
+        """Dispara a busca da página seguinte à última do cache"""
+        if self._buscando or self._fim or self._pendente is not None:
+            return
+        apos = self._limites[-1][1] if self._limites else None
+        self._buscando = True
+        self._em_segundo_plano(self.buscar_pagina, self._receber_pagina, apos, self.tamanho_pagina)
+
+    def _receber_pagina(self, linhas):
+        self._buscando = False
+        if len(linhas) < self.tamanho_pagina:
+            self._fim = True
+        if not linhas:
+            return
+
+        # Primeira página ou usuário já está no fim: mostra direto;
+        # caso contrário guarda como pré-carregada até a rolagem pedir
+        if not self._limites or self._perto_do_fim():
+            self._anexar(linhas)
+        else:
+            self._pendente = linhas
+
+    def _receber_total(self, total):
+        if self.ao_contar:
+            self.ao_contar(total)
+
+    # -------------------------------------------------------------- rolagem
+
+    def _perto_do_fim(self):
+        return self.tree.yview()[1] >= 0.9
+
+    def _ao_rolar(self, primeira, ultima):
+        self.scrollbar.set(primeira, ultima)
+        primeira, ultima = float(primeira), float(ultima)
+
+        if ultima >= 0.9:
+            ultima_visivel = self._primeira + len(self._itens)
+            if ultima_visivel < len(self._limites):
+                # Página já lida que saiu da memória (usuário voltou e está descendo de novo)
+                self._buscar_de_novo(ultima_visivel, no_topo=False)
+            elif self._pendente is not None:
+                linhas, self._pendente = self._pendente, None
+                self._anexar(linhas)
+            else:
+                self._buscar_proxima()
+        elif primeira <= 0.1 and self._primeira > 0:
+            self._buscar_de_novo(self._primeira - 1, no_topo=True)
+
+    def _buscar_de_novo(self, indice, no_topo):
+        """Busca outra vez, a partir da chave guardada, uma página que saiu da memória"""
+        if self._rebuscando is not None:
+            return
+        self._rebuscando = indice
+
+        def receber(linhas):
+            self._rebuscando = None
+            # A rolagem pode ter mudado enquanto a consulta rodava
+            esperado = self._primeira - 1 if no_topo else self._primeira + len(self._itens)
+            if indice == esperado and linhas:
+                self._paginas[indice] = linhas
+                self._inserir_pagina(indice, no_topo)
+
+        self._em_segundo_plano(self.buscar_pagina, receber, self._limites[indice][0], self.tamanho_pagina)
+
+    def _anexar(self, linhas):
+        """Adiciona uma página nova ao fim do Treeview"""
+        indice = len(self._limites)
+        apos = self._limites[-1][1] if self._limites else None
+        self._limites.append((apos, linhas[-1][0]))
+        self._lidas += len(linhas)
+        self._paginas[indice] = linhas
+        self._inserir_pagina(indice, no_topo=False)
+        # Pré-carrega a próxima enquanto o usuário lê esta
+        self._buscar_proxima()
+
+    def _inserir_pagina(self, indice, no_topo):
+        """Insere a página `indice` no Treeview, removendo (também da memória) a do lado oposto"""
+        linhas = self._paginas[indice]
+        topo = self.tree.identify_row(1)
+
+        ids = []
+        for i, (_, valores) in enumerate(linhas):
+            tag = 'even' if (indice * self.tamanho_pagina + i) % 2 == 0 else 'odd'
+            ids.append(self.tree.insert("", i if no_topo else tk.END, values=valores, tags=(tag,)))
+
+        if no_topo:
+            self._itens.insert(0, ids)
+            self._primeira = indice
+            if len(self._itens) > self.max_paginas:
+                self.tree.delete(*self._itens.pop())
+                self._paginas.pop(self._primeira + len(self._itens), None)
+        else:
+            self._itens.append(ids)
+            if len(self._itens) > self.max_paginas:
+                self.tree.delete(*self._itens.pop(0))
+                self._paginas.pop(self._primeira, None)
+                self._primeira += 1
+
+        # Mantém a mesma linha no topo da área visível
+        if topo and self.tree.exists(topo):
+            todos = self.tree.get_children()
+            self.tree.yview_moveto(todos.index(topo) / max(len(todos), 1))